@@ -3,6 +3,11 @@ ASGI config for alalax_be project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Run it under an ASGI server (e.g. uvicorn alalax_be.asgi:application) to
+serve the live tracking streams (package/track/<id>/events and
+package/merchantdeliverylist/events); under WSGI they would hold a worker
+per open stream.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -203,3 +203,108 @@ SWAGGER_SETTINGS = {
         },
     },
 }
+
+# Bulk shipment uploads: rows validated, priced and inserted per batch
+BULK_SHIPMENT_BATCH_SIZE = int(os.getenv('BULK_SHIPMENT_BATCH_SIZE', 500))
+
+# Bulk shipment uploads with at least this many rows are processed by the
+# background workers (python manage.py process_bulk_shipment_jobs)
+BULK_SHIPMENT_ASYNC_THRESHOLD = int(os.getenv('BULK_SHIPMENT_ASYNC_THRESHOLD', 1000))
+BULK_SHIPMENT_JOB_STALE_SECONDS = int(os.getenv('BULK_SHIPMENT_JOB_STALE_SECONDS', 600))
+BULK_SHIPMENT_JOB_MAX_ATTEMPTS = int(os.getenv('BULK_SHIPMENT_JOB_MAX_ATTEMPTS', 3))
+
+# Geocoding: live Nominatim lookups are off until GEOCODING_ENABLED=True
+# (a mock 10km distance is used instead). Results are cached in-process
+# and in the GeocodeCacheEntry table; prune with manage.py prune_geocode_cache
+GEOCODING_ENABLED = os.getenv('GEOCODING_ENABLED', 'False') == 'True'
+GEOCODE_CACHE_MEMORY_SIZE = int(os.getenv('GEOCODE_CACHE_MEMORY_SIZE', 10000))
+GEOCODE_CACHE_TTL = int(os.getenv('GEOCODE_CACHE_TTL', 30 * 24 * 60 * 60))
+GEOCODE_CACHE_NEGATIVE_TTL = int(os.getenv('GEOCODE_CACHE_NEGATIVE_TTL', 24 * 60 * 60))
+GEOCODE_CACHE_DB_MAX_ENTRIES = int(os.getenv('GEOCODE_CACHE_DB_MAX_ENTRIES', 200000))
+
+# Distance matrix: pickup/delivery points are snapped to a grid of this many
+# degrees and the distance per cell pair is cached in memory and in the
+# DistanceMatrixEntry table
+DISTANCE_MATRIX_GRID = float(os.getenv('DISTANCE_MATRIX_GRID', 0.001))
+DISTANCE_MATRIX_MEMORY_SIZE = int(os.getenv('DISTANCE_MATRIX_MEMORY_SIZE', 50000))
+DISTANCE_MATRIX_DB_MAX_ENTRIES = int(os.getenv('DISTANCE_MATRIX_DB_MAX_ENTRIES', 500000))
+
+# Geocoder: 'nominatim' or 'stub' (offline, for local development and tests).
+# Bulk uploads geocode unique addresses GEOCODE_MAX_WORKERS at a time under
+# a process-wide limit of GEOCODE_RATE_LIMIT requests per second (Nominatim
+# policy is 1/s; raise it for a self-hosted instance, 0 disables the limit)
+GEOCODER_BACKEND = os.getenv('GEOCODER_BACKEND', 'nominatim')
+GEOCODER_STUB_LATENCY = float(os.getenv('GEOCODER_STUB_LATENCY', 0))
+GEOCODE_RATE_LIMIT = float(os.getenv('GEOCODE_RATE_LIMIT', 1.0))
+GEOCODE_MAX_WORKERS = int(os.getenv('GEOCODE_MAX_WORKERS', 4))
+
+# Delivery prices come from PricingRule rows compiled into an in-memory
+# table; each process checks for edited rules at most this often (seconds)
+PRICING_CHECK_INTERVAL = int(os.getenv('PRICING_CHECK_INTERVAL', 30))
+
+# Delivery quotes from the quote form are cached this many seconds (0 turns
+# the cache off) in the QUOTE_CACHE_ALIAS cache; keys include the pricing
+# in effect, so a pricing change never serves an old price
+QUOTE_CACHE_TTL = int(os.getenv('QUOTE_CACHE_TTL', 300))
+QUOTE_CACHE_ALIAS = os.getenv('QUOTE_CACHE_ALIAS', 'default')
+
+# Tracking IDs are resolved through the TrackingRegistry table. Until
+# manage.py backfill_tracking_registry has run, unregistered IDs are also
+# looked up in both shipment tables; set to False afterwards
+TRACKING_REGISTRY_FALLBACK = os.getenv('TRACKING_REGISTRY_FALLBACK', 'True') == 'True'
+
+# Public tracking pages are cached per tracking ID (0 turns the cache off)
+# and dropped whenever the shipment, its status history or its bulk upload
+# is saved
+TRACKING_CACHE_TTL = int(os.getenv('TRACKING_CACHE_TTL', 300))
+TRACKING_CACHE_ALIAS = os.getenv('TRACKING_CACHE_ALIAS', 'default')
+
+# List endpoints return keyset (cursor) pages of this many rows; clients
+# may ask for up to PAGINATION_MAX_PAGE_SIZE with ?page_size=
+PAGINATION_PAGE_SIZE = int(os.getenv('PAGINATION_PAGE_SIZE', 50))
+PAGINATION_MAX_PAGE_SIZE = int(os.getenv('PAGINATION_MAX_PAGE_SIZE', 200))
+
+# Merchant dashboard counts are kept in the MerchantDeliveryStats table and
+# read by primary key instead of being counted on every load. Rows are only
+# maintained while this is on; run manage.py reset_merchant_stats before
+# turning it back on
+MERCHANT_STATS_TABLE = os.getenv('MERCHANT_STATS_TABLE', 'False') == 'True'
+
+# The admin merchant list (with six-month delivery volumes) is cached this
+# many seconds; 0 turns the cache off
+MERCHANT_USERS_CACHE_TTL = int(os.getenv('MERCHANT_USERS_CACHE_TTL', 300))
+
+# Push notifications are queued in the PushOutbox table and sent by
+# manage.py dispatch_push_notifications. Backend: 'firebase' or 'fake'
+# (offline, for local development, tests and benchmarks). Failed sends are
+# retried after PUSH_RETRY_DELAY seconds, doubling up to PUSH_MAX_RETRY_DELAY,
+# at most PUSH_MAX_ATTEMPTS times
+PUSH_BACKEND = os.getenv('PUSH_BACKEND', 'firebase')
+PUSH_FAKE_LATENCY = float(os.getenv('PUSH_FAKE_LATENCY', 0))
+PUSH_MAX_ATTEMPTS = int(os.getenv('PUSH_MAX_ATTEMPTS', 5))
+PUSH_RETRY_DELAY = float(os.getenv('PUSH_RETRY_DELAY', 30))
+PUSH_MAX_RETRY_DELAY = float(os.getenv('PUSH_MAX_RETRY_DELAY', 3600))
+
+# Firebase service account JSON; only read when the first push is sent
+FIREBASE_CREDENTIALS = os.getenv(
+    'FIREBASE_CREDENTIALS',
+    os.path.join(BASE_DIR, 'alalax-eef30-firebase-adminsdk-fbsvc-6d2706fc09.json')
+)
+
+# Device tokens the app has not registered again for this many days, and
+# tokens FCM reported as dead, are deleted by manage.py prune_fcm_tokens
+# and by the push dispatchers (at start and then hourly)
+FCM_TOKEN_STALE_DAYS = int(os.getenv('FCM_TOKEN_STALE_DAYS', 60))
+
+# Live tracking streams (server-sent events, served by alalax_be/asgi.py).
+# Events go through an in-process bus ('memory'), which only reaches streams
+# in the process that made the change; use 'redis' (or the dotted path of a
+# bus class) when WSGI workers, commands or several ASGI processes publish.
+# Idle streams get a keepalive comment every TRACKING_STREAM_KEEPALIVE
+# seconds and are closed after TRACKING_STREAM_MAX_SECONDS; a stream more
+# than TRACKING_STREAM_QUEUE_SIZE events behind is told to reload
+TRACKING_EVENT_BACKEND = os.getenv('TRACKING_EVENT_BACKEND', 'memory')
+TRACKING_EVENT_REDIS_URL = os.getenv('TRACKING_EVENT_REDIS_URL', 'redis://localhost:6379/0')
+TRACKING_STREAM_KEEPALIVE = float(os.getenv('TRACKING_STREAM_KEEPALIVE', 15))
+TRACKING_STREAM_MAX_SECONDS = float(os.getenv('TRACKING_STREAM_MAX_SECONDS', 3600))
+TRACKING_STREAM_QUEUE_SIZE = int(os.getenv('TRACKING_STREAM_QUEUE_SIZE', 200))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onboarding', '0005_merchantprofile_profile_image_merchantaddress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accountvalidation',
+            index=models.Index(fields=['useremail', '-id'], name='onboarding__userema_9f9a51_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driverprofile',
+            index=models.Index(fields=['-created_at', '-id'], name='onboarding__created_80b84a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='regularuserprofile',
+            index=models.Index(fields=['-created_at', '-id'], name='onboarding__created_0897c3_idx'),
+        ),
+    ]
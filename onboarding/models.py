@@ -28,6 +28,12 @@ class DriverProfile(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination ordering of the admin driver list
+            models.Index(fields=['-created_at', '-id']),
+        ]
+
     def __str__(self):
         return f"{self.firstname} {self.lastname}"
 
@@ -90,6 +96,12 @@ class RegularUserProfile(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination ordering of the admin regular user list
+            models.Index(fields=['-created_at', '-id']),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -109,6 +121,10 @@ class AccountValidation(models.Model):
 
     class Meta:
         ordering = ['-edited_at', '-created_at']
+        indexes = [
+            # Latest OTP for an email: filter(useremail=...).order_by('-id')
+            models.Index(fields=['useremail', '-id']),
+        ]
         
     def __str__(self):
         return self.useremail
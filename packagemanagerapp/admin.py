@@ -8,9 +8,18 @@ admin.site.register(DeliveryStatusHistory)
 admin.site.register(ShippingQuote)
 admin.site.register(ContactUs)
 admin.site.register(MerchantNotification)
+admin.site.register(NotificationCounter)
 admin.site.register(BulkShipmentItem)
 admin.site.register(BulkShipmentUpload)
+admin.site.register(BulkShipmentJob)
 admin.site.register(PickupSchedule)
 admin.site.register(IssueFeedback)
 admin.site.register(FCMToken)
+admin.site.register(GeocodeCacheEntry)
+admin.site.register(DistanceMatrixEntry)
+admin.site.register(PricingRule)
+admin.site.register(TrackingRegistry)
 
+admin.site.register(BulkShipmentItemStatusHistory)
+admin.site.register(MerchantDeliveryStats)
+admin.site.register(PushOutbox)
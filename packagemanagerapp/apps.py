@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PackagemanagerappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'packagemanagerapp'
+
+    def ready(self):
+        # Build the shared fee calculators and geocoder client once at startup
+        from packagemanagerapp.calculatorregistry import load_calculators
+        load_calculators()
@@ -1,14 +1,24 @@
 import ssl
 import certifi
-from geopy.geocoders import Nominatim
 from geopy.distance import geodesic
 from decimal import Decimal
 import logging
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - batch pricing falls back to the per-row path
+    np = None
+
+from packagemanagerapp.geocoding import build_geocoder, estimate_driving_distance, prefetch_distances
+from packagemanagerapp.pricing import ADDONS, get_pricing
+
 logger = logging.getLogger(__name__)
 
 ALLOWED_CITIES = ['calgary', 'airdrie', 'chestermere', 'okotoks']
 
+# Column order of the addon flags accepted by calculate_delivery_fees
+ADDON_FLAGS = ADDONS
+
 
 def get_weight_range(weight):
     """
@@ -34,49 +44,35 @@ class BulkDeliveryFeeCalculator:
     """
     Calculator for bulk shipment pricing with discounted rates.
     
-    Bulk pricing offers discounts compared to single shipment pricing:
+    Bulk pricing offers discounts compared to single shipment pricing.
+    Prices come from the active 'bulk' PricingRule; the initial rule is:
     - Small (1-5kg): $5.99 (vs $7.99 single)
     - Medium (5-15kg): $9.99 (vs $11.99 single)
     - Large (15-30kg): $15.99 (vs $17.99 single)
     """
     
-    def __init__(self):
-        """Initialize the bulk delivery fee calculator with pricing structure"""
-        # Create SSL context for secure geocoding
-        ctx = ssl.create_default_context(cafile=certifi.where())
-        
-        # Initialize geolocator with SSL context
-        self.geolocator = Nominatim(
-            user_agent="alalax_bulk_delivery_calculator",
-            ssl_context=ctx
-        )
-        
-        # Distance pricing tiers (per km)
-        self.pricing_tiers = [
-            {'max_km': 5, 'rate': Decimal('0.00')},  # First 5km free
-            {'max_km': float('inf'), 'rate': Decimal('0.90')},  # $0.90/km after 5km
-        ]
-        
-        # BULK PRICING - Discounted base fees by weight
-        self.base_fees = {
-            'small': Decimal('5.99'),   # 1-5kg (was 7.99 for single)
-            'medium': Decimal('9.99'),  # 5-15kg (was 11.99 for single)
-            'large': Decimal('15.99'),   # 15-30kg (was 17.99 for single)
-        }
+    pricing_tier = 'bulk'
+    
+    def __init__(self, geolocator=None):
+        """
+        Initialize the bulk delivery fee calculator
         
-        # Speed fees (same as single shipment)
-        self.speed_fees = {
-            'standard': Decimal('0.00'),
-            'express': Decimal('4.99'),
-            'instant': Decimal('6.99')
-        }
+        Prices are read from the active 'bulk' PricingRule on each call.
         
-        # Addon fees (same as single shipment)
-        self.addon_prices = {
-            'signature_confirmation': Decimal('1.50'),
-            'fragile_handling': Decimal('2.50'),
-            'oversized_package': Decimal('8.00')
-        }
+        Args:
+            geolocator: Geocoder client to reuse (optional). Shared instances
+                come from calculatorregistry with a pooled client.
+        """
+        if geolocator is None:
+            # Create SSL context for secure geocoding
+            ctx = ssl.create_default_context(cafile=certifi.where())
+            
+            # Initialize geolocator with SSL context
+            geolocator = build_geocoder(
+                user_agent="alalax_bulk_delivery_calculator",
+                ssl_context=ctx
+            )
+        self.geolocator = geolocator
         
         # Allowed cities for delivery
         self.allowed_cities = ALLOWED_CITIES
@@ -120,37 +116,29 @@ class BulkDeliveryFeeCalculator:
         Returns:
             tuple: (distance_km: float|None, error: str|None)
         """
-        # TEMPORARY: Use fixed distance for testing SSL certificate issue
-        logger.warning("Using mock distance - SSL certificate issue")
-        return 10.0, None  # Mock 10km distance
-        
-        # TODO: Uncomment and use actual distance calculation once SSL is configured
-        # try:
-        #     # Geocode both addresses
-        #     pickup_loc = self.geolocator.geocode(pickup_address)
-        #     delivery_loc = self.geolocator.geocode(delivery_address)
-        #     
-        #     if not pickup_loc:
-        #         return None, f"Could not find pickup address: {pickup_address}"
-        #     
-        #     if not delivery_loc:
-        #         return None, f"Could not find delivery address: {delivery_address}"
-        #     
-        #     # Get coordinates
-        #     pickup_coords = (pickup_loc.latitude, pickup_loc.longitude)
-        #     delivery_coords = (delivery_loc.latitude, delivery_loc.longitude)
-        #     
-        #     # Calculate straight-line distance
-        #     straight_distance = geodesic(pickup_coords, delivery_coords).kilometers
-        #     
-        #     # Apply 1.4x multiplier to estimate driving distance
-        #     estimated_driving_distance = straight_distance * 1.4
-        #     
-        #     return round(estimated_driving_distance, 2), None
-        #     
-        # except Exception as e:
-        #     logger.error(f"Distance calculation error: {str(e)}")
-        #     return None, f"Error calculating distance: {str(e)}"
+        # Geocodes are served from the shared cache; live lookups only run
+        # when GEOCODING_ENABLED is on (mock 10km otherwise)
+        return estimate_driving_distance(
+            pickup_address,
+            delivery_address,
+            self.geolocator.geocode
+        )
+    
+    def prefetch_distances(self, pickup_address, delivery_addresses, heartbeat=None):
+        """
+        Load distances for many delivery addresses in one batched lookup
+        
+        Later calculate_distance calls for these pairs are served from memory.
+        
+        Args:
+            pickup_address (str): Pickup location address
+            delivery_addresses (list): Delivery addresses to prefetch
+            heartbeat (callable): Called after every geocoder lookup
+        
+        Returns:
+            int: Number of delivery points prefetched
+        """
+        return prefetch_distances(pickup_address, delivery_addresses, self.geolocator.geocode, heartbeat=heartbeat)
     
     def calculate_delivery_fee(self, distance_km, package_weight, delivery_speed, addons=None):
         """
@@ -171,75 +159,124 @@ class BulkDeliveryFeeCalculator:
                 - total_fee (Decimal)
                 - applied_addons (list)
         """
-        if addons is None:
-            addons = []
+        return get_pricing(self.pricing_tier).fee_breakdown(
+            distance_km, package_weight, delivery_speed, addons
+        )
+    
+    def calculate_delivery_fees(self, distances, package_weights, delivery_speeds, addon_flags=None):
+        """
+        Calculate fee breakdowns for many shipments at once
         
-        # Initialize fee breakdown
-        fee_breakdown = {
-            'base_fee': Decimal('0.00'),
-            'distance_fee': Decimal('0.00'),
-            'speed_fee': Decimal('0.00'),
-            'addons_fee': Decimal('0.00'),
-            'total_fee': Decimal('0.00'),
-            'applied_addons': []
-        }
+        Gives exactly the same results as calling calculate_delivery_fee per
+        row, using NumPy integer arithmetic instead of Decimal. Amounts are
+        kept in ten-thousandths of a dollar and rounded half-even to cents
+        like round(Decimal, 2).
         
-        # Get numeric weight value
-        weight_kg = get_weight_range(package_weight)
-        
-        # 1. BASE FEE - Based on package weight (BULK PRICING)
-        if weight_kg <= 5:
-            fee_breakdown['base_fee'] = self.base_fees['small']
-        elif weight_kg <= 15:
-            fee_breakdown['base_fee'] = self.base_fees['medium']
-        elif weight_kg <= 30:
-            fee_breakdown['base_fee'] = self.base_fees['large']
-        else:
-            # For oversized packages, use large base fee
-            fee_breakdown['base_fee'] = self.base_fees['large']
-        
-        # 2. DISTANCE FEE - First 5km free, then $0.90 per km
-        if distance_km > 5:
-            extra_km = distance_km - 5
-            fee_breakdown['distance_fee'] = Decimal(str(extra_km)) * Decimal('0.90')
-        
-        # 3. SPEED FEE - Based on delivery speed
-        speed_key = delivery_speed.lower() if delivery_speed else 'standard'
-        fee_breakdown['speed_fee'] = self.speed_fees.get(speed_key, Decimal('0.00'))
-        
-        # 4. ADDONS FEE - Calculate total for all addons
-        addons_total = Decimal('0.00')
-        applied_addons = []
-        
-        # Process requested addons
-        for addon in addons:
-            addon_key = addon.lower().replace(' ', '_')
-            if addon_key in self.addon_prices:
-                addons_total += self.addon_prices[addon_key]
-                applied_addons.append(addon)
-        
-        # Automatically add oversized addon if weight > 30kg
-        if weight_kg > 30 and 'oversized_package' not in [a.lower().replace(' ', '_') for a in addons]:
-            addons_total += self.addon_prices['oversized_package']
-            applied_addons.append('oversized_package')
-        
-        fee_breakdown['addons_fee'] = addons_total
-        fee_breakdown['applied_addons'] = applied_addons
-        
-        # 5. CALCULATE TOTAL FEE
-        fee_breakdown['total_fee'] = (
-            fee_breakdown['base_fee'] + 
-            fee_breakdown['distance_fee'] + 
-            fee_breakdown['speed_fee'] + 
-            fee_breakdown['addons_fee']
-        )
+        The per-row path prices Decimal(str(distance_km - free_distance_km)), so
+        float noise such as 7.300000000000001 km is part of the fee. That noise only
+        matters when the fee lands exactly on half a cent, where it decides
+        the rounding direction; the sign of the noise is carried for those
+        rows. Distances more than a rounding error away from two decimals
+        are priced per row.
         
-        # Round all decimal values to 2 places
-        for key in fee_breakdown:
-            if isinstance(fee_breakdown[key], Decimal):
-                fee_breakdown[key] = round(fee_breakdown[key], 2)
+        Args:
+            distances (list): Distances in kilometers
+            package_weights (list): Weight ranges (e.g., '1-5kg', '5-15kg')
+            delivery_speeds (list|str): Delivery speed per row, or one speed for all rows
+            addon_flags (list): Optional rows of booleans in ADDON_FLAGS order
         
-        return fee_breakdown
+        Returns:
+            list: One fee breakdown dict per row, as returned by calculate_delivery_fee
+        """
+        count = len(distances)
+        if delivery_speeds is None or isinstance(delivery_speeds, str):
+            delivery_speeds = [delivery_speeds] * count
+        if addon_flags is None:
+            addon_flags = [(False, False, False)] * count
+        
+        if np is None:
+            return [
+                self.calculate_delivery_fee(
+                    distance_km=distance_km,
+                    package_weight=package_weight,
+                    delivery_speed=delivery_speed,
+                    addons=[name for name, enabled in zip(ADDON_FLAGS, flags) if enabled]
+                )
+                for distance_km, package_weight, delivery_speed, flags
+                in zip(distances, package_weights, delivery_speeds, addon_flags)
+            ]
+        
+        pricing = get_pricing(self.pricing_tier)
+        
+        def units(amount):
+            # Ten-thousandths of a dollar
+            return int(amount * 10000)
+        
+        # Requested addons as bitmasks; the compiled table adds the
+        # automatic oversized addon for 30kg+
+        flags = np.asarray(addon_flags, dtype=bool).reshape(count, len(ADDON_FLAGS))
+        masks = (flags.astype(np.int64) @ (1 << np.arange(len(ADDON_FLAGS)))).tolist()
+        entries = {}
+        row_entries = []
+        for key in zip(package_weights, delivery_speeds, masks):
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = pricing.lookup(*key)
+            row_entries.append(entry)
+        fixed = np.fromiter((units(entry.fixed_fee) for entry in row_entries), dtype=np.int64, count=count)
+        
+        # Distance fee: free up to free_distance_km, then a flat rate per km
+        free_km = pricing.free_distance_km
+        rate_cents = int(pricing.per_km_rate * 100)
+        distance_km = np.asarray(distances, dtype=np.float64)
+        charged = distance_km > free_km
+        extra_km = distance_km - free_km
+        extra_cents = np.round(extra_km * 100)
+        exact = ~charged | (np.abs(extra_km * 100 - extra_cents) < 1e-6)
+        priced = charged & exact
+        distance = np.where(priced, extra_cents, 0).astype(np.int64) * rate_cents
+        noise = np.where(priced, np.sign(extra_km - extra_cents / 100), 0)
+        
+        total = fixed + distance
+        
+        def to_cents(amount, noise=0):
+            # Round half-even from ten-thousandths to cents
+            quotient, remainder = np.divmod(amount, 100)
+            tie_up = (noise > 0) | ((noise == 0) & (quotient % 2 == 1))
+            round_up = (remainder > 50) | ((remainder == 50) & tie_up)
+            return (quotient + round_up).tolist()
+        
+        decimals = {}
+        
+        def to_decimal(cents):
+            value = decimals.get(cents)
+            if value is None:
+                value = decimals[cents] = Decimal(cents).scaleb(-2)
+            return value
+        
+        results = []
+        for row, (entry, distance_c, total_c, row_exact) in enumerate(zip(
+            row_entries, to_cents(distance, noise), to_cents(total, noise), exact.tolist()
+        )):
+            if not row_exact:
+                results.append(pricing.fee_breakdown(
+                    distances[row],
+                    package_weights[row],
+                    delivery_speeds[row],
+                    [name for name, enabled in zip(ADDON_FLAGS, addon_flags[row]) if enabled]
+                ))
+                continue
+            
+            results.append({
+                'base_fee': entry.base_fee,
+                'distance_fee': to_decimal(distance_c),
+                'speed_fee': entry.speed_fee,
+                'addons_fee': entry.addons_fee,
+                'total_fee': to_decimal(total_c),
+                'applied_addons': list(entry.applied_addons)
+            })
+        
+        return results
     
     def get_delivery_quote(self, pickup_address, delivery_address, package_weight, delivery_speed, addons=None):
         """
@@ -364,25 +401,28 @@ class BulkDeliveryFeeCalculator:
         Returns:
             dict: Pricing information
         """
+        pricing = get_pricing(self.pricing_tier)
+        free_km = f"{pricing.free_distance_km:g}"
         return {
             'base_fees': {
-                'small_1_5kg': float(self.base_fees['small']),
-                'medium_5_15kg': float(self.base_fees['medium']),
-                'large_15_30kg': float(self.base_fees['large'])
+                'small_1_5kg': float(pricing.base_fees['small']),
+                'medium_5_15kg': float(pricing.base_fees['medium']),
+                'large_15_30kg': float(pricing.base_fees['large'])
             },
             'distance_pricing': {
-                'first_5km': 'Free',
-                'per_km_after_5km': '0.90 CAD'
+                f'first_{free_km}km': 'Free',
+                f'per_km_after_{free_km}km': f'{pricing.per_km_rate} CAD'
             },
             'speed_fees': {
-                'standard': float(self.speed_fees['standard']),
-                'express': float(self.speed_fees['express']),
-                'instant': float(self.speed_fees['instant'])
+                'standard': float(pricing.speed_fees['standard']),
+                'express': float(pricing.speed_fees['express']),
+                'instant': float(pricing.speed_fees['instant'])
             },
             'addon_fees': {
-                'signature_confirmation': float(self.addon_prices['signature_confirmation']),
-                'fragile_handling': float(self.addon_prices['fragile_handling']),
-                'oversized_package': float(self.addon_prices['oversized_package'])
+                'signature_confirmation': float(pricing.addon_prices['signature_confirmation']),
+                'fragile_handling': float(pricing.addon_prices['fragile_handling']),
+                'oversized_package': float(pricing.addon_prices['oversized_package'])
             },
+            'pricing_version': pricing.version,
             'service_area': [city.title() for city in self.allowed_cities]
         }
\ No newline at end of file
@@ -0,0 +1,334 @@
+from datetime import timedelta
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from packagemanagerapp.bulkshipmentprocessor import (
+    iter_csv_rows,
+    prefetch_csv_distances,
+    process_bulk_shipment_rows,
+)
+from packagemanagerapp.calculatorregistry import get_bulk_calculator
+from packagemanagerapp.models import BulkShipmentItem, BulkShipmentJob, BulkShipmentUpload, MerchantDeliveryStats
+
+logger = logging.getLogger(__name__)
+
+# Uploads with at least this many rows are always processed in the background
+DEFAULT_ASYNC_THRESHOLD = 1000
+
+# Running jobs that have not reported progress for this long are requeued
+DEFAULT_STALE_SECONDS = 600
+
+# While addresses are geocoded before the first batch, a running job touches
+# its updated_at at most this often so it is not taken for stale
+HEARTBEAT_INTERVAL = 30
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+DEFAULT_POLL_INTERVAL = 2
+
+
+class JobClaimLost(Exception):
+    """The job was requeued and now belongs to another attempt"""
+
+
+def get_async_threshold():
+    return int(getattr(settings, 'BULK_SHIPMENT_ASYNC_THRESHOLD', DEFAULT_ASYNC_THRESHOLD))
+
+
+def should_process_async(total_rows, requested=False):
+    """Decide whether an upload is queued instead of processed in the request"""
+    return bool(requested) or total_rows >= get_async_threshold()
+
+
+def enqueue_bulk_shipment_job(
+    bulk_upload,
+    delivery_speed='standard',
+    pickup_address='',
+    pickup_contact_name='',
+    pickup_contact_phone='',
+):
+    """
+    Queue a bulk shipment upload for background processing
+
+    Args:
+        bulk_upload (BulkShipmentUpload): Upload with its CSV file saved
+        delivery_speed (str): Delivery speed applied to every row
+        pickup_address (str): Pickup address for every row
+        pickup_contact_name (str): Pickup contact name for every row
+        pickup_contact_phone (str): Pickup contact phone for every row
+
+    Returns:
+        BulkShipmentJob: The queued job
+    """
+    return BulkShipmentJob.objects.create(
+        bulk_upload=bulk_upload,
+        delivery_speed=delivery_speed,
+        pickup_address=pickup_address,
+        pickup_contact_name=pickup_contact_name,
+        pickup_contact_phone=pickup_contact_phone,
+    )
+
+
+def claim_next_job(worker_id):
+    """
+    Atomically claim the oldest queued job.
+
+    A job is claimed with a conditional UPDATE on its status, so when several
+    workers race for the same row only one of them gets it. This works on any
+    database without row locking support.
+
+    Returns:
+        BulkShipmentJob|None: The claimed job, or None if the queue is empty
+    """
+    candidates = list(
+        BulkShipmentJob.objects.filter(status="QUEUED")
+        .order_by('created_at')
+        .values_list('pk', flat=True)[:10]
+    )
+
+    for job_id in candidates:
+        now = timezone.now()
+        claimed = BulkShipmentJob.objects.filter(pk=job_id, status="QUEUED").update(
+            status="RUNNING",
+            worker_id=worker_id,
+            attempts=F('attempts') + 1,
+            rows_processed=0,
+            error=None,
+            started_at=now,
+            finished_at=None,
+            updated_at=now,
+        )
+        if claimed:
+            return BulkShipmentJob.objects.select_related('bulk_upload').get(pk=job_id)
+
+    return None
+
+
+def requeue_stale_jobs():
+    """
+    Put back jobs whose worker stopped reporting progress
+
+    Jobs that already used all their attempts are marked as failed.
+
+    Returns:
+        int: Number of jobs requeued
+    """
+    stale_seconds = int(getattr(settings, 'BULK_SHIPMENT_JOB_STALE_SECONDS', DEFAULT_STALE_SECONDS))
+    max_attempts = int(getattr(settings, 'BULK_SHIPMENT_JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+    cutoff = timezone.now() - timedelta(seconds=stale_seconds)
+    stale = BulkShipmentJob.objects.filter(status="RUNNING", updated_at__lt=cutoff)
+
+    failed_ids = list(stale.filter(attempts__gte=max_attempts).values_list('bulk_upload_id', flat=True))
+    if failed_ids:
+        stale.filter(attempts__gte=max_attempts).update(
+            status="FAILED",
+            error="Worker stopped responding",
+            finished_at=timezone.now(),
+        )
+        BulkShipmentUpload.objects.filter(pk__in=failed_ids).update(status="FAILED")
+
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status="QUEUED",
+        worker_id=None,
+        updated_at=timezone.now(),
+    )
+    if requeued or failed_ids:
+        logger.warning(f"Requeued {requeued} stale bulk shipment jobs, failed {len(failed_ids)}")
+    return requeued
+
+
+def run_bulk_shipment_job(job):
+    """
+    Validate, price and store the rows of a claimed job
+
+    Each batch is committed as it is written and reported through the job's
+    ``rows_processed`` and the upload's valid/invalid counters; before that,
+    geocoding the file's addresses sends a heartbeat. Items left behind by an
+    earlier failed attempt are removed first.
+
+    Every write is conditional on this attempt still owning the job. If the
+    job was requeued meanwhile, the batch in flight is rolled back and
+    processing stops, leaving the job and the upload to the new owner.
+    """
+    bulk_upload = job.bulk_upload
+    claim = BulkShipmentJob.objects.filter(
+        pk=job.pk,
+        status="RUNNING",
+        worker_id=job.worker_id,
+        attempts=job.attempts,
+    )
+    last_heartbeat = time.monotonic()
+
+    def touch(**fields):
+        if not claim.update(updated_at=timezone.now(), **fields):
+            raise JobClaimLost(f"{job.worker_id} lost bulk shipment job {job.pk} (attempt {job.attempts})")
+
+    def heartbeat():
+        nonlocal last_heartbeat
+        if time.monotonic() - last_heartbeat < HEARTBEAT_INTERVAL:
+            return
+        last_heartbeat = time.monotonic()
+        touch()
+
+    def report_progress(rows_processed, valid_count, invalid_count):
+        touch(rows_processed=rows_processed)
+        BulkShipmentUpload.objects.filter(pk=bulk_upload.pk).update(
+            valid_shipments=valid_count,
+            invalid_shipments=invalid_count,
+            updated_at=timezone.now(),
+        )
+
+    try:
+        BulkShipmentItem.objects.filter(bulk_upload=bulk_upload).delete()
+        MerchantDeliveryStats.discard([bulk_upload.user_id])
+
+        calculator = get_bulk_calculator()
+
+        with bulk_upload.csv_file.open('rb') as csv_file:
+            prefetch_csv_distances(csv_file, job.pickup_address, calculator, heartbeat=heartbeat)
+            # prefetch_distances swallows errors, a lost claim included
+            touch()
+            process_bulk_shipment_rows(
+                bulk_upload,
+                iter_csv_rows(csv_file),
+                delivery_speed=job.delivery_speed,
+                pickup_address=job.pickup_address or '',
+                pickup_contact_name=job.pickup_contact_name or '',
+                pickup_contact_phone=job.pickup_contact_phone or '',
+                calculator=calculator,
+                atomic=False,
+                progress_callback=report_progress,
+            )
+
+        touch(
+            status="COMPLETED",
+            rows_processed=bulk_upload.total_shipments,
+            finished_at=timezone.now(),
+        )
+
+    except JobClaimLost as e:
+        # The new owner starts over; nothing of this attempt is cleaned up
+        logger.warning(str(e))
+
+    except Exception as e:
+        logger.exception(f"Bulk shipment job failed for {bulk_upload.bulk_tracking_id}")
+
+        with transaction.atomic():
+            failed = claim.update(
+                status="FAILED",
+                error=str(e),
+                finished_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+            if not failed:
+                logger.warning(f"{job.worker_id} lost bulk shipment job {job.pk} before recording the failure")
+                return
+
+            BulkShipmentItem.objects.filter(bulk_upload=bulk_upload).delete()
+            MerchantDeliveryStats.discard([bulk_upload.user_id])
+            BulkShipmentUpload.objects.filter(pk=bulk_upload.pk).update(
+                status="FAILED",
+                valid_shipments=0,
+                invalid_shipments=0,
+            )
+
+
+def run_worker(worker_id=None, stop_event=None, poll_interval=DEFAULT_POLL_INTERVAL, once=False):
+    """
+    Process queued jobs until stopped
+
+    Args:
+        worker_id (str): Name recorded on claimed jobs
+        stop_event (threading.Event): Set to stop the worker
+        poll_interval (float): Seconds to wait when the queue is empty
+        once (bool): Return as soon as the queue is empty
+
+    Returns:
+        int: Number of jobs processed
+    """
+    worker_id = worker_id or f"worker-{uuid.uuid4().hex[:8]}"
+    stop_event = stop_event or threading.Event()
+    processed = 0
+
+    try:
+        while not stop_event.is_set():
+            close_old_connections()
+            job = claim_next_job(worker_id)
+
+            if job is None:
+                if once:
+                    break
+                stop_event.wait(poll_interval)
+                continue
+
+            logger.info(f"{worker_id} processing {job.bulk_upload.bulk_tracking_id}")
+            run_bulk_shipment_job(job)
+            processed += 1
+    finally:
+        connection.close()
+
+    return processed
+
+
+def get_job_progress(bulk_upload):
+    """
+    Build the progress report for a bulk upload
+
+    Uploads processed inside the request have no job and are reported as
+    complete.
+
+    Returns:
+        dict: Progress counters and estimated seconds remaining
+    """
+    total = bulk_upload.total_shipments
+    job = BulkShipmentJob.objects.filter(bulk_upload=bulk_upload).first()
+
+    if job is None:
+        return {
+            "bulk_tracking_id": bulk_upload.bulk_tracking_id,
+            "status": bulk_upload.status,
+            "job_status": "COMPLETED",
+            "total_shipments": total,
+            "rows_processed": total,
+            "valid_shipments": bulk_upload.valid_shipments,
+            "invalid_shipments": bulk_upload.invalid_shipments,
+            "percent_complete": 100.0,
+            "eta_seconds": 0,
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+
+    rows_processed = job.rows_processed
+    eta_seconds = None
+
+    if job.status == "COMPLETED":
+        rows_processed = total
+        eta_seconds = 0
+    elif job.status == "RUNNING" and job.started_at and rows_processed:
+        elapsed = (timezone.now() - job.started_at).total_seconds()
+        rate = rows_processed / elapsed if elapsed > 0 else 0
+        if rate > 0:
+            eta_seconds = round(max(total - rows_processed, 0) / rate, 1)
+
+    return {
+        "bulk_tracking_id": bulk_upload.bulk_tracking_id,
+        "status": bulk_upload.status,
+        "job_status": job.status,
+        "total_shipments": total,
+        "rows_processed": rows_processed,
+        "valid_shipments": bulk_upload.valid_shipments,
+        "invalid_shipments": bulk_upload.invalid_shipments,
+        "percent_complete": round(rows_processed * 100 / total, 1) if total else 0.0,
+        "eta_seconds": eta_seconds,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "error": job.error,
+    }
@@ -0,0 +1,427 @@
+from contextlib import nullcontext
+import csv
+from decimal import Decimal
+from itertools import islice
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from packagemanagerapp.calculatorregistry import get_bulk_calculator
+from packagemanagerapp.geocoding import geocoding_enabled
+from packagemanagerapp.models import (
+    BulkShipmentItem,
+    MerchantDeliveryStats,
+    TrackingRegistry,
+    generate_tracking_id,
+)
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_HEADERS = ['receiver_name', 'phone_number', 'address', 'postal_code', 'package_size']
+
+# Bulk shipments require at least this many rows
+MINIMUM_SHIPMENTS = 10
+
+DEFAULT_BATCH_SIZE = 500
+
+DEFAULT_PICKUP_ADDRESS = "Calgary, Alberta, Canada"
+
+FEE_KEYS = ['delivery_fee', 'base_fee', 'distance_fee', 'speed_fee', 'addons_fee']
+
+# Stands in for bytes that are not valid UTF-8 (see _decode_lines)
+UNDECODABLE = '\ufffd'
+
+
+class BulkShipmentFileError(ValueError):
+    """Raised when an uploaded CSV cannot be read as a bulk shipment file"""
+
+
+def get_batch_size():
+    """Number of rows priced and inserted together"""
+    return max(1, int(getattr(settings, 'BULK_SHIPMENT_BATCH_SIZE', DEFAULT_BATCH_SIZE)))
+
+
+def iter_csv_rows(csv_file):
+    """
+    Stream rows out of an uploaded CSV file.
+
+    The file is decoded line by line as it is read, so memory use does not
+    grow with the size of the upload.
+
+    Args:
+        csv_file: Django File/UploadedFile opened in binary mode
+
+    Returns:
+        csv.DictReader: Reader positioned on the first data row
+
+    Raises:
+        BulkShipmentFileError: If the required columns are missing
+    """
+    csv_file.seek(0)
+    reader = csv.DictReader(_decode_lines(csv_file))
+
+    if not reader.fieldnames or not all(header in reader.fieldnames for header in REQUIRED_HEADERS):
+        raise BulkShipmentFileError(
+            f"CSV must contain these columns: {', '.join(REQUIRED_HEADERS)}"
+        )
+
+    return reader
+
+
+def _decode_lines(csv_file, encoding='utf-8'):
+    """
+    Decode an uploaded file one line at a time
+
+    A line that is not valid ``encoding`` is decoded with replacement
+    characters rather than ending the whole upload; _validate_row() then
+    marks that row invalid.
+    """
+    for line in csv_file:
+        try:
+            yield line.decode(encoding)
+        except UnicodeDecodeError:
+            yield line.decode(encoding, errors='replace')
+
+
+def count_csv_rows(csv_file):
+    """
+    Validate the CSV headers and count data rows in one streaming pass
+
+    Returns:
+        int: Number of data rows in the file
+    """
+    return sum(1 for _ in iter_csv_rows(csv_file))
+
+
+def prefetch_csv_distances(csv_file, pickup_address='', calculator=None, heartbeat=None):
+    """
+    Warm the distance cache for every valid delivery address in the file
+
+    Runs one streaming pass over the CSV so the whole upload is fetched with
+    a single batched lookup before rows are priced. ``heartbeat`` is called
+    after every geocoder lookup.
+
+    Returns:
+        int: Number of delivery points prefetched
+    """
+    if not geocoding_enabled():
+        return 0
+
+    calculator = calculator or get_bulk_calculator()
+    addresses = set()
+
+    for row in iter_csv_rows(csv_file):
+        is_valid, cleaned_address, _ = calculator.validate_location(_clean(row.get('address')))
+        if is_valid:
+            addresses.add(cleaned_address)
+
+    return calculator.prefetch_distances(
+        pickup_address or DEFAULT_PICKUP_ADDRESS,
+        list(addresses),
+        heartbeat=heartbeat
+    )
+
+
+def _chunked(iterable, size):
+    """Yield lists of at most ``size`` items from ``iterable``"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _clean(value):
+    return (value or '').strip()
+
+
+def _error_message(error):
+    """Validation error recorded for a row that raised ``error``"""
+    return str(error) or error.__class__.__name__
+
+
+def _validate_row(calculator, row):
+    """
+    Validate a single CSV row
+
+    Returns:
+        tuple: (cleaned_row: dict|None, error: str|None)
+    """
+    receiver_name = _clean(row.get('receiver_name'))
+    phone_number = _clean(row.get('phone_number'))
+    delivery_address = _clean(row.get('address'))
+    postal_code = _clean(row.get('postal_code'))
+    package_size = _clean(row.get('package_size'))
+
+    if not all([receiver_name, phone_number, delivery_address, postal_code, package_size]):
+        return None, "Missing required fields"
+
+    if any(UNDECODABLE in value for value in (receiver_name, phone_number, delivery_address, postal_code, package_size)):
+        return None, "Row contains characters that are not valid UTF-8"
+
+    is_valid, error = calculator.validate_package_weight(package_size)
+    if not is_valid:
+        return None, error
+
+    is_valid, cleaned_address, error = calculator.validate_location(delivery_address)
+    if not is_valid:
+        return None, error
+
+    return {
+        'receiver_name': receiver_name,
+        'phone_number': phone_number,
+        'delivery_address': cleaned_address,
+        'postal_code': postal_code,
+        'package_size': package_size,
+    }, None
+
+
+def _price_rows(calculator, cleaned_rows, pickup_address, delivery_speed):
+    """
+    Work out distance and fees for a batch of validated rows
+
+    Distances come from the (cached) per-row lookup; fees for the whole
+    batch are computed in one calculate_delivery_fees call. An unexpected
+    error only fails the row it came from: a failed lookup becomes that
+    row's error, and if batch pricing fails the rows are priced one by one.
+
+    Returns:
+        list: One (distance_km, fee_breakdown, error) tuple per row
+    """
+    distances = []
+    for cleaned in cleaned_rows:
+        try:
+            distances.append(calculator.calculate_distance(pickup_address, cleaned['delivery_address']))
+        except Exception as e:
+            logger.warning(f"Distance lookup failed for {cleaned['delivery_address']!r}: {str(e)}")
+            distances.append((None, _error_message(e)))
+
+    routable = [
+        (cleaned, distance_km)
+        for cleaned, (distance_km, distance_error) in zip(cleaned_rows, distances)
+        if not distance_error
+    ]
+    fee_breakdowns = iter(_price_fees(calculator, routable, delivery_speed))
+
+    priced = []
+    for distance_km, distance_error in distances:
+        if distance_error:
+            priced.append((None, None, distance_error))
+            continue
+        fee_breakdown = next(fee_breakdowns)
+        if isinstance(fee_breakdown, Exception):
+            priced.append((None, None, _error_message(fee_breakdown)))
+        else:
+            priced.append((distance_km, fee_breakdown, None))
+    return priced
+
+
+def _price_fees(calculator, routable, delivery_speed):
+    """
+    Fee breakdowns for (cleaned_row, distance_km) pairs, in order
+
+    Returns:
+        list: A fee breakdown, or the exception that row raised, per pair
+    """
+    try:
+        return calculator.calculate_delivery_fees(
+            [distance_km for _, distance_km in routable],
+            [cleaned['package_size'] for cleaned, _ in routable],
+            delivery_speed
+        )
+    except Exception as e:
+        logger.warning(f"Batch pricing failed, pricing {len(routable)} rows one by one: {str(e)}")
+
+    fee_breakdowns = []
+    for cleaned, distance_km in routable:
+        try:
+            fee_breakdowns.extend(
+                calculator.calculate_delivery_fees([distance_km], [cleaned['package_size']], delivery_speed)
+            )
+        except Exception as e:
+            fee_breakdowns.append(e)
+    return fee_breakdowns
+
+
+def _invalid_item(bulk_upload, row_number, row, error):
+    return BulkShipmentItem(
+        bulk_upload=bulk_upload,
+        tracking_id=generate_tracking_id(),
+        row_number=row_number,
+        receiver_name=row.get('receiver_name') or '',
+        phone_number=row.get('phone_number') or '',
+        delivery_address=row.get('address') or '',
+        postal_code=row.get('postal_code') or '',
+        weight_range=row.get('package_size') or '',
+        is_valid=False,
+        status="INVALID",
+        validation_error=error
+    )
+
+
+def _valid_item(bulk_upload, row_number, cleaned, distance_km, fee_breakdown,
+                pickup_address, pickup_contact_name, pickup_contact_phone):
+    return BulkShipmentItem(
+        bulk_upload=bulk_upload,
+        tracking_id=generate_tracking_id(),
+        row_number=row_number,
+        receiver_name=cleaned['receiver_name'],
+        phone_number=cleaned['phone_number'],
+        delivery_address=cleaned['delivery_address'],
+        postal_code=cleaned['postal_code'],
+        weight_range=cleaned['package_size'],
+        pickup_address=pickup_address,
+        pickup_contact_name=pickup_contact_name,
+        pickup_contact_phone=pickup_contact_phone,
+        delivery_fee=fee_breakdown['total_fee'],
+        base_fee=fee_breakdown['base_fee'],
+        distance_fee=fee_breakdown['distance_fee'],
+        speed_fee=fee_breakdown['speed_fee'],
+        addons_fee=fee_breakdown['addons_fee'],
+        distance_km=Decimal(str(distance_km)),
+        is_valid=True,
+        status="VALID"
+    )
+
+
+def process_bulk_shipment_rows(
+    bulk_upload,
+    rows,
+    delivery_speed='standard',
+    pickup_address='',
+    pickup_contact_name='',
+    pickup_contact_phone='',
+    batch_size=None,
+    calculator=None,
+    atomic=True,
+    progress_callback=None,
+):
+    """
+    Validate, price and store bulk shipment rows in batches.
+
+    Rows are consumed lazily from ``rows`` ``batch_size`` at a time. Each batch
+    is validated and priced together and written with a single ``bulk_create``.
+    By default the whole upload is stored inside one transaction; background
+    jobs pass ``atomic=False`` so each batch commits and progress is visible
+    to other connections while the upload is still running. Without the outer
+    transaction, each batch and the final totals are written in their own
+    transaction together with the ``progress_callback`` call, so a callback
+    that raises discards that write.
+
+    Args:
+        bulk_upload (BulkShipmentUpload): Upload the items belong to
+        rows (iterable): CSV rows as dicts (see ``iter_csv_rows``)
+        delivery_speed (str): Delivery speed applied to every row
+        pickup_address (str): Pickup address for every row
+        pickup_contact_name (str): Pickup contact name for every row
+        pickup_contact_phone (str): Pickup contact phone for every row
+        batch_size (int): Rows per batch (defaults to BULK_SHIPMENT_BATCH_SIZE)
+        calculator (BulkDeliveryFeeCalculator): Calculator to use (defaults to the shared one)
+        atomic (bool): Wrap the whole upload in a single transaction
+        progress_callback (callable): Called after every batch, and once more
+            before the totals are saved, with (rows_processed, valid_count,
+            invalid_count)
+
+    Returns:
+        BulkShipmentUpload: The upload with totals and status filled in
+    """
+    batch_size = batch_size or get_batch_size()
+    calculator = calculator or get_bulk_calculator()
+    distance_origin = pickup_address or DEFAULT_PICKUP_ADDRESS
+
+    row_count = 0
+    valid_count = 0
+    total_fees = {key: Decimal('0.00') for key in FEE_KEYS}
+    validation_errors = []
+
+    with transaction.atomic() if atomic else nullcontext():
+        for chunk in _chunked(enumerate(rows, start=1), batch_size):
+            items = []
+            pending = []
+            chunk_errors = []
+
+            for idx, row in chunk:
+                try:
+                    cleaned, error = _validate_row(calculator, row)
+                except Exception as e:
+                    logger.warning(f"Validating row {idx} failed: {str(e)}")
+                    cleaned, error = None, _error_message(e)
+                if error:
+                    items.append(_invalid_item(bulk_upload, idx, row, error))
+                    chunk_errors.append({'row': idx, 'error': error, 'data': row})
+                else:
+                    pending.append((idx, row, cleaned))
+
+            priced = _price_rows(
+                calculator,
+                [cleaned for _, _, cleaned in pending],
+                distance_origin,
+                delivery_speed
+            )
+
+            for (idx, row, cleaned), (distance_km, fee_breakdown, error) in zip(pending, priced):
+                if error:
+                    items.append(_invalid_item(bulk_upload, idx, row, error))
+                    chunk_errors.append({'row': idx, 'error': error, 'data': row})
+                    continue
+
+                try:
+                    item = _valid_item(
+                        bulk_upload, idx, cleaned, distance_km, fee_breakdown,
+                        pickup_address, pickup_contact_name, pickup_contact_phone
+                    )
+                except Exception as e:
+                    logger.warning(f"Building row {idx} failed: {str(e)}")
+                    error = _error_message(e)
+                    items.append(_invalid_item(bulk_upload, idx, row, error))
+                    chunk_errors.append({'row': idx, 'error': error, 'data': row})
+                    continue
+                items.append(item)
+
+                total_fees['delivery_fee'] += fee_breakdown['total_fee']
+                total_fees['base_fee'] += fee_breakdown['base_fee']
+                total_fees['distance_fee'] += fee_breakdown['distance_fee']
+                total_fees['speed_fee'] += fee_breakdown['speed_fee']
+                total_fees['addons_fee'] += fee_breakdown['addons_fee']
+                valid_count += 1
+
+            row_count += len(chunk)
+
+            # Keep rows in file order
+            items.sort(key=lambda item: item.row_number)
+            chunk_errors.sort(key=lambda entry: entry['row'])
+            validation_errors.extend(chunk_errors)
+            with nullcontext() if atomic else transaction.atomic():
+                BulkShipmentItem.objects.bulk_create(items, batch_size=batch_size)
+                TrackingRegistry.register(bulk_items=items)
+                # New items are VALID / INVALID, so only the total moves
+                MerchantDeliveryStats.adjust({}, added=len(items), user_id=bulk_upload.user_id)
+
+                if progress_callback:
+                    progress_callback(row_count, valid_count, row_count - valid_count)
+
+        invalid_count = row_count - valid_count
+
+        with nullcontext() if atomic else transaction.atomic():
+            if progress_callback:
+                progress_callback(row_count, valid_count, invalid_count)
+
+            bulk_upload.total_shipments = row_count
+            bulk_upload.valid_shipments = valid_count
+            bulk_upload.invalid_shipments = invalid_count
+            bulk_upload.total_delivery_fee = total_fees['delivery_fee']
+            bulk_upload.total_base_fee = total_fees['base_fee']
+            bulk_upload.total_distance_fee = total_fees['distance_fee']
+            bulk_upload.total_speed_fee = total_fees['speed_fee']
+            bulk_upload.total_addons_fee = total_fees['addons_fee']
+            bulk_upload.validation_errors = validation_errors
+            bulk_upload.status = "PENDING" if valid_count > 0 else "FAILED"
+            bulk_upload.save()
+
+    logger.info(
+        f"Processed bulk upload {bulk_upload.bulk_tracking_id}: "
+        f"{valid_count} valid, {invalid_count} invalid"
+    )
+    return bulk_upload
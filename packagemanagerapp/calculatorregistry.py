@@ -0,0 +1,71 @@
+import logging
+import ssl
+import threading
+
+import certifi
+from django.conf import settings
+
+from packagemanagerapp.bulkdeliverycalculator import BulkDeliveryFeeCalculator
+from packagemanagerapp.calculatedeliverydetails import DeliveryFeeCalculator
+from packagemanagerapp.geocoding import DEFAULT_MAX_WORKERS, build_geocoder
+from packagemanagerapp.pricing import pricing_cache
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+
+# Swapped as a whole so readers never see a half-built registry
+_registry = None
+
+
+def _build_geocoder():
+    ctx = ssl.create_default_context(cafile=certifi.where())
+    return build_geocoder(
+        user_agent="alalax_delivery_calculator",
+        ssl_context=ctx,
+        pool_size=int(getattr(settings, 'GEOCODE_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+    )
+
+
+def load_calculators(reload=False):
+    """
+    Build the shared calculators, or rebuild them when ``reload`` is set
+
+    The geocoder client (SSL context and HTTP connection pool) is created
+    once per process and kept across reloads. Prices are not held by the
+    calculators; they come from packagemanagerapp.pricing.
+
+    Returns:
+        dict: Registry with 'geocoder', 'delivery' and 'bulk' entries
+    """
+    global _registry
+
+    with _lock:
+        if _registry is not None and not reload:
+            return _registry
+
+        geocoder = _registry['geocoder'] if _registry is not None else _build_geocoder()
+        _registry = {
+            'geocoder': geocoder,
+            'delivery': DeliveryFeeCalculator(geolocator=geocoder),
+            'bulk': BulkDeliveryFeeCalculator(geolocator=geocoder),
+        }
+        return _registry
+
+
+def reload_pricing():
+    """Recompile pricing rules in this process without waiting for PRICING_CHECK_INTERVAL"""
+    pricing_cache.invalidate()
+    logger.info("Delivery pricing reloaded")
+
+
+def get_delivery_calculator():
+    """Process-wide DeliveryFeeCalculator; safe to share between threads"""
+    registry = _registry or load_calculators()
+    return registry['delivery']
+
+
+def get_bulk_calculator():
+    """Process-wide BulkDeliveryFeeCalculator; safe to share between threads"""
+    registry = _registry or load_calculators()
+    return registry['bulk']
@@ -1,14 +1,55 @@
-import firebase_admin
-from firebase_admin import credentials, messaging
+import logging
 import os
+import threading
+
 from django.conf import settings
 
-# Initialize Firebase Admin SDK (only once)
-if not firebase_admin._apps:
-    cred_path = os.path.join(settings.BASE_DIR, 'alalax-eef30-firebase-adminsdk-fbsvc-6d2706fc09.json')
-    cred = credentials.Certificate(cred_path)
-    firebase_admin.initialize_app(cred)
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+
+# Process that initialized the Firebase app; a forked child re-initializes
+_initialized_pid = None
+
+
+def get_credentials_path():
+    return getattr(
+        settings,
+        'FIREBASE_CREDENTIALS',
+        os.path.join(settings.BASE_DIR, 'alalax-eef30-firebase-adminsdk-fbsvc-6d2706fc09.json')
+    )
+
+
+def _initialize():
+    """Initialize the default Firebase app for this process"""
+    global _initialized_pid
+
+    import firebase_admin
+    from firebase_admin import credentials
+
+    if firebase_admin._apps and _initialized_pid is not None:
+        # Inherited across fork: the parent's HTTP sessions must not be shared
+        firebase_admin.delete_app(firebase_admin.get_app())
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(get_credentials_path()))
+        logger.info(f"Firebase initialized in process {os.getpid()}")
+
+    _initialized_pid = os.getpid()
+
 
 def get_messaging():
-    """Returns Firebase messaging instance"""
-    return messaging
\ No newline at end of file
+    """
+    Returns Firebase messaging instance
+
+    The Firebase SDK is imported and the app initialized on first use, once
+    per process, so importing this module costs nothing and does not need
+    the credentials file.
+    """
+    if _initialized_pid != os.getpid():
+        with _lock:
+            if _initialized_pid != os.getpid():
+                _initialize()
+
+    from firebase_admin import messaging
+    return messaging
@@ -0,0 +1,804 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+from geopy.distance import geodesic
+
+from packagemanagerapp.models import DistanceMatrixEntry, GeocodeCacheEntry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_SIZE = 10000
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60
+DEFAULT_NEGATIVE_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_DB_MAX_ENTRIES = 200000
+
+# Keys per IN (...) query when reading cache tables in bulk
+DB_LOOKUP_BATCH_SIZE = 500
+
+# Points are snapped to a grid of this many degrees for the distance matrix
+# (0.001 degrees is roughly 110m north-south, 70m east-west in Calgary)
+DEFAULT_DISTANCE_GRID = 0.001
+DEFAULT_DISTANCE_MEMORY_SIZE = 50000
+DEFAULT_DISTANCE_DB_MAX_ENTRIES = 500000
+
+# Straight-line distance is multiplied by this to estimate driving distance
+DRIVING_DISTANCE_FACTOR = 1.4
+
+# Mock distance used while live geocoding is switched off
+MOCK_DISTANCE_KM = 10.0
+
+ADDRESS_ABBREVIATIONS = {
+    'street': 'st',
+    'avenue': 'ave',
+    'road': 'rd',
+    'drive': 'dr',
+    'boulevard': 'blvd',
+    'crescent': 'cres',
+    'court': 'ct',
+    'place': 'pl',
+    'trail': 'tr',
+    'highway': 'hwy',
+    'northwest': 'nw',
+    'northeast': 'ne',
+    'southwest': 'sw',
+    'southeast': 'se',
+    'alberta': 'ab',
+}
+
+# Nominatim's usage policy allows one request per second per application
+DEFAULT_RATE_LIMIT = 1.0
+DEFAULT_MAX_WORKERS = 4
+
+# Marker stored in the memory tier for addresses that could not be geocoded
+NOT_FOUND = object()
+
+
+def normalize_address(address):
+    """
+    Reduce an address to a canonical form used as the cache key
+
+    Case, punctuation, repeated whitespace and common street/direction
+    spellings are normalized so "123 Main Street NW, Calgary" and
+    "123 main st. nw , calgary" share one entry.
+
+    Args:
+        address (str): Address as entered
+
+    Returns:
+        str: Normalized address
+    """
+    address = (address or '').lower()
+    address = re.sub(r'[^\w\s,]', ' ', address)
+
+    parts = []
+    for part in address.split(','):
+        words = [ADDRESS_ABBREVIATIONS.get(word, word) for word in part.split()]
+        if words:
+            parts.append(' '.join(words))
+
+    return ', '.join(parts)
+
+
+def address_key(normalized_address):
+    return hashlib.sha256(normalized_address.encode('utf-8')).hexdigest()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+
+    ``acquire`` blocks until a token is available. A rate of 0 or less
+    disables limiting.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Process-wide limiter shared by every geocoder call"""
+    global _rate_limiter
+    rate = float(getattr(settings, 'GEOCODE_RATE_LIMIT', DEFAULT_RATE_LIMIT))
+    if _rate_limiter is None or _rate_limiter.rate != rate:
+        with _rate_limiter_lock:
+            if _rate_limiter is None or _rate_limiter.rate != rate:
+                _rate_limiter = TokenBucket(rate)
+    return _rate_limiter
+
+
+class StubLocation:
+    def __init__(self, latitude, longitude):
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+class StubGeocoder:
+    """
+    Offline geocoder for local development, tests and benchmarks
+
+    Returns a stable point in Calgary derived from the address text after
+    an optional artificial delay. Addresses containing "nowhere" are not
+    found.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def geocode(self, address):
+        if self.latency:
+            time.sleep(self.latency)
+        if 'nowhere' in (address or '').lower():
+            return None
+
+        digest = int(hashlib.md5(normalize_address(address).encode('utf-8')).hexdigest(), 16)
+        return StubLocation(
+            latitude=50.95 + (digest % 1000) / 5000,
+            longitude=-114.25 - ((digest // 1000) % 1000) / 3000,
+        )
+
+
+def build_geocoder(user_agent, ssl_context=None, pool_size=None):
+    """
+    Build the geocoder selected by GEOCODER_BACKEND ('nominatim' or 'stub')
+
+    Args:
+        user_agent (str): User agent sent to Nominatim
+        ssl_context: SSL context for HTTPS requests
+        pool_size (int): Keep-alive connections to hold open (optional).
+            Needs ``requests``; geopy's default adapter is used otherwise.
+    """
+    if getattr(settings, 'GEOCODER_BACKEND', 'nominatim') == 'stub':
+        return StubGeocoder(latency=float(getattr(settings, 'GEOCODER_STUB_LATENCY', 0.0)))
+
+    from geopy.adapters import RequestsAdapter, requests_available
+    from geopy.geocoders import Nominatim
+
+    options = {}
+    if pool_size:
+        if not requests_available:
+            logger.warning("requests is not installed, geocoder connections are not pooled")
+        else:
+            options['adapter_factory'] = partial(
+                RequestsAdapter,
+                pool_connections=1,
+                pool_maxsize=pool_size
+            )
+
+    return Nominatim(user_agent=user_agent, ssl_context=ssl_context, **options)
+
+
+def geocode_concurrently(addresses, geocode, max_workers=None, rate_limiter=None, heartbeat=None):
+    """
+    Geocode many addresses in parallel under a shared rate limit
+
+    Identical addresses (after normalization) are sent to the geocoder
+    once. Every call first takes a token from ``rate_limiter``.
+
+    Args:
+        addresses (list): Addresses to geocode
+        geocode (callable): Geocoder, e.g. Nominatim.geocode
+        max_workers (int): Parallel requests (defaults to GEOCODE_MAX_WORKERS)
+        rate_limiter (TokenBucket): Limiter (defaults to the process-wide one)
+        heartbeat (callable): Called in the calling thread after each address
+            is resolved. If it raises, the remaining lookups are cancelled.
+
+    Returns:
+        dict: address -> location (or None if not found). Addresses whose
+        geocoder call raised are left out.
+    """
+    max_workers = max_workers or int(getattr(settings, 'GEOCODE_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+    rate_limiter = rate_limiter or get_rate_limiter()
+
+    unique = {}
+    for address in addresses:
+        unique.setdefault(normalize_address(address), address)
+
+    def resolve(address):
+        rate_limiter.acquire()
+        return geocode(address)
+
+    resolved = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = {
+            normalized: executor.submit(resolve, address)
+            for normalized, address in unique.items()
+        }
+        for normalized, future in futures.items():
+            try:
+                resolved[normalized] = future.result()
+            except Exception as e:
+                logger.error(f"Geocoding failed for {unique[normalized]}: {str(e)}")
+            if heartbeat:
+                heartbeat()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+    return {
+        address: resolved[normalize_address(address)]
+        for address in addresses
+        if normalize_address(address) in resolved
+    }
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with a per-entry TTL"""
+
+    def __init__(self, max_size):
+        # max_size may be a callable so it follows settings overrides
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        return self._max_size() if callable(self._max_size) else self._max_size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class GeocodeCache:
+    """
+    Two-tier geocode cache.
+
+    Lookups hit a thread-safe in-process LRU first, then the
+    ``GeocodeCacheEntry`` table, and only call the geocoder on a miss in
+    both. Results (including "not found") are written back to both tiers
+    with a TTL. Hit and miss counters are kept per process.
+    """
+
+    def __init__(self, max_size=None):
+        self._memory = LRUCache(
+            max_size or (lambda: int(getattr(settings, 'GEOCODE_CACHE_MEMORY_SIZE', DEFAULT_MEMORY_SIZE)))
+        )
+        self._lock = threading.Lock()
+        self._stats = {
+            'memory_hits': 0,
+            'db_hits': 0,
+            'misses': 0,
+            'negative_hits': 0,
+            'errors': 0,
+        }
+
+    def _ttl(self, found):
+        if found:
+            return int(getattr(settings, 'GEOCODE_CACHE_TTL', DEFAULT_TTL_SECONDS))
+        return int(getattr(settings, 'GEOCODE_CACHE_NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL_SECONDS))
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _db_get(self, normalized):
+        now = timezone.now()
+        entry = GeocodeCacheEntry.objects.filter(
+            address_key=address_key(normalized),
+            expires_at__gt=now
+        ).first()
+        if entry is None:
+            return None
+
+        GeocodeCacheEntry.objects.filter(pk=entry.pk).update(
+            hit_count=F('hit_count') + 1,
+            last_used_at=now
+        )
+        remaining = (entry.expires_at - now).total_seconds()
+        value = (entry.latitude, entry.longitude) if entry.found else NOT_FOUND
+        return value, remaining
+
+    def _db_set(self, normalized, coordinates, ttl):
+        now = timezone.now()
+        latitude, longitude = coordinates if coordinates else (None, None)
+        try:
+            GeocodeCacheEntry.objects.update_or_create(
+                address_key=address_key(normalized),
+                defaults={
+                    'normalized_address': normalized,
+                    'latitude': latitude,
+                    'longitude': longitude,
+                    'expires_at': now + timedelta(seconds=ttl),
+                    'last_used_at': now,
+                }
+            )
+        except IntegrityError:
+            # Another worker stored the same address first
+            pass
+
+    def _db_set_many(self, results):
+        """Store (normalized, coordinates|None, ttl) tuples with one upsert"""
+        now = timezone.now()
+        entries = []
+        for normalized, coordinates, ttl in results:
+            latitude, longitude = coordinates if coordinates else (None, None)
+            entries.append(GeocodeCacheEntry(
+                address_key=address_key(normalized),
+                normalized_address=normalized,
+                latitude=latitude,
+                longitude=longitude,
+                expires_at=now + timedelta(seconds=ttl),
+                last_used_at=now,
+            ))
+
+        GeocodeCacheEntry.objects.bulk_create(
+            entries,
+            batch_size=DB_LOOKUP_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['address_key'],
+            update_fields=['normalized_address', 'latitude', 'longitude', 'expires_at', 'last_used_at'],
+        )
+
+    def get_coordinates(self, address, geocode):
+        """
+        Resolve an address to (latitude, longitude) through the cache
+
+        Args:
+            address (str): Address to resolve
+            geocode (callable): Geocoder called on a cache miss; returns an
+                object with ``latitude``/``longitude`` or None
+
+        Returns:
+            tuple|None: (latitude, longitude), or None if the address was not found
+
+        Raises:
+            Exception: Whatever the geocoder raises. Failures are not cached.
+        """
+        normalized = normalize_address(address)
+
+        value = self._memory.get(normalized)
+        if value is not None:
+            self._count('memory_hits')
+        else:
+            cached = self._db_get(normalized)
+            if cached is not None:
+                value, remaining = cached
+                self._count('db_hits')
+                self._memory.set(normalized, value, remaining)
+            else:
+                self._count('misses')
+                try:
+                    get_rate_limiter().acquire()
+                    location = geocode(address)
+                except Exception:
+                    self._count('errors')
+                    raise
+
+                value = (location.latitude, location.longitude) if location else NOT_FOUND
+                ttl = self._ttl(value is not NOT_FOUND)
+                self._db_set(normalized, None if value is NOT_FOUND else value, ttl)
+                self._memory.set(normalized, value, ttl)
+
+        if value is NOT_FOUND:
+            self._count('negative_hits')
+            return None
+        return value
+
+    def get_many(self, addresses, geocode, heartbeat=None):
+        """
+        Resolve many addresses, reading the database tier in batches
+
+        Addresses missing from the in-process tier are looked up with one
+        query per DB_LOOKUP_BATCH_SIZE keys; only addresses missing from both
+        tiers are sent to the geocoder, concurrently (see geocode_concurrently,
+        which also calls ``heartbeat``).
+
+        Returns:
+            dict: address -> (latitude, longitude) or None. Addresses whose
+            geocoder call failed are left out.
+        """
+        normalized_by_address = {address: normalize_address(address) for address in addresses}
+        values = {}
+        pending = {}
+
+        for address, normalized in normalized_by_address.items():
+            value = self._memory.get(normalized)
+            if value is not None:
+                self._count('memory_hits')
+                values[normalized] = value
+            else:
+                pending.setdefault(normalized, address)
+
+        now = timezone.now()
+        keys = {address_key(normalized): normalized for normalized in pending}
+        key_list = list(keys)
+        for start in range(0, len(key_list), DB_LOOKUP_BATCH_SIZE):
+            entries = GeocodeCacheEntry.objects.filter(
+                address_key__in=key_list[start:start + DB_LOOKUP_BATCH_SIZE],
+                expires_at__gt=now
+            )
+            for entry in entries:
+                normalized = keys[entry.address_key]
+                value = (entry.latitude, entry.longitude) if entry.found else NOT_FOUND
+                self._memory.set(normalized, value, (entry.expires_at - now).total_seconds())
+                values[normalized] = value
+                del pending[normalized]
+
+        db_hits = len(keys) - len(pending)
+        if db_hits:
+            self._count('db_hits', db_hits)
+            GeocodeCacheEntry.objects.filter(
+                address_key__in=[key for key, normalized in keys.items() if normalized in values]
+            ).update(last_used_at=now)
+
+        if pending:
+            # Misses in both tiers are geocoded in parallel, rate limited
+            locations = geocode_concurrently(list(pending.values()), geocode, heartbeat=heartbeat)
+            self._count('misses', len(pending))
+            self._count('errors', len(pending) - len(locations))
+
+            stored = []
+            for normalized, address in pending.items():
+                if address not in locations:
+                    continue
+                location = locations[address]
+                value = (location.latitude, location.longitude) if location else NOT_FOUND
+                ttl = self._ttl(value is not NOT_FOUND)
+                self._memory.set(normalized, value, ttl)
+                values[normalized] = value
+                stored.append((normalized, None if value is NOT_FOUND else value, ttl))
+
+            if stored:
+                self._db_set_many(stored)
+
+        results = {}
+        for address, normalized in normalized_by_address.items():
+            if normalized in values:
+                value = values[normalized]
+                results[address] = None if value is NOT_FOUND else value
+        return results
+
+    def get_stats(self):
+        """Return hit/miss counters and the hit ratio for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['memory_entries'] = len(self._memory)
+
+        lookups = stats['memory_hits'] + stats['db_hits'] + stats['misses']
+        stats['lookups'] = lookups
+        stats['hit_ratio'] = round((stats['memory_hits'] + stats['db_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drop the in-process tier and reset counters"""
+        self._memory.clear()
+        with self._lock:
+            for key in self._stats:
+                self._stats[key] = 0
+
+
+def get_distance_grid():
+    return float(getattr(settings, 'DISTANCE_MATRIX_GRID', DEFAULT_DISTANCE_GRID))
+
+
+def grid_cell(coordinates, grid=None):
+    """
+    Snap a (latitude, longitude) point to its grid cell key
+
+    Returns:
+        str: "<grid>:<lat cell>:<lon cell>"
+    """
+    grid = grid or get_distance_grid()
+    latitude, longitude = coordinates
+    return f"{grid}:{round(latitude / grid)}:{round(longitude / grid)}"
+
+
+def driving_distance(origin, destination):
+    """Estimated driving distance in km between two (lat, lon) points"""
+    straight_distance = geodesic(origin, destination).kilometers
+    return round(straight_distance * DRIVING_DISTANCE_FACTOR, 2)
+
+
+class DistanceMatrixCache:
+    """
+    Cache of driving distances between pairs of grid cells.
+
+    Works like ``GeocodeCache``: an in-process LRU in front of the
+    ``DistanceMatrixEntry`` table. ``prefetch`` loads every pair for one
+    origin and many destinations with batched queries so a bulk upload is
+    priced from memory.
+    """
+
+    def __init__(self, max_size=None):
+        self._memory = LRUCache(
+            max_size or (lambda: int(getattr(settings, 'DISTANCE_MATRIX_MEMORY_SIZE', DEFAULT_DISTANCE_MEMORY_SIZE)))
+        )
+        self._lock = threading.Lock()
+        self._stats = {
+            'memory_hits': 0,
+            'db_hits': 0,
+            'misses': 0,
+        }
+
+    def _ttl(self):
+        return int(getattr(settings, 'GEOCODE_CACHE_TTL', DEFAULT_TTL_SECONDS))
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def get_distance(self, origin, destination):
+        """
+        Driving distance between two points, computed only on a cache miss
+
+        Args:
+            origin (tuple): (latitude, longitude) of the pickup
+            destination (tuple): (latitude, longitude) of the delivery
+
+        Returns:
+            float: Distance in km
+        """
+        pair = (grid_cell(origin), grid_cell(destination))
+
+        distance_km = self._memory.get(pair)
+        if distance_km is not None:
+            self._count('memory_hits')
+            return distance_km
+
+        entry = DistanceMatrixEntry.objects.filter(
+            origin_cell=pair[0],
+            destination_cell=pair[1]
+        ).values_list('distance_km', flat=True).first()
+
+        if entry is not None:
+            self._count('db_hits')
+            distance_km = float(entry)
+        else:
+            self._count('misses')
+            distance_km = driving_distance(origin, destination)
+            DistanceMatrixEntry.objects.bulk_create(
+                [DistanceMatrixEntry(
+                    origin_cell=pair[0],
+                    destination_cell=pair[1],
+                    distance_km=Decimal(str(distance_km))
+                )],
+                ignore_conflicts=True
+            )
+
+        self._memory.set(pair, distance_km, self._ttl())
+        return distance_km
+
+    def prefetch(self, origin_address, destination_addresses, geocode, heartbeat=None):
+        """
+        Warm both caches for one pickup and many delivery addresses
+
+        Geocodes are read with ``GeocodeCache.get_many`` (which calls
+        ``heartbeat`` after every geocoder lookup) and all stored pairs
+        with one query per DB_LOOKUP_BATCH_SIZE destinations. Pairs not seen
+        before are computed and inserted in a single ``bulk_create``.
+
+        Returns:
+            int: Number of pairs now held in memory
+        """
+        coordinates = geocode_cache.get_many(
+            [origin_address] + list(destination_addresses),
+            geocode,
+            heartbeat=heartbeat
+        )
+        origin = coordinates.get(origin_address)
+        if not origin:
+            return 0
+
+        origin_cell = grid_cell(origin)
+        destinations = {}
+        for address in destination_addresses:
+            point = coordinates.get(address)
+            if point:
+                destinations.setdefault(grid_cell(point), point)
+
+        pending = {
+            cell: point for cell, point in destinations.items()
+            if self._memory.get((origin_cell, cell)) is None
+        }
+        self._count('memory_hits', len(destinations) - len(pending))
+
+        cells = list(pending)
+        for start in range(0, len(cells), DB_LOOKUP_BATCH_SIZE):
+            rows = DistanceMatrixEntry.objects.filter(
+                origin_cell=origin_cell,
+                destination_cell__in=cells[start:start + DB_LOOKUP_BATCH_SIZE]
+            ).values_list('destination_cell', 'distance_km')
+            for cell, distance_km in rows:
+                self._memory.set((origin_cell, cell), float(distance_km), self._ttl())
+                del pending[cell]
+        self._count('db_hits', len(cells) - len(pending))
+
+        new_entries = []
+        for cell, point in pending.items():
+            distance_km = driving_distance(origin, point)
+            self._memory.set((origin_cell, cell), distance_km, self._ttl())
+            new_entries.append(DistanceMatrixEntry(
+                origin_cell=origin_cell,
+                destination_cell=cell,
+                distance_km=Decimal(str(distance_km))
+            ))
+        if new_entries:
+            self._count('misses', len(new_entries))
+            DistanceMatrixEntry.objects.bulk_create(
+                new_entries,
+                batch_size=DB_LOOKUP_BATCH_SIZE,
+                ignore_conflicts=True
+            )
+
+        return len(destinations)
+
+    def get_stats(self):
+        """Return hit/miss counters and the hit ratio for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['memory_entries'] = len(self._memory)
+
+        lookups = stats['memory_hits'] + stats['db_hits'] + stats['misses']
+        stats['lookups'] = lookups
+        stats['hit_ratio'] = round((stats['memory_hits'] + stats['db_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drop the in-process tier and reset counters"""
+        self._memory.clear()
+        with self._lock:
+            for key in self._stats:
+                self._stats[key] = 0
+
+
+geocode_cache = GeocodeCache()
+distance_matrix = DistanceMatrixCache()
+
+
+def prune_geocode_cache(max_entries=None):
+    """
+    Evict expired entries, then the least recently used ones above the limit
+
+    Returns:
+        int: Number of rows deleted
+    """
+    max_entries = max_entries or int(getattr(settings, 'GEOCODE_CACHE_DB_MAX_ENTRIES', DEFAULT_DB_MAX_ENTRIES))
+    deleted, _ = GeocodeCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+
+    overflow = GeocodeCacheEntry.objects.count() - max_entries
+    if overflow > 0:
+        oldest = list(
+            GeocodeCacheEntry.objects.order_by('last_used_at')
+            .values_list('pk', flat=True)[:overflow]
+        )
+        overflow_deleted, _ = GeocodeCacheEntry.objects.filter(pk__in=oldest).delete()
+        deleted += overflow_deleted
+
+    return deleted
+
+
+def prune_distance_matrix(max_entries=None):
+    """
+    Trim the distance matrix to its row limit, oldest pairs first
+
+    Returns:
+        int: Number of rows deleted
+    """
+    max_entries = max_entries or int(getattr(settings, 'DISTANCE_MATRIX_DB_MAX_ENTRIES', DEFAULT_DISTANCE_DB_MAX_ENTRIES))
+    overflow = DistanceMatrixEntry.objects.count() - max_entries
+    if overflow <= 0:
+        return 0
+
+    oldest = list(
+        DistanceMatrixEntry.objects.order_by('created_at')
+        .values_list('pk', flat=True)[:overflow]
+    )
+    deleted, _ = DistanceMatrixEntry.objects.filter(pk__in=oldest).delete()
+    return deleted
+
+
+def geocoding_enabled():
+    return bool(getattr(settings, 'GEOCODING_ENABLED', False))
+
+
+def estimate_driving_distance(pickup_address, delivery_address, geocode):
+    """
+    Estimate driving distance between two addresses using cached geocodes
+
+    The pair is looked up in the distance matrix before any geodesic work.
+
+    Args:
+        pickup_address (str): Pickup location address
+        delivery_address (str): Delivery location address
+        geocode (callable): Geocoder used on a cache miss (e.g. Nominatim.geocode)
+
+    Returns:
+        tuple: (distance_km: float|None, error: str|None)
+    """
+    if not geocoding_enabled():
+        logger.debug("Geocoding disabled, using mock distance")
+        return MOCK_DISTANCE_KM, None
+
+    try:
+        pickup_coords = geocode_cache.get_coordinates(pickup_address, geocode)
+        if not pickup_coords:
+            return None, f"Could not find pickup address: {pickup_address}"
+
+        delivery_coords = geocode_cache.get_coordinates(delivery_address, geocode)
+        if not delivery_coords:
+            return None, f"Could not find delivery address: {delivery_address}"
+
+        return distance_matrix.get_distance(pickup_coords, delivery_coords), None
+
+    except Exception as e:
+        logger.error(f"Distance calculation error: {str(e)}")
+        return None, f"Error calculating distance: {str(e)}"
+
+
+def prefetch_distances(pickup_address, delivery_addresses, geocode, heartbeat=None):
+    """
+    Warm the geocode and distance caches before pricing many rows
+
+    Does nothing while geocoding is disabled. ``heartbeat`` is called after
+    every geocoder lookup, so a caller can show it is still alive while a
+    large, rate limited batch is resolved.
+
+    Returns:
+        int: Number of delivery points prefetched
+    """
+    if not geocoding_enabled() or not delivery_addresses:
+        return 0
+
+    try:
+        return distance_matrix.prefetch(pickup_address, delivery_addresses, geocode, heartbeat=heartbeat)
+    except Exception as e:
+        # Rows fall back to per-address lookups
+        logger.error(f"Distance prefetch failed: {str(e)}")
+        return 0
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from packagemanagerapp.models import BulkShipmentItem, PackageDelivery, TrackingRegistry
+
+
+class Command(BaseCommand):
+    help = "Add TrackingRegistry rows for shipments created before the registry existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Shipments registered per query")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+
+        for model, field in ((PackageDelivery, 'packages'), (BulkShipmentItem, 'bulk_items')):
+            pending = model.objects.filter(tracking_entry__isnull=True).only('id', 'tracking_id').order_by('id')
+            registered = 0
+            last_id = 0
+            while True:
+                batch = list(pending.filter(id__gt=last_id)[:batch_size])
+                if not batch:
+                    break
+                TrackingRegistry.register(**{field: batch})
+                registered += len(batch)
+                last_id = batch[-1].id
+            self.stdout.write(self.style.SUCCESS(f"Registered {registered} {model.__name__} tracking IDs"))
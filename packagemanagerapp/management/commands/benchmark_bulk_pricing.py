@@ -0,0 +1,53 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from packagemanagerapp.bulkdeliverycalculator import ADDON_FLAGS, BulkDeliveryFeeCalculator
+
+
+class Command(BaseCommand):
+    help = "Compare per-row and batch bulk pricing on synthetic rows and check they agree"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Number of rows to price")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per path")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = max(1, options['repeat'])
+        rng = random.Random(options['seed'])
+        calculator = BulkDeliveryFeeCalculator()
+
+        distances = [round(rng.uniform(0, 60), 2) for _ in range(rows)]
+        weights = [rng.choice(['1-5kg', '5-15kg', '15-30kg', '30kg+']) for _ in range(rows)]
+        speeds = [rng.choice(['standard', 'express', 'instant']) for _ in range(rows)]
+        flags = [tuple(rng.random() < 0.2 for _ in ADDON_FLAGS) for _ in range(rows)]
+        addons = [[name for name, enabled in zip(ADDON_FLAGS, row) if enabled] for row in flags]
+
+        def per_row():
+            return [
+                calculator.calculate_delivery_fee(distance_km, weight, speed, row_addons)
+                for distance_km, weight, speed, row_addons in zip(distances, weights, speeds, addons)
+            ]
+
+        def batch():
+            return calculator.calculate_delivery_fees(distances, weights, speeds, flags)
+
+        timings = {}
+        results = {}
+        for name, run in (('per-row', per_row), ('batch', batch)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                results[name] = run()
+            timings[name] = (time.perf_counter() - start) / repeat
+
+        if results['per-row'] != results['batch']:
+            raise CommandError("Batch pricing does not match per-row pricing")
+
+        for name, seconds in timings.items():
+            self.stdout.write(f"{name:>8}: {seconds * 1000:.1f}ms for {rows} rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Results identical; batch is {timings['per-row'] / timings['batch']:.1f}x faster"
+        ))
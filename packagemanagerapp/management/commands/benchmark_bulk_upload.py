@@ -0,0 +1,145 @@
+import csv
+import io
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from packagemanagerapp.bulkshipmentprocessor import (
+    DEFAULT_PICKUP_ADDRESS,
+    REQUIRED_HEADERS,
+    iter_csv_rows,
+    process_bulk_shipment_rows,
+)
+from packagemanagerapp.calculatorregistry import get_bulk_calculator
+from packagemanagerapp.models import BulkShipmentItem, BulkShipmentUpload
+
+WEIGHT_RANGES = ['1-5kg', '5-15kg', '15-30kg', '30kg+']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time a bulk shipment upload through the old loop (one create() per row) vs "
+        "process_bulk_shipment_rows(). Test data is created in a transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--invalid-every', type=int, default=7, help="Every Nth row is outside the service area")
+        parser.add_argument('--delivery-speed', default='standard')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _count_queries(self, fn):
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            start = time.perf_counter()
+            result = fn()
+            seconds = time.perf_counter() - start
+        return result, seconds, len(queries)
+
+    def _report(self, label, seconds, queries, rows):
+        self.stdout.write(
+            f"{label:>26}: {seconds * 1000:9.1f}ms ({rows / seconds:.0f} rows/s), {queries} queries"
+        )
+
+    def _csv(self, count, invalid_every):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(REQUIRED_HEADERS)
+        for n in range(count):
+            city = 'Toronto' if invalid_every and n % invalid_every == 0 else 'Calgary'
+            writer.writerow([f"Receiver {n}", '000', f"{n} Main St, {city}", 'T2P', WEIGHT_RANGES[n % len(WEIGHT_RANGES)]])
+        return out.getvalue().encode()
+
+    def _loop(self, bulk_upload, rows, delivery_speed):
+        # Before: validate, price and INSERT one row at a time
+        calculator = get_bulk_calculator()
+        for idx, row in enumerate(rows, start=1):
+            try:
+                package_size = row.get('package_size', '').strip()
+                is_valid, error = calculator.validate_package_weight(package_size)
+                if not is_valid:
+                    raise ValueError(error)
+                is_valid, cleaned_address, error = calculator.validate_location(row.get('address', '').strip())
+                if not is_valid:
+                    raise ValueError(error)
+                distance_km, error = calculator.calculate_distance(DEFAULT_PICKUP_ADDRESS, cleaned_address)
+                if error:
+                    raise ValueError(error)
+                fee_breakdown = calculator.calculate_delivery_fee(distance_km, package_size, delivery_speed, [])
+                BulkShipmentItem.objects.create(
+                    bulk_upload=bulk_upload,
+                    row_number=idx,
+                    receiver_name=row.get('receiver_name', '').strip(),
+                    phone_number=row.get('phone_number', '').strip(),
+                    delivery_address=cleaned_address,
+                    postal_code=row.get('postal_code', '').strip(),
+                    weight_range=package_size,
+                    delivery_fee=fee_breakdown['total_fee'],
+                    base_fee=fee_breakdown['base_fee'],
+                    distance_fee=fee_breakdown['distance_fee'],
+                    speed_fee=fee_breakdown['speed_fee'],
+                    addons_fee=fee_breakdown['addons_fee'],
+                    distance_km=Decimal(str(distance_km)),
+                    is_valid=True,
+                    status="VALID"
+                )
+            except Exception as e:
+                BulkShipmentItem.objects.create(
+                    bulk_upload=bulk_upload,
+                    row_number=idx,
+                    receiver_name=row.get('receiver_name', ''),
+                    phone_number=row.get('phone_number', ''),
+                    delivery_address=row.get('address', ''),
+                    postal_code=row.get('postal_code', ''),
+                    weight_range=row.get('package_size', ''),
+                    is_valid=False,
+                    status="INVALID",
+                    validation_error=str(e)
+                )
+
+    def _run(self, options):
+        count = options['rows']
+        delivery_speed = options['delivery_speed']
+        data = self._csv(count, options['invalid_every'])
+        user = User.objects.create_user(username=f"bulk-bench-{int(time.time())}")
+        self.stdout.write(f"Uploading {count} rows")
+
+        loop_upload = BulkShipmentUpload.objects.create(user=user)
+        rows = list(iter_csv_rows(SimpleUploadedFile('bench.csv', data)))
+        _, seconds, queries = self._count_queries(lambda: self._loop(loop_upload, rows, delivery_speed))
+        self._report("create() per row", seconds, queries, count)
+
+        batch_upload = BulkShipmentUpload.objects.create(user=user)
+        _, seconds, queries = self._count_queries(
+            lambda: process_bulk_shipment_rows(
+                batch_upload,
+                iter_csv_rows(SimpleUploadedFile('bench.csv', data)),
+                delivery_speed=delivery_speed
+            )
+        )
+        self._report("process_bulk_shipment_rows", seconds, queries, count)
+
+        loop_fees = list(loop_upload.shipment_items.order_by('row_number').values_list('status', 'delivery_fee'))
+        batch_fees = list(batch_upload.shipment_items.order_by('row_number').values_list('status', 'delivery_fee'))
+        if loop_fees != batch_fees:
+            raise CommandError("The two paths stored different rows")
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from packagemanagerapp.calculatedeliverydetails import DeliveryFeeCalculator
+from packagemanagerapp.calculatorregistry import get_delivery_calculator
+
+
+class Command(BaseCommand):
+    help = "Compare building a DeliveryFeeCalculator per request with reusing the shared instance"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help="Simulated requests per path")
+
+    def handle(self, *args, **options):
+        requests = max(1, options['requests'])
+
+        def per_request():
+            return DeliveryFeeCalculator()
+
+        paths = (
+            ('new instance per request', per_request),
+            ('shared registry instance', get_delivery_calculator),
+        )
+        timings = {}
+        for name, get_calculator in paths:
+            start = time.perf_counter()
+            for _ in range(requests):
+                calculator = get_calculator()
+                calculator.calculate_delivery_fee(12.5, '5-15kg', 'express', ['fragile_handling'])
+            timings[name] = (time.perf_counter() - start) / requests
+
+        for name, seconds in timings.items():
+            self.stdout.write(f"{name}: {seconds * 1e6:.1f}us per request")
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from packagemanagerapp.geocoding import StubGeocoder, TokenBucket, geocode_concurrently
+
+
+class Command(BaseCommand):
+    help = "Measure concurrent geocoding latency against the stub geocoder at several concurrency levels"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--addresses', type=int, default=200, help="Unique addresses to resolve")
+        parser.add_argument('--duplicates', type=int, default=3, help="Times each address appears")
+        parser.add_argument('--latency', type=float, default=0.05, help="Stub geocoder delay in seconds")
+        parser.add_argument('--workers', default='1,2,4,8,16', help="Comma separated concurrency levels")
+        parser.add_argument('--rate', type=float, default=0, help="Requests per second limit (0 for none)")
+
+    def handle(self, *args, **options):
+        geocoder = StubGeocoder(latency=options['latency'])
+        addresses = [
+            f"{number} Centre St SW, Calgary, AB"
+            for number in range(options['addresses'])
+        ] * max(1, options['duplicates'])
+
+        self.stdout.write(
+            f"{len(addresses)} addresses ({options['addresses']} unique), "
+            f"stub latency {options['latency'] * 1000:.0f}ms, rate limit {options['rate'] or 'none'}"
+        )
+
+        for workers in [int(value) for value in options['workers'].split(',')]:
+            start = time.perf_counter()
+            resolved = geocode_concurrently(
+                addresses,
+                geocoder.geocode,
+                max_workers=workers,
+                rate_limiter=TokenBucket(options['rate']),
+            )
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"workers={workers:>3}: {elapsed:.2f}s, "
+                f"{options['addresses'] / elapsed:.1f} lookups/s, {len(resolved)} resolved"
+            )
@@ -0,0 +1,81 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+
+def parse_importtime(output):
+    """
+    Rows of ``python -X importtime`` output
+
+    Returns:
+        list: (self_us, cumulative_us, module, depth) in the order printed
+            (children before the module that imported them)
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(self_us), int(cumulative_us), module, depth))
+    return rows
+
+
+def subtree_time(rows, prefix):
+    """Cumulative microseconds of the outermost imports of modules under ``prefix``"""
+    total = 0
+    ancestors = []
+    # Reversed, every module comes before the modules it imported
+    for _, cumulative_us, module, depth in reversed(rows):
+        while ancestors and ancestors[-1][0] >= depth:
+            ancestors.pop()
+        inside = any(name.split('.')[0] == prefix for _, name in ancestors)
+        if module.split('.')[0] == prefix and not inside:
+            total += cumulative_us
+        ancestors.append((depth, module))
+    return total
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure process startup: run django.setup() and import a module in fresh "
+        "interpreters under python -X importtime, and report time spent importing "
+        "the Firebase SDK"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='packagemanagerapp.views', help="Module imported after setup")
+        parser.add_argument('--repeat', type=int, default=5, help="Interpreters started")
+
+    def _run_once(self, module):
+        code = f"import django; django.setup(); import {module}"
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+        )
+        wall = time.perf_counter() - start
+        if completed.returncode:
+            raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+        return wall, parse_importtime(completed.stderr)
+
+    def handle(self, *args, **options):
+        walls, imports, firebase = [], [], []
+        for _ in range(max(1, options['repeat'])):
+            wall, rows = self._run_once(options['module'])
+            walls.append(wall * 1000)
+            imports.append(sum(row[0] for row in rows) / 1000)
+            # Including whatever the SDK pulled in that nothing had imported yet
+            firebase.append(subtree_time(rows, 'firebase_admin') / 1000)
+
+        self.stdout.write(f"django.setup() + import {options['module']} (median of {len(walls)} runs)")
+        self.stdout.write(f"{'process wall time':>20}: {statistics.median(walls):8.1f}ms")
+        self.stdout.write(f"{'all imports':>20}: {statistics.median(imports):8.1f}ms")
+        self.stdout.write(f"{'Firebase SDK imports':>20}: {statistics.median(firebase):8.1f}ms")
@@ -0,0 +1,109 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from packagemanagerapp.models import PackageDelivery, generate_tracking_id
+from packagemanagerapp.pagination import encode_cursor, paginate_queryset
+
+ORDERING = ('-created_at', '-id')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time delivery history pages (keyset cursor vs OFFSET vs the old unpaginated "
+        "list) as the table grows. Test data is created in a transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', default='10000,100000,1000000',
+            help="Comma-separated table sizes to measure at"
+        )
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per measurement")
+        parser.add_argument(
+            '--full-limit', type=int, default=100000,
+            help="Largest table size at which the unpaginated list is timed"
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows inserted per query")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _time(self, repeat, fn):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000
+
+    def _insert(self, user, start, count, batch_size):
+        # Sequential tracking IDs; random ones collide at a million rows
+        prefix = f"BENCH-{user.pk}-"
+        end = start + count
+        while start < end:
+            batch = range(start, min(start + batch_size, end))
+            PackageDelivery.objects.bulk_create([
+                PackageDelivery(
+                    user=user,
+                    tracking_id=f"{prefix}{number}",
+                    pickup_address="1 Main St, Calgary",
+                    pickup_contact_name="Sender",
+                    pickup_contact_phone="000",
+                    delivery_address="2 Main St, Calgary",
+                    delivery_recipient_phone="000",
+                    weight_range="1-5kg",
+                    package_type="parcel",
+                )
+                for number in batch
+            ])
+            start = batch.stop
+
+    def _run(self, options):
+        sizes = sorted(int(size) for size in options['rows'].split(',') if size.strip())
+        page_size = options['page_size']
+        repeat = options['repeat']
+        factory = RequestFactory()
+
+        user = User.objects.create(username=f"benchmark-{generate_tracking_id()}")
+        deliveries = PackageDelivery.objects.filter(user=user)
+
+        self.stdout.write(
+            f"{'rows':>9} {'first page':>11} {'keyset deep':>12} {'offset deep':>12} {'full list':>10}  (median ms)"
+        )
+        inserted = 0
+        for size in sizes:
+            self._insert(user, inserted, size - inserted, options['batch_size'])
+            inserted = size
+
+            # Cursor / offset for a page halfway through the table
+            depth = size // 2
+            middle = deliveries.order_by(*ORDERING).values_list('created_at', 'id')[depth]
+            first_request = factory.get('/', {'page_size': page_size})
+            deep_request = factory.get('/', {'page_size': page_size, 'cursor': encode_cursor(list(middle))})
+
+            first = self._time(repeat, lambda: paginate_queryset(first_request, deliveries, ORDERING))
+            keyset = self._time(repeat, lambda: paginate_queryset(deep_request, deliveries, ORDERING))
+            offset = self._time(
+                repeat, lambda: list(deliveries.order_by(*ORDERING)[depth:depth + page_size])
+            )
+            if size <= options['full_limit']:
+                full = f"{self._time(max(1, repeat // 10), lambda: list(deliveries.order_by(*ORDERING))):10.1f}"
+            else:
+                full = f"{'skipped':>10}"
+
+            self.stdout.write(f"{size:>9} {first:11.2f} {keyset:12.2f} {offset:12.2f} {full}")
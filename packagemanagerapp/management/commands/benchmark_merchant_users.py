@@ -0,0 +1,147 @@
+from datetime import timedelta
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from onboarding.models import MerchantProfile
+from packagemanagerapp.models import PackageDelivery
+from packagemanagerapp.views import MERCHANT_USERS_CACHE_KEY, build_merchant_rows, get_cached_merchant_rows
+
+
+class Rollback(Exception):
+    pass
+
+
+def legacy_merchant_rows():
+    # get_merchant_users before the grouped query: one aggregate per merchant
+    six_months_ago = timezone.now() - timedelta(days=180)
+    response = []
+    for merchant in MerchantProfile.objects.select_related("user"):
+        deliveries = (
+            PackageDelivery.objects
+            .filter(user=merchant.user, created_at__gte=six_months_ago)
+            .annotate(month=TruncMonth("created_at"))
+            .values("month")
+            .annotate(total=Count("id"))
+        )
+        total_deliveries = sum(item["total"] for item in deliveries)
+        response.append({
+            "id": str(merchant.user.id),
+            "businessName": merchant.business_name,
+            "businessEmail": merchant.business_email,
+            "businessRegNumber": merchant.business_registration_number,
+            "businessPhone": merchant.business_phone,
+            "industryType": merchant.industry_type,
+            "monthlyOrderVolume": round(total_deliveries / 6, 2),
+            "emailVerificationStatus": merchant.emailVerificationStatus,
+        })
+    return response
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the admin merchant list: per-merchant aggregates vs one grouped query vs "
+        "the cached list. Test data is created in a transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--merchants', type=int, default=5000)
+        parser.add_argument('--deliveries', type=int, default=1000000)
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows inserted per query")
+        parser.add_argument('--repeat', type=int, default=3, help="Timed runs per path")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _insert(self, model, rows, batch_size):
+        for start in range(0, len(rows), batch_size):
+            model.objects.bulk_create(rows[start:start + batch_size])
+
+    def _run(self, options):
+        batch_size = options['batch_size']
+        merchant_count = options['merchants']
+        delivery_count = options['deliveries']
+
+        prefix = f"bench-{int(time.time())}"
+        self._insert(User, [User(username=f"{prefix}-{n}") for n in range(merchant_count)], batch_size)
+        users = list(User.objects.filter(username__startswith=f"{prefix}-").values_list('id', flat=True))
+        self._insert(MerchantProfile, [
+            MerchantProfile(
+                user_id=user_id,
+                business_name=f"Merchant {n}",
+                business_email=f"{prefix}-{n}@example.com",
+                business_phone="000",
+                business_registration_number=str(n),
+                industry_type="retail",
+                monthly_order_volume=0,
+            )
+            for n, user_id in enumerate(users)
+        ], batch_size)
+
+        for start in range(0, delivery_count, batch_size):
+            PackageDelivery.objects.bulk_create([
+                PackageDelivery(
+                    user_id=users[n % len(users)],
+                    tracking_id=f"{prefix}-{n}",
+                    pickup_address="1 Main St, Calgary",
+                    pickup_contact_name="Sender",
+                    pickup_contact_phone="000",
+                    delivery_address="2 Main St, Calgary",
+                    delivery_recipient_phone="000",
+                    weight_range="1-5kg",
+                    package_type="parcel",
+                )
+                for n in range(start, min(start + batch_size, delivery_count))
+            ])
+
+        # Spread deliveries over the last year so the six-month window matters
+        now = timezone.now()
+        deliveries = PackageDelivery.objects.filter(tracking_id__startswith=f"{prefix}-")
+        first_id = deliveries.order_by('id').values_list('id', flat=True).first()
+        band = max(1, delivery_count // 12)
+        for month in range(12):
+            deliveries.filter(
+                id__gte=first_id + month * band, id__lt=first_id + (month + 1) * band
+            ).update(created_at=now - timedelta(days=30 * month + 1))
+
+        self.stdout.write(f"{merchant_count} merchants, {delivery_count} deliveries")
+
+        def cached():
+            return get_cached_merchant_rows()
+
+        cache.delete(MERCHANT_USERS_CACHE_KEY)
+        cached()
+        paths = (
+            ('per-merchant aggregates', legacy_merchant_rows, 1),
+            ('grouped query', build_merchant_rows, options['repeat']),
+            ('cached', cached, options['repeat']),
+        )
+        results = {}
+        for name, build, repeat in paths:
+            queries = []
+
+            def count_queries(execute, sql, params, many, context):
+                queries.append(sql)
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count_queries):
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    results[name] = build()
+                seconds = (time.perf_counter() - start) / repeat
+            self.stdout.write(f"{name:>23}: {seconds * 1000:9.1f}ms, {len(queries) // repeat} queries")
+
+        cache.delete(MERCHANT_USERS_CACHE_KEY)
+        if results['per-merchant aggregates'] != results['grouped query']:
+            self.stdout.write(self.style.ERROR("Grouped query rows differ from the per-merchant rows"))
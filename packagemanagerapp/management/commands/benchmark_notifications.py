@@ -0,0 +1,93 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from packagemanagerapp.models import MerchantNotification, NotificationCounter
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time notifying many users one row at a time vs MerchantNotification.notify(), "
+        "and the unread badge as a COUNT vs the counter row. Test data is created in a "
+        "transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--per-user', type=int, default=200, help="Notifications behind the badge user")
+        parser.add_argument('--badge-reads', type=int, default=200)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _count_queries(self, fn):
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            start = time.perf_counter()
+            result = fn()
+            seconds = time.perf_counter() - start
+        return result, seconds, len(queries)
+
+    def _report(self, label, seconds, queries):
+        self.stdout.write(f"{label:>20}: {seconds * 1000:9.1f}ms, {queries} queries")
+
+    def _run(self, options):
+        count = options['users']
+        prefix = f"bench-{int(time.time())}"
+        User.objects.bulk_create([User(username=f"{prefix}-{n}") for n in range(count)], batch_size=5000)
+        users = list(User.objects.filter(username__startswith=f"{prefix}-").values_list('id', flat=True))
+        NotificationCounter.objects.bulk_create([NotificationCounter(user_id=user_id) for user_id in users])
+        self.stdout.write(f"Notifying {count} users")
+
+        # Before: one INSERT per user, plus the counter UPDATE save() now does
+        def loop():
+            for user_id in users:
+                MerchantNotification.objects.create(
+                    user_id=user_id, category="Order & Shipment", title="Loop", message="Benchmark"
+                )
+
+        _, seconds, queries = self._count_queries(loop)
+        self._report("create() per user", seconds, queries)
+
+        _, seconds, queries = self._count_queries(
+            lambda: MerchantNotification.notify(users, "Order & Shipment", "Bulk", "Benchmark")
+        )
+        self._report("notify()", seconds, queries)
+
+        badge_user = users[0]
+        for _ in range(options['per_user']):
+            MerchantNotification.notify([badge_user], "Order & Shipment", "Badge", "Benchmark")
+        reads = max(1, options['badge_reads'])
+
+        def count_badge():
+            for _ in range(reads):
+                MerchantNotification.objects.filter(user_id=badge_user, is_read=False).count()
+
+        def counter_badge():
+            for _ in range(reads):
+                NotificationCounter.unread_for(badge_user)
+
+        self.stdout.write(f"{reads} badge reads for a user with {NotificationCounter.unread_for(badge_user)} unread")
+        _, seconds, queries = self._count_queries(count_badge)
+        self._report("COUNT(*)", seconds, queries)
+        _, seconds, queries = self._count_queries(counter_badge)
+        self._report("counter row", seconds, queries)
+
+        _, seconds, queries = self._count_queries(lambda: MerchantNotification.mark_all_read(badge_user))
+        self._report("mark all read", seconds, queries)
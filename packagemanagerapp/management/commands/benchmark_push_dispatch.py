@@ -0,0 +1,104 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from packagemanagerapp.models import FCMToken, PushOutbox
+from packagemanagerapp.pushbackends import FakePushBackend
+from packagemanagerapp.pushoutbox import MULTICAST_LIMIT, claim_outbox, dispatch_outbox, enqueue_push_to_users
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time a push to many users: the old in-request send vs enqueueing plus the "
+        "batched dispatcher, against the fake push backend. Test data is created in "
+        "a transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument(
+            '--latency', type=float, default=0.05,
+            help="Seconds the fake backend takes per multicast request"
+        )
+        parser.add_argument('--dead-every', type=int, default=50, help="Every Nth token is unregistered")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows inserted per query")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _count_queries(self, fn):
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            start = time.perf_counter()
+            result = fn()
+            seconds = time.perf_counter() - start
+        return result, seconds, len(queries)
+
+    def _run(self, options):
+        count = options['users']
+        batch_size = options['batch_size']
+        prefix = f"bench-{int(time.time())}"
+
+        tokens = [
+            f"dead-{prefix}-{n}" if options['dead_every'] and n % options['dead_every'] == 0 else f"{prefix}-{n}"
+            for n in range(count)
+        ]
+        User.objects.bulk_create([User(username=f"{prefix}-{n}") for n in range(count)], batch_size=batch_size)
+        users = list(User.objects.filter(username__startswith=f"{prefix}-").values_list('id', flat=True))
+        FCMToken.objects.bulk_create(
+            [FCMToken(user_id=user_id, token=token) for user_id, token in zip(users, tokens)],
+            batch_size=batch_size
+        )
+
+        backend = FakePushBackend(latency=options['latency'])
+        self.stdout.write(f"{count} users with one token each, {options['latency'] * 1000:.0f}ms per multicast")
+
+        # Before: the request sent every multicast itself
+        def send_in_request():
+            active = list(FCMToken.objects.filter(user_id__in=users, is_active=True).values_list('token', flat=True))
+            for start in range(0, len(active), MULTICAST_LIMIT):
+                backend.send_multicast(active[start:start + MULTICAST_LIMIT], "Title", "Body")
+
+        _, seconds, queries = self._count_queries(send_in_request)
+        self.stdout.write(f"{'send in request':>20}: {seconds * 1000:9.1f}ms blocked, {queries} queries")
+
+        queued, seconds, queries = self._count_queries(
+            lambda: enqueue_push_to_users(users, "Title", "Body", {"type": "benchmark"})
+        )
+        self.stdout.write(
+            f"{'enqueue in request':>20}: {seconds * 1000:9.1f}ms blocked, {queries} queries, "
+            f"{PushOutbox.objects.filter(status='QUEUED').count()} outbox rows for {queued} tokens"
+        )
+
+        def dispatch_all():
+            totals = {"success_count": 0, "dead_count": 0}
+            while True:
+                rows = claim_outbox("benchmark")
+                if not rows:
+                    return totals
+                result = dispatch_outbox(rows, backend)
+                totals["success_count"] += result["success_count"]
+                totals["dead_count"] += result["dead_count"]
+
+        totals, seconds, queries = self._count_queries(dispatch_all)
+        self.stdout.write(
+            f"{'dispatcher':>20}: {seconds * 1000:9.1f}ms, {queries} queries, "
+            f"{totals['success_count']} delivered, {totals['dead_count']} tokens deactivated "
+            f"({totals['success_count'] / seconds:.0f} tokens/s)"
+        )
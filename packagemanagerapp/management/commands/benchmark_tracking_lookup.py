@@ -0,0 +1,127 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from packagemanagerapp.models import (
+    BulkShipmentItem,
+    BulkShipmentUpload,
+    PackageDelivery,
+    generate_tracking_id,
+)
+from packagemanagerapp.tracking import resolve_tracking_id
+
+
+class Rollback(Exception):
+    pass
+
+
+def legacy_lookup(tracking_id):
+    # The lookup get_delivery_order_details used before TrackingRegistry
+    try:
+        return "PackageDelivery", PackageDelivery.objects.get(tracking_id=tracking_id)
+    except PackageDelivery.DoesNotExist:
+        pass
+    try:
+        return "BulkShipmentItem", BulkShipmentItem.objects.select_related('bulk_upload__user').get(
+            tracking_id=tracking_id
+        )
+    except BulkShipmentItem.DoesNotExist:
+        return None, None
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the two-table tracking lookup with TrackingRegistry under mixed "
+        "single/bulk/unknown traffic. Test data is created in a transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--packages', type=int, default=2000, help="Single shipments to create")
+        parser.add_argument('--items', type=int, default=8000, help="Bulk shipment items to create")
+        parser.add_argument('--lookups', type=int, default=5000, help="Lookups per path")
+        parser.add_argument('--miss-ratio', type=float, default=0.05, help="Share of unknown tracking IDs")
+        parser.add_argument(
+            '--round-trip-ms', type=float, default=0.0,
+            help="Simulated network round trip added to every query (SQLite has none)"
+        )
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _run(self, options):
+        rng = random.Random(options['seed'])
+        user = User.objects.create(username=f"benchmark-{generate_tracking_id()}")
+
+        packages = []
+        for _ in range(options['packages']):
+            package = PackageDelivery(
+                user=user,
+                pickup_address="1 Main St, Calgary",
+                pickup_contact_name="Sender",
+                pickup_contact_phone="000",
+                delivery_address="2 Main St, Calgary",
+                delivery_recipient_phone="000",
+                weight_range="1-5kg",
+                package_type="parcel",
+            )
+            package.save()
+            packages.append(package.tracking_id)
+
+        upload = BulkShipmentUpload.objects.create(user=user)
+        items = []
+        for row in range(options['items']):
+            item = BulkShipmentItem(
+                bulk_upload=upload,
+                row_number=row,
+                receiver_name="Receiver",
+                phone_number="000",
+                delivery_address="3 Main St, Calgary",
+                postal_code="T2P",
+                weight_range="1-5kg",
+            )
+            item.save()
+            items.append(item.tracking_id)
+
+        share = options['packages'] / max(1, options['packages'] + options['items'])
+        traffic = []
+        for _ in range(options['lookups']):
+            roll = rng.random()
+            if roll < options['miss_ratio']:
+                traffic.append(generate_tracking_id())
+            elif rng.random() < share:
+                traffic.append(rng.choice(packages))
+            else:
+                traffic.append(rng.choice(items))
+
+        paths = (
+            ('two-table lookup', legacy_lookup),
+            ('registry + fallback', lambda tracking_id: resolve_tracking_id(tracking_id, fallback=True)),
+            ('registry only', lambda tracking_id: resolve_tracking_id(tracking_id, fallback=False)),
+        )
+        round_trip = options['round_trip_ms'] / 1000
+        for name, lookup in paths:
+            queries = []
+
+            def count_queries(execute, sql, params, many, context):
+                queries.append(sql)
+                if round_trip:
+                    time.sleep(round_trip)
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count_queries):
+                start = time.perf_counter()
+                found = sum(1 for tracking_id in traffic if lookup(tracking_id)[1] is not None)
+                seconds = time.perf_counter() - start
+            self.stdout.write(
+                f"{name:>19}: {seconds / len(traffic) * 1e6:.1f}us and "
+                f"{len(queries) / len(traffic):.2f} queries per lookup ({found} found)"
+            )
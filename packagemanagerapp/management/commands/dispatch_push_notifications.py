@@ -0,0 +1,78 @@
+import socket
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from packagemanagerapp.pushoutbox import (
+    DEFAULT_POLL_INTERVAL,
+    prune_device_tokens,
+    requeue_stale_outbox,
+    run_dispatcher,
+)
+
+# Seconds between device token prunes while dispatchers run
+PRUNE_INTERVAL = 3600
+
+# Seconds between checks for rows whose dispatcher died while dispatchers run
+REQUEUE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = "Run a pool of dispatchers that send queued push notifications"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Number of dispatcher threads")
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=DEFAULT_POLL_INTERVAL,
+            help="Seconds to wait when nothing is due"
+        )
+        parser.add_argument('--once', action='store_true', help="Exit once nothing is due")
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        stop_event = threading.Event()
+        hostname = socket.gethostname()
+
+        requeue_stale_outbox()
+        prune_device_tokens()
+        pruned_at = requeued_at = time.monotonic()
+
+        results = {}
+
+        def work(index):
+            results[index] = run_dispatcher(
+                worker_id=f"{hostname}-{index}",
+                stop_event=stop_event,
+                poll_interval=options['poll_interval'],
+                once=options['once'],
+            )
+
+        threads = [
+            threading.Thread(target=work, args=(index,), daemon=True)
+            for index in range(workers)
+        ]
+
+        self.stdout.write(f"Starting {workers} push dispatchers")
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+                    if time.monotonic() - requeued_at >= REQUEUE_INTERVAL:
+                        requeue_stale_outbox()
+                        requeued_at = time.monotonic()
+                    if time.monotonic() - pruned_at >= PRUNE_INTERVAL:
+                        prune_device_tokens()
+                        pruned_at = time.monotonic()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping dispatchers after their current batch...")
+            stop_event.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {sum(results.values())} push outbox rows"))
@@ -0,0 +1,185 @@
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, transaction
+
+from packagemanagerapp.models import PackageDelivery
+from packagemanagerapp.trackingevents import get_event_bus, status_event
+
+
+class Rollback(Exception):
+    pass
+
+
+class StreamClient:
+    """One EventSource connection, driven through the ASGI interface"""
+
+    def __init__(self, path):
+        self.scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'accept', b'text/event-stream')],
+            'client': ('127.0.0.1', 50000),
+            'server': ('localhost', 80),
+        }
+        self.requested = False
+        self.status = None
+        self.ready = asyncio.Event()
+        self.disconnected = asyncio.Event()
+        self.received = asyncio.Event()
+        self.events = []
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+            if self.status != 200:
+                self.ready.set()
+            return
+        for line in message.get('body', b'').split(b'\n'):
+            if line == b'event: snapshot':
+                self.ready.set()
+            elif line.startswith(b'event: '):
+                self.events.append(time.perf_counter())
+                self.received.set()
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the live tracking streams: open thousands of idle SSE connections "
+        "against the ASGI application in this process, then measure memory and CPU per "
+        "idle stream and how fast status changes reach them. Test data is created in a "
+        "transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=5000)
+        parser.add_argument('--shipments', type=int, default=500, help="Streams are spread over this many tracking IDs")
+        parser.add_argument('--events', type=int, default=50, help="Single-shipment status changes to time")
+        parser.add_argument('--idle', type=float, default=5, help="Seconds to hold the streams idle")
+        parser.add_argument('--poll-interval', type=float, default=5, help="Polling interval the streams replace")
+
+    def handle(self, *args, **options):
+        from alalax_be.asgi import application
+
+        # As django.test.client does: the ASGI handler must not close the
+        # connection that holds the rolled-back transaction
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            with transaction.atomic():
+                tracking_ids = self._create_shipments(options['shipments'])
+                # Sync parts of the requests run back on this thread, inside the transaction
+                async_to_sync(self._run)(application, tracking_ids, options)
+                raise Rollback()
+        except Rollback:
+            pass
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+    def _create_shipments(self, count):
+        user = User.objects.create_user(username=f"stream-loadtest-{int(time.time())}")
+        return [
+            PackageDelivery.objects.create(
+                user=user,
+                pickup_address="1 Main St, Calgary",
+                delivery_address="2 Main St, Calgary",
+                weight_range="1-5kg",
+                package_type="parcel",
+            ).tracking_id
+            for _ in range(max(1, count))
+        ]
+
+    async def _run(self, application, tracking_ids, options):
+        count = options['subscribers']
+        bus = get_event_bus()
+        watchers = {}
+        clients = []
+        for n in range(count):
+            tracking_id = tracking_ids[n % len(tracking_ids)]
+            client = StreamClient(f"/package/track/{tracking_id}/events")
+            watchers.setdefault(tracking_id, []).append(client)
+            clients.append(client)
+
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(application(client.scope, client.receive, client.send)) for client in clients]
+        await asyncio.gather(*(client.ready.wait() for client in clients))
+        seconds = time.perf_counter() - start
+        traced, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        failed = sum(1 for client in clients if client.status != 200)
+        self.stdout.write(
+            f"{'connect':>12}: {count} streams over {len(tracking_ids)} shipments in {seconds:.1f}s "
+            f"({count / seconds:.0f}/s), {failed} failed, {bus.subscriber_count()} subscribed"
+        )
+        self.stdout.write(f"{'memory':>12}: {(traced - baseline) / count / 1024:.1f} KiB of Python heap per stream")
+
+        cpu = time.process_time()
+        await asyncio.sleep(options['idle'])
+        self.stdout.write(
+            f"{'idle':>12}: {(time.process_time() - cpu) * 1000:.0f}ms CPU in {options['idle']:.0f}s "
+            f"(polling every {options['poll_interval']:.0f}s would be {count / options['poll_interval']:.0f} requests/s)"
+        )
+
+        # One shipment changes; only its watchers are woken
+        latencies = []
+        for n in range(options['events']):
+            tracking_id = tracking_ids[n % len(tracking_ids)]
+            for client in watchers[tracking_id]:
+                client.received.clear()
+            published = time.perf_counter()
+            await asyncio.to_thread(bus.publish, [status_event("delivery_status", tracking_id, "IN_TRANSIT")])
+            await asyncio.gather(*(client.received.wait() for client in watchers[tracking_id]))
+            latencies.extend(client.events[-1] - published for client in watchers[tracking_id])
+        if latencies:
+            latencies.sort()
+            self.stdout.write(
+                f"{'one shipment':>12}: {options['events']} events to {len(latencies) // options['events']} "
+                f"watchers each, p50 {statistics.median(latencies) * 1000:.2f}ms, "
+                f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f}ms"
+            )
+
+        # A bulk transition changes every shipment at once
+        for client in clients:
+            client.received.clear()
+        published = time.perf_counter()
+        await asyncio.to_thread(
+            bus.publish, [status_event("delivery_status", tracking_id, "DELIVERED") for tracking_id in tracking_ids]
+        )
+        await asyncio.gather(*(client.received.wait() for client in clients))
+        self.stdout.write(
+            f"{'all':>12}: {len(tracking_ids)} events reached {count} streams in "
+            f"{(time.perf_counter() - published) * 1000:.1f}ms"
+        )
+
+        start = time.perf_counter()
+        for client in clients:
+            client.disconnected.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.stdout.write(
+            f"{'disconnect':>12}: {(time.perf_counter() - start) * 1000:.0f}ms, "
+            f"{bus.subscriber_count()} subscriptions left"
+        )
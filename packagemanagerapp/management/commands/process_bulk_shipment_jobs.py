@@ -0,0 +1,70 @@
+import socket
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from packagemanagerapp.bulkshipmentjobs import (
+    DEFAULT_POLL_INTERVAL,
+    requeue_stale_jobs,
+    run_worker,
+)
+
+# Seconds between checks for jobs whose worker died while workers run
+REQUEUE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = "Run a pool of workers that process queued bulk shipment uploads"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Number of worker threads")
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=DEFAULT_POLL_INTERVAL,
+            help="Seconds to wait when the queue is empty"
+        )
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        stop_event = threading.Event()
+        hostname = socket.gethostname()
+
+        requeue_stale_jobs()
+        requeued_at = time.monotonic()
+
+        results = {}
+
+        def work(index):
+            results[index] = run_worker(
+                worker_id=f"{hostname}-{index}",
+                stop_event=stop_event,
+                poll_interval=options['poll_interval'],
+                once=options['once'],
+            )
+
+        threads = [
+            threading.Thread(target=work, args=(index,), daemon=True)
+            for index in range(workers)
+        ]
+
+        self.stdout.write(f"Starting {workers} bulk shipment workers")
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+                    if time.monotonic() - requeued_at >= REQUEUE_INTERVAL:
+                        requeue_stale_jobs()
+                        requeued_at = time.monotonic()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping workers after their current job...")
+            stop_event.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {sum(results.values())} bulk shipment jobs"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from packagemanagerapp.pushoutbox import prune_device_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete deactivated device tokens and tokens not registered for FCM_TOKEN_STALE_DAYS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-days', type=int, default=None, help="Override FCM_TOKEN_STALE_DAYS")
+
+    def handle(self, *args, **options):
+        deleted = prune_device_tokens(stale_days=options['stale_days'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} device tokens"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from packagemanagerapp.geocoding import prune_distance_matrix, prune_geocode_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired geocode cache entries and trim the geocode and distance "
+        "matrix tables to GEOCODE_CACHE_DB_MAX_ENTRIES / DISTANCE_MATRIX_DB_MAX_ENTRIES"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-entries', type=int, default=None, help="Override the geocode row limit")
+        parser.add_argument('--max-distances', type=int, default=None, help="Override the distance matrix row limit")
+
+    def handle(self, *args, **options):
+        deleted = prune_geocode_cache(max_entries=options['max_entries'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} geocode cache entries"))
+
+        deleted = prune_distance_matrix(max_entries=options['max_distances'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} distance matrix entries"))
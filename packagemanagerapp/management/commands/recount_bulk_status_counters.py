@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from packagemanagerapp.models import BulkShipmentUpload
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-status item counters of bulk shipment uploads from their items"
+
+    def add_arguments(self, parser):
+        parser.add_argument('bulk_tracking_ids', nargs='*', help="Uploads to recount (default: all)")
+
+    def handle(self, *args, **options):
+        uploads = BulkShipmentUpload.objects.order_by('id')
+        if options['bulk_tracking_ids']:
+            uploads = uploads.filter(bulk_tracking_id__in=options['bulk_tracking_ids'])
+
+        recounted = 0
+        for bulk_upload in uploads.only('id', 'bulk_tracking_id').iterator():
+            bulk_upload.recount_status_counters()
+            recounted += 1
+        self.stdout.write(self.style.SUCCESS(f"Recounted {recounted} bulk uploads"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from packagemanagerapp.models import MerchantDeliveryStats
+
+
+class Command(BaseCommand):
+    help = "Drop materialized merchant dashboard stats; each row is rebuilt on its next read"
+
+    def handle(self, *args, **options):
+        deleted, _ = MerchantDeliveryStats.objects.all().delete()
+        self.stdout.write(self.style.SUCCESS(f"Dropped {deleted} merchant stats rows"))
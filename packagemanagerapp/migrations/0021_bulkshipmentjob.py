@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packagemanagerapp', '0020_alter_issuefeedback_issue_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkShipmentJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='QUEUED', max_length=20)),
+                ('delivery_speed', models.CharField(default='standard', max_length=20)),
+                ('pickup_address', models.TextField(blank=True, null=True)),
+                ('pickup_contact_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('pickup_contact_phone', models.CharField(blank=True, max_length=20, null=True)),
+                ('rows_processed', models.IntegerField(default=0)),
+                ('attempts', models.IntegerField(default=0)),
+                ('worker_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('bulk_upload', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='job', to='packagemanagerapp.bulkshipmentupload')),
+            ],
+            options={
+                'verbose_name': 'Bulk Shipment Job',
+                'verbose_name_plural': 'Bulk Shipment Jobs',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='packagemana_status_df666d_idx')],
+            },
+        ),
+    ]
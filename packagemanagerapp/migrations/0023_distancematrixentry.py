@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packagemanagerapp', '0022_geocodecacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DistanceMatrixEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin_cell', models.CharField(max_length=64)),
+                ('destination_cell', models.CharField(max_length=64)),
+                ('distance_km', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Distance Matrix Entry',
+                'verbose_name_plural': 'Distance Matrix Entries',
+                'constraints': [models.UniqueConstraint(fields=('origin_cell', 'destination_cell'), name='unique_distance_matrix_pair')],
+            },
+        ),
+    ]
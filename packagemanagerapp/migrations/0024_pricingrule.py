@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packagemanagerapp', '0023_distancematrixentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tier', models.CharField(choices=[('single', 'Single Shipment'), ('bulk', 'Bulk Shipment')], max_length=10)),
+                ('version', models.PositiveIntegerField(editable=False)),
+                ('effective_from', models.DateTimeField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('small_base_fee', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('medium_base_fee', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('large_base_fee', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('standard_speed_fee', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('express_speed_fee', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('instant_speed_fee', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('signature_confirmation_fee', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('fragile_handling_fee', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('oversized_package_fee', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('free_distance_km', models.DecimalField(decimal_places=2, default=5, max_digits=6)),
+                ('per_km_rate', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Pricing Rule',
+                'verbose_name_plural': 'Pricing Rules',
+                'ordering': ['tier', '-effective_from', '-version'],
+                'indexes': [models.Index(fields=['tier', 'is_active', 'effective_from'], name='packagemana_tier_548483_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tier', 'version'), name='unique_pricing_rule_version')],
+            },
+        ),
+    ]
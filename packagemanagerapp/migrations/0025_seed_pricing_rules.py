@@ -0,0 +1,63 @@
+import datetime
+from decimal import Decimal
+
+from django.db import migrations
+
+
+# Prices that were hard-coded in the calculators before pricing rules existed
+INITIAL_PRICING = {
+    'single': {
+        'small_base_fee': Decimal('7.99'),
+        'medium_base_fee': Decimal('11.99'),
+        'large_base_fee': Decimal('17.99'),
+    },
+    'bulk': {
+        'small_base_fee': Decimal('5.99'),
+        'medium_base_fee': Decimal('9.99'),
+        'large_base_fee': Decimal('15.99'),
+    },
+}
+
+SHARED_PRICING = {
+    'standard_speed_fee': Decimal('0.00'),
+    'express_speed_fee': Decimal('4.99'),
+    'instant_speed_fee': Decimal('6.99'),
+    'signature_confirmation_fee': Decimal('1.50'),
+    'fragile_handling_fee': Decimal('2.50'),
+    'oversized_package_fee': Decimal('8.00'),
+    'free_distance_km': Decimal('5.00'),
+    'per_km_rate': Decimal('0.90'),
+}
+
+
+def seed_pricing_rules(apps, schema_editor):
+    PricingRule = apps.get_model('packagemanagerapp', 'PricingRule')
+    effective_from = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+    for tier, base_fees in INITIAL_PRICING.items():
+        if PricingRule.objects.filter(tier=tier).exists():
+            continue
+        PricingRule.objects.create(
+            tier=tier,
+            version=1,
+            effective_from=effective_from,
+            notes="Initial pricing",
+            **base_fees,
+            **SHARED_PRICING,
+        )
+
+
+def remove_pricing_rules(apps, schema_editor):
+    PricingRule = apps.get_model('packagemanagerapp', 'PricingRule')
+    PricingRule.objects.filter(version=1, notes="Initial pricing").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packagemanagerapp', '0024_pricingrule'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_pricing_rules, remove_pricing_rules),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packagemanagerapp', '0025_seed_pricing_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackingRegistry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tracking_id', models.CharField(max_length=50, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('bulk_item', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tracking_entry', to='packagemanagerapp.bulkshipmentitem')),
+                ('package', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tracking_entry', to='packagemanagerapp.packagedelivery')),
+            ],
+            options={
+                'verbose_name': 'Tracking Registry Entry',
+                'verbose_name_plural': 'Tracking Registry',
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('bulk_item__isnull', True), ('package__isnull', False)), models.Q(('bulk_item__isnull', False), ('package__isnull', True)), _connector='OR'), name='tracking_registry_one_shipment')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packagemanagerapp', '0027_bulkshipmentitemstatushistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkshipmentupload',
+            name='delivered_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bulkshipmentupload',
+            name='in_transit_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bulkshipmentupload',
+            name='not_picked_up_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bulkshipmentupload',
+            name='out_for_delivery_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bulkshipmentupload',
+            name='picked_up_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+STATUS_COUNTER_FIELDS = {
+    'NOT_PICKED_UP': 'not_picked_up_count',
+    'PICKED_UP': 'picked_up_count',
+    'IN_TRANSIT': 'in_transit_count',
+    'OUT_FOR_DELIVERY': 'out_for_delivery_count',
+    'DELIVERED': 'delivered_count',
+}
+
+
+def backfill_status_counters(apps, schema_editor):
+    BulkShipmentItem = apps.get_model('packagemanagerapp', 'BulkShipmentItem')
+    BulkShipmentUpload = apps.get_model('packagemanagerapp', 'BulkShipmentUpload')
+
+    counters = {}
+    for bulk_upload_id, status, count in (
+        BulkShipmentItem.objects.filter(status__in=STATUS_COUNTER_FIELDS)
+        .order_by()
+        .values_list('bulk_upload_id', 'status')
+        .annotate(count=Count('pk'))
+    ):
+        counters.setdefault(bulk_upload_id, {})[STATUS_COUNTER_FIELDS[status]] = count
+
+    for bulk_upload_id, fields in counters.items():
+        BulkShipmentUpload.objects.filter(pk=bulk_upload_id).update(**fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packagemanagerapp', '0028_bulkshipmentupload_status_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_status_counters, migrations.RunPython.noop),
+    ]
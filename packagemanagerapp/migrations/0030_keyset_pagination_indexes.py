@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packagemanagerapp', '0029_backfill_bulk_status_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='merchantnotification',
+            name='packagemana_user_id_fcc5c9_idx',
+        ),
+        migrations.AddIndex(
+            model_name='bulkshipmentupload',
+            index=models.Index(fields=['-created_at', '-id'], name='packagemana_created_bf2f35_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bulkshipmentupload',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='packagemana_user_id_eef6c9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bulkshipmentupload',
+            index=models.Index(fields=['user', '-updated_at', '-id'], name='packagemana_user_id_53525d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issuefeedback',
+            index=models.Index(fields=['-created_at', '-id'], name='packagemana_created_f29bba_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merchantnotification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='packagemana_user_id_0a5b42_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='packagedelivery',
+            index=models.Index(fields=['-created_at', '-id'], name='packagemana_created_ecc840_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='packagedelivery',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='packagemana_user_id_6e6a39_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='packagedelivery',
+            index=models.Index(fields=['user', '-edited_at', '-id'], name='packagemana_user_id_e29927_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('packagemanagerapp', '0030_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MerchantDeliveryStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='delivery_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('active_deliveries', models.IntegerField(default=0)),
+                ('delivered', models.IntegerField(default=0)),
+                ('out_for_delivery', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Merchant Delivery Stats',
+                'verbose_name_plural': 'Merchant Delivery Stats',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packagemanagerapp', '0031_merchantdeliverystats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bulkshipmentitem',
+            index=models.Index(fields=['bulk_upload', 'status'], name='packagemana_bulk_up_8a2a73_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issuefeedback',
+            index=models.Index(condition=models.Q(('user__isnull', True)), fields=['email', '-created_at'], name='feedback_anon_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='packagedelivery',
+            index=models.Index(fields=['status'], name='packagemana_status_0e48ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='packagedelivery',
+            index=models.Index(fields=['user', 'status'], name='packagemana_user_id_09794c_idx'),
+        ),
+    ]
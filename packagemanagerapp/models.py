@@ -1,7 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 import uuid
-from django.db import models
+from django.conf import settings
+from django.utils import timezone
+
+from packagemanagerapp.trackingcache import invalidate_tracking
+from packagemanagerapp.trackingevents import publish_on_commit, status_event
 
 STATUS_CHOICES = [
     ("NOT_PICKED_UP", "Not Picked Up"),
@@ -11,6 +15,12 @@ STATUS_CHOICES = [
     ("DELIVERED", "Delivered"),
 ]
 
+
+def generate_tracking_id():
+    """Return a new public tracking ID shared by single and bulk shipments"""
+    return f"ALX-{uuid.uuid4().hex[:10].upper()}"
+
+
 class PackageDelivery(models.Model):
 
     WEIGHT_RANGE_CHOICES = [
@@ -99,30 +109,67 @@ class PackageDelivery(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     edited_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so save() can detect a change without re-reading the row
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_status = self.__dict__.get('status')
+
     def save(self, *args, **kwargs):
-        is_new = self.pk is None
+        is_new = self._state.adding
         old_status = None
+        update_fields = kwargs.get('update_fields')
+        status_saved = update_fields is None or 'status' in update_fields
         
         if not is_new:
-            try:
-                old_instance = PackageDelivery.objects.get(pk=self.pk)
-                old_status = old_instance.status
-            except PackageDelivery.DoesNotExist:
-                pass
+            old_status = getattr(self, '_loaded_status', None)
+            if old_status is None and status_saved:
+                # Built by hand or loaded without the status column
+                old_status = PackageDelivery.objects.filter(pk=self.pk).values_list('status', flat=True).first()
+            if update_fields is not None:
+                # edited_at is shown as the status timestamp; keep it current
+                kwargs['update_fields'] = set(update_fields) | {'edited_at'}
 
         if not self.tracking_id:
-            self.tracking_id = f"ALX-{uuid.uuid4().hex[:10].upper()}"
+            self.tracking_id = generate_tracking_id()
 
         super().save(*args, **kwargs)
 
+        if status_saved:
+            self._loaded_status = self.status
+
+        if is_new:
+            TrackingRegistry.register(packages=[self])
+            if self.user_id:
+                MerchantDeliveryStats.adjust({self.status: 1}, added=1, user_id=self.user_id)
+
         # Create status history entry when status changes
-        if is_new or (old_status and old_status != self.status):
+        if is_new or (status_saved and old_status and old_status != self.status):
             from .models import DeliveryStatusHistory  # Import here to avoid circular import
             DeliveryStatusHistory.objects.create(
                 delivery=self,
                 status=self.status,
                 notes=f"Status changed from {old_status} to {self.status}" if old_status else f"Initial status: {self.status}"
             )
+            if old_status and self.user_id:
+                MerchantDeliveryStats.adjust({old_status: -1, self.status: 1}, user_id=self.user_id)
+            publish_on_commit([
+                status_event("delivery_status", self.tracking_id, self.status, old_status, user_id=self.user_id)
+            ])
+
+        # Tracking page shows the fields and status history written above
+        if not is_new:
+            invalidate_tracking([self.tracking_id])
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        MerchantDeliveryStats.discard([self.user_id])
+        return result
 
     def get_current_status_stage(self):
         """Return numeric stage for progress indicator"""
@@ -144,6 +191,15 @@ class PackageDelivery(models.Model):
         ordering = ['-edited_at']
         verbose_name = "Package Delivery"
         verbose_name_plural = "Package Deliveries"
+        indexes = [
+            # Keyset pagination orderings (see pagination.py)
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['user', '-created_at', '-id']),
+            models.Index(fields=['user', '-edited_at', '-id']),
+            # Status counts: delivery_statistics and MerchantDeliveryStats.compute
+            models.Index(fields=['status']),
+            models.Index(fields=['user', 'status']),
+        ]
 
 
 
@@ -332,15 +388,45 @@ class ContactUs(models.Model):
 
 
 class FCMToken(models.Model):
-    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='fcm_token')
+    """One device a user gets push notifications on; a user may have several"""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='fcm_tokens')
     token = models.CharField(max_length=255, unique=True)
     device_type = models.CharField(max_length=10, choices=[('ios', 'iOS'), ('android', 'Android')], default='android')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Last time the app registered this token; stale tokens are pruned
+    last_seen_at = models.DateTimeField(default=timezone.now)
     is_active = models.BooleanField(default=True)
 
+    @classmethod
+    def register(cls, user, token, device_type='android'):
+        """
+        Record that ``user`` is signed in on the device with ``token``
+
+        A token seen before is reactivated and moved to ``user`` (a shared
+        device that changed hands); the user's other devices are untouched.
+
+        Returns:
+            tuple: (FCMToken, created)
+        """
+        return cls.objects.update_or_create(
+            token=token,
+            defaults={
+                'user': user,
+                'device_type': device_type,
+                'is_active': True,
+                'last_seen_at': timezone.now(),
+            }
+        )
+
     class Meta:
         db_table = 'fcm_tokens'
+        indexes = [
+            # Fan-out: active tokens for a set of users
+            models.Index(fields=['user', 'is_active']),
+            models.Index(fields=['last_seen_at']),
+        ]
         
     def __str__(self):
         return f"{self.user.username} - {self.device_type}"
@@ -361,10 +447,80 @@ class MerchantNotification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored read flag so save() and delete() can keep the unread counter right
+        instance._loaded_is_read = instance.__dict__.get('is_read')
+        return instance
+
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        was_read = None
+        if not is_new and (update_fields is None or 'is_read' in update_fields):
+            was_read = getattr(self, '_loaded_is_read', None)
+            if was_read is None:
+                was_read = MerchantNotification.objects.filter(pk=self.pk).values_list('is_read', flat=True).first()
+
+        super().save(*args, **kwargs)
+
+        if is_new:
+            if not self.is_read:
+                NotificationCounter.adjust([self.user_id], 1)
+        elif was_read is not None and bool(was_read) != bool(self.is_read):
+            NotificationCounter.adjust([self.user_id], -1 if self.is_read else 1)
+
+        if is_new or was_read is not None:
+            self._loaded_is_read = self.is_read
+
+    def delete(self, *args, **kwargs):
+        was_read = getattr(self, '_loaded_is_read', self.is_read)
+        result = super().delete(*args, **kwargs)
+        if not was_read:
+            NotificationCounter.adjust([self.user_id], -1)
+        return result
+
+    @classmethod
+    def notify(cls, user_ids, category, title, message):
+        """
+        Create the same unread notification for many users
+
+        Rows are written with bulk_create and the users' unread counters
+        moved with one UPDATE.
+
+        Returns:
+            int: Number of notifications created
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        with transaction.atomic():
+            cls.objects.bulk_create([
+                cls(user_id=user_id, category=category, title=title, message=message)
+                for user_id in user_ids
+            ])
+            NotificationCounter.adjust(user_ids, 1)
+        return len(user_ids)
+
+    @classmethod
+    def mark_all_read(cls, user_id):
+        """
+        Mark every notification of a user as read with one UPDATE
+
+        Returns:
+            int: Number of notifications that were unread
+        """
+        with transaction.atomic():
+            updated = cls.objects.filter(user_id=user_id, is_read=False).update(
+                is_read=True,
+                updated_at=timezone.now()
+            )
+            NotificationCounter.objects.filter(pk=user_id).update(unread=0, updated_at=timezone.now())
+        return updated
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', '-created_at', '-id']),
             models.Index(fields=['user', 'is_read']),
         ]
     
@@ -372,6 +528,56 @@ class MerchantNotification(models.Model):
         return f"{self.title} - {self.user.email}"
 
 
+class NotificationCounter(models.Model):
+    """
+    Per-user unread notification count for the notification badge
+
+    A user's row is counted from MerchantNotification the first time it is
+    read, then moved with F() updates whenever a notification is created,
+    read, unread or deleted, so the badge is a primary-key lookup. Users
+    without a row are not updated; their count is taken on the next read.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="notification_counter"
+    )
+    unread = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def unread_for(cls, user_id):
+        """Unread notification count of a user"""
+        unread = cls.objects.filter(pk=user_id).values_list('unread', flat=True).first()
+        if unread is not None:
+            return unread
+
+        unread = MerchantNotification.objects.filter(user_id=user_id, is_read=False).count()
+        # If another request created the row after the SELECT above, adjust()
+        # may already be moving it; leave it alone rather than reset the badge
+        cls.objects.bulk_create([cls(user_id=user_id, unread=unread)], ignore_conflicts=True)
+        return unread
+
+    @classmethod
+    def adjust(cls, user_ids, delta):
+        """Move the unread count of ``user_ids`` by ``delta`` with one UPDATE"""
+        user_ids = [user_id for user_id in user_ids if user_id]
+        if user_ids and delta:
+            cls.objects.filter(user_id__in=user_ids).update(
+                unread=models.F('unread') + delta,
+                updated_at=timezone.now()
+            )
+
+    def __str__(self):
+        return f"{self.user_id} - {self.unread} unread"
+
+    class Meta:
+        verbose_name = "Notification Counter"
+        verbose_name_plural = "Notification Counters"
+
+
 class BulkShipmentUpload(models.Model):
     """Main model for tracking bulk shipment uploads"""
     
@@ -407,6 +613,13 @@ class BulkShipmentUpload(models.Model):
     valid_shipments = models.IntegerField(default=0)
     invalid_shipments = models.IntegerField(default=0)
     
+    # Item counts per delivery status; only ever changed with F() updates
+    not_picked_up_count = models.IntegerField(default=0)
+    picked_up_count = models.IntegerField(default=0)
+    in_transit_count = models.IntegerField(default=0)
+    out_for_delivery_count = models.IntegerField(default=0)
+    delivered_count = models.IntegerField(default=0)
+    
     # Fee details
     total_delivery_fee = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     total_base_fee = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
@@ -424,10 +637,115 @@ class BulkShipmentUpload(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    STATUS_COUNTER_FIELDS = {
+        "NOT_PICKED_UP": "not_picked_up_count",
+        "PICKED_UP": "picked_up_count",
+        "IN_TRANSIT": "in_transit_count",
+        "OUT_FOR_DELIVERY": "out_for_delivery_count",
+        "DELIVERED": "delivered_count",
+    }
+    
+    # Upload fields shown on item tracking pages
+    ITEM_TRACKING_FIELDS = {"user", "payment_status"}
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what item tracking pages show so save() only drops them when it changed
+        instance._loaded_item_tracking = instance._item_tracking_values()
+        return instance
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_item_tracking = self._item_tracking_values()
+    
+    def _item_tracking_values(self):
+        return {
+            name: self.__dict__.get(self._meta.get_field(name).attname)
+            for name in self.ITEM_TRACKING_FIELDS
+        }
+    
     def save(self, *args, **kwargs):
+        is_new = self.pk is None
+        update_fields = kwargs.get('update_fields')
+        item_tracking = self._item_tracking_values()
         if not self.bulk_tracking_id:
             self.bulk_tracking_id = f"BULK-{uuid.uuid4().hex[:12].upper()}"
+        if not is_new and update_fields is None:
+            # A stale instance must not overwrite counters moved by item transitions
+            skipped = set(self.STATUS_COUNTER_FIELDS.values()) | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped and field.name not in skipped
+            ]
         super().save(*args, **kwargs)
+        saved = self.ITEM_TRACKING_FIELDS if update_fields is None else self.ITEM_TRACKING_FIELDS & set(update_fields)
+        loaded = getattr(self, '_loaded_item_tracking', None)
+        if not is_new and any(loaded is None or loaded.get(name) != item_tracking[name] for name in saved):
+            # Item tracking pages show the upload's sender and payment status
+            self.invalidate_item_tracking()
+        self._loaded_item_tracking = dict(loaded or {}, **{name: item_tracking[name] for name in saved})
+    
+    @classmethod
+    def adjust_status_counters(cls, bulk_upload_id, deltas):
+        """
+        Apply item count changes to one upload's status counters in one UPDATE
+        
+        Args:
+            bulk_upload_id (int): BulkShipmentUpload primary key
+            deltas (dict): Item status -> change in count; statuses without a
+                counter (PENDING, VALID, INVALID) are ignored
+        """
+        updates = {
+            cls.STATUS_COUNTER_FIELDS[item_status]: models.F(cls.STATUS_COUNTER_FIELDS[item_status]) + delta
+            for item_status, delta in deltas.items()
+            if delta and item_status in cls.STATUS_COUNTER_FIELDS
+        }
+        if updates:
+            cls.objects.filter(pk=bulk_upload_id).update(**updates)
+    
+    def recount_status_counters(self):
+        """Rebuild the status counters with one grouped COUNT over the items"""
+        counts = dict(
+            self.shipment_items.filter(status__in=self.STATUS_COUNTER_FIELDS)
+            .order_by()
+            .values_list('status')
+            .annotate(count=models.Count('pk'))
+        )
+        for item_status, field in self.STATUS_COUNTER_FIELDS.items():
+            setattr(self, field, counts.get(item_status, 0))
+        BulkShipmentUpload.objects.filter(pk=self.pk).update(
+            **{field: getattr(self, field) for field in self.STATUS_COUNTER_FIELDS.values()}
+        )
+    
+    def rollup_status(self):
+        """
+        Overall delivery status derived from the status counters
+        
+        Returns:
+            str|None: None while no item has a delivery status yet
+        """
+        counts = {
+            item_status: getattr(self, field)
+            for item_status, field in self.STATUS_COUNTER_FIELDS.items()
+        }
+        if not any(counts.values()):
+            return None
+        if counts["DELIVERED"] == sum(counts.values()):
+            return "DELIVERED"
+        for item_status in ("OUT_FOR_DELIVERY", "IN_TRANSIT", "PICKED_UP"):
+            if counts[item_status]:
+                return item_status
+        return "NOT_PICKED_UP"
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        MerchantDeliveryStats.discard([self.user_id])
+        return result
+    
+    def invalidate_item_tracking(self):
+        """Drop cached tracking pages of every item in this upload"""
+        invalidate_tracking(self.shipment_items.values_list('tracking_id', flat=True))
     
     def __str__(self):
         return f"{self.bulk_tracking_id} - {self.user.email} - {self.total_shipments} shipments"
@@ -436,6 +754,12 @@ class BulkShipmentUpload(models.Model):
         ordering = ['-created_at']
         verbose_name = "Bulk Shipment Upload"
         verbose_name_plural = "Bulk Shipment Uploads"
+        indexes = [
+            # Keyset pagination orderings (see pagination.py)
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['user', '-created_at', '-id']),
+            models.Index(fields=['user', '-updated_at', '-id']),
+        ]
 
 
 
@@ -506,10 +830,60 @@ class BulkShipmentItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so save() can record a change without re-reading the row
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_status = self.__dict__.get('status')
+
     def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        status_saved = update_fields is None or 'status' in update_fields
+        old_status = getattr(self, '_loaded_status', None)
+        if not is_new and old_status is None and status_saved:
+            # Built by hand or loaded without the status column
+            old_status = BulkShipmentItem.objects.filter(pk=self.pk).values_list('status', flat=True).first()
         if not self.tracking_id:
-            self.tracking_id = f"ALX-{uuid.uuid4().hex[:10].upper()}"
+            self.tracking_id = generate_tracking_id()
         super().save(*args, **kwargs)
+        if status_saved:
+            self._loaded_status = self.status
+        if is_new:
+            TrackingRegistry.register(bulk_items=[self])
+            BulkShipmentUpload.adjust_status_counters(self.bulk_upload_id, {self.status: 1})
+            MerchantDeliveryStats.adjust(
+                {self.status: 1}, added=1, user__bulk_shipment_uploads=self.bulk_upload_id
+            )
+            return
+
+        # Create status history entry when status changes
+        if status_saved and old_status and old_status != self.status:
+            BulkShipmentItemStatusHistory.objects.create(
+                item=self,
+                status=self.status,
+                notes=f"Status changed from {old_status} to {self.status}"
+            )
+            BulkShipmentUpload.adjust_status_counters(self.bulk_upload_id, {old_status: -1, self.status: 1})
+            MerchantDeliveryStats.adjust(
+                {old_status: -1, self.status: 1}, user__bulk_shipment_uploads=self.bulk_upload_id
+            )
+            publish_on_commit([
+                status_event(
+                    "bulk_item_status",
+                    self.tracking_id,
+                    self.status,
+                    old_status,
+                    user_id=self.bulk_upload.user_id,
+                    bulk_tracking_id=self.bulk_upload.bulk_tracking_id
+                )
+            ])
+        invalidate_tracking([self.tracking_id])
     
     def __str__(self):
         return f"{self.tracking_id} - {self.receiver_name}"
@@ -518,6 +892,92 @@ class BulkShipmentItem(models.Model):
         ordering = ['row_number']
         verbose_name = "Bulk Shipment Item"
         verbose_name_plural = "Bulk Shipment Items"
+        indexes = [
+            # Per-upload status filters and counts (upload views, status
+            # counters, MerchantDeliveryStats.compute via bulk_upload__user)
+            models.Index(fields=['bulk_upload', 'status']),
+        ]
+
+
+class BulkShipmentItemStatusHistory(models.Model):
+    """Track every status change of a bulk shipment item with timestamp"""
+    item = models.ForeignKey(
+        BulkShipmentItem,
+        on_delete=models.CASCADE,
+        related_name="status_history"
+    )
+    status = models.CharField(max_length=30)
+    timestamp = models.DateTimeField(auto_now_add=True)
+    notes = models.TextField(blank=True, null=True)
+    updated_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="bulk_item_status_updates"
+    )
+
+    def __str__(self):
+        return f"{self.item.tracking_id} - {self.status} at {self.timestamp}"
+
+    class Meta:
+        ordering = ['-timestamp']
+        verbose_name = "Bulk Item Status History"
+        verbose_name_plural = "Bulk Item Status Histories"
+        indexes = [
+            models.Index(fields=['item', 'timestamp']),
+        ]
+
+
+class BulkShipmentJob(models.Model):
+    """Queued background processing of a bulk shipment upload"""
+
+    STATUS_CHOICES = [
+        ("QUEUED", "Queued"),
+        ("RUNNING", "Running"),
+        ("COMPLETED", "Completed"),
+        ("FAILED", "Failed"),
+    ]
+
+    bulk_upload = models.OneToOneField(
+        BulkShipmentUpload,
+        on_delete=models.CASCADE,
+        related_name="job"
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default="QUEUED"
+    )
+
+    # Options the upload was submitted with
+    delivery_speed = models.CharField(max_length=20, default='standard')
+    pickup_address = models.TextField(blank=True, null=True)
+    pickup_contact_name = models.CharField(max_length=100, blank=True, null=True)
+    pickup_contact_phone = models.CharField(max_length=20, blank=True, null=True)
+
+    # Progress
+    rows_processed = models.IntegerField(default=0)
+    attempts = models.IntegerField(default=0)
+    worker_id = models.CharField(max_length=100, blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.bulk_upload.bulk_tracking_id} - {self.status}"
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = "Bulk Shipment Job"
+        verbose_name_plural = "Bulk Shipment Jobs"
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
 
 
 class PickupSchedule(models.Model):
@@ -589,6 +1049,16 @@ class IssueFeedback(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Issue Feedback'
         verbose_name_plural = 'Issue Feedbacks'
+        indexes = [
+            # Keyset pagination ordering (see pagination.py)
+            models.Index(fields=['-created_at', '-id']),
+            # Anonymous feedback lookup in get_user_feedback
+            models.Index(
+                fields=['email', '-created_at'],
+                condition=models.Q(user__isnull=True),
+                name='feedback_anon_email_idx'
+            ),
+        ]
     
     def __str__(self):
         return f" {self.email} - {self.created_at.strftime('%Y-%m-%d')}"
@@ -633,3 +1103,353 @@ class IssueFeedback(models.Model):
 
 
 
+
+
+class GeocodeCacheEntry(models.Model):
+    """Cached geocoding result for a normalized address"""
+
+    # sha256 of the normalized address
+    address_key = models.CharField(max_length=64, unique=True)
+    normalized_address = models.TextField()
+
+    # Null coordinates cache a lookup that found nothing
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+
+    hit_count = models.IntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+    last_used_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def found(self):
+        return self.latitude is not None and self.longitude is not None
+
+    def __str__(self):
+        return self.normalized_address
+
+    class Meta:
+        verbose_name = "Geocode Cache Entry"
+        verbose_name_plural = "Geocode Cache Entries"
+        indexes = [
+            models.Index(fields=['last_used_at']),
+        ]
+
+
+class DistanceMatrixEntry(models.Model):
+    """Cached driving distance between two grid-rounded points"""
+
+    # Grid cells as "<grid>:<lat cell>:<lon cell>"
+    origin_cell = models.CharField(max_length=64)
+    destination_cell = models.CharField(max_length=64)
+    distance_km = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.origin_cell} -> {self.destination_cell}: {self.distance_km}km"
+
+    class Meta:
+        verbose_name = "Distance Matrix Entry"
+        verbose_name_plural = "Distance Matrix Entries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['origin_cell', 'destination_cell'],
+                name='unique_distance_matrix_pair'
+            ),
+        ]
+
+
+class PricingRule(models.Model):
+    """
+    Versioned delivery price list for single or bulk shipments.
+
+    The active rule for a tier is the newest active version whose
+    effective_from has passed; future-dated versions take over on their own.
+    """
+
+    TIER_CHOICES = [
+        ("single", "Single Shipment"),
+        ("bulk", "Bulk Shipment"),
+    ]
+
+    tier = models.CharField(max_length=10, choices=TIER_CHOICES)
+    version = models.PositiveIntegerField(editable=False)
+    effective_from = models.DateTimeField()
+    is_active = models.BooleanField(default=True)
+
+    # Base fees by weight
+    small_base_fee = models.DecimalField(max_digits=10, decimal_places=2)   # 1-5kg
+    medium_base_fee = models.DecimalField(max_digits=10, decimal_places=2)  # 5-15kg
+    large_base_fee = models.DecimalField(max_digits=10, decimal_places=2)   # 15-30kg and 30kg+
+
+    # Speed fees
+    standard_speed_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    express_speed_fee = models.DecimalField(max_digits=10, decimal_places=2)
+    instant_speed_fee = models.DecimalField(max_digits=10, decimal_places=2)
+
+    # Addon fees
+    signature_confirmation_fee = models.DecimalField(max_digits=10, decimal_places=2)
+    fragile_handling_fee = models.DecimalField(max_digits=10, decimal_places=2)
+    oversized_package_fee = models.DecimalField(max_digits=10, decimal_places=2)
+
+    # Distance: free up to free_distance_km, then per_km_rate per km
+    free_distance_km = models.DecimalField(max_digits=6, decimal_places=2, default=5)
+    per_km_rate = models.DecimalField(max_digits=10, decimal_places=2)
+
+    notes = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        if not self.version:
+            latest = PricingRule.objects.filter(tier=self.tier).aggregate(models.Max('version'))['version__max']
+            self.version = (latest or 0) + 1
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.tier} pricing v{self.version} from {self.effective_from:%Y-%m-%d %H:%M}"
+
+    class Meta:
+        ordering = ['tier', '-effective_from', '-version']
+        verbose_name = "Pricing Rule"
+        verbose_name_plural = "Pricing Rules"
+        constraints = [
+            models.UniqueConstraint(fields=['tier', 'version'], name='unique_pricing_rule_version'),
+        ]
+        indexes = [
+            models.Index(fields=['tier', 'is_active', 'effective_from']),
+        ]
+
+
+class TrackingRegistry(models.Model):
+    """
+    Tracking ID index across single and bulk shipments.
+
+    Both PackageDelivery and BulkShipmentItem hand out ``ALX-`` tracking
+    IDs, so the ID alone does not say which table to read. Each shipment
+    gets one row here (exactly one of package / bulk_item is set) and is
+    resolved with a single indexed query. Rows are written on save and by
+    the bulk upload processor; backfill older shipments with
+    ``manage.py backfill_tracking_registry``.
+    """
+
+    tracking_id = models.CharField(max_length=50, unique=True)
+    package = models.OneToOneField(
+        PackageDelivery,
+        on_delete=models.CASCADE,
+        related_name="tracking_entry",
+        null=True,
+        blank=True
+    )
+    bulk_item = models.OneToOneField(
+        BulkShipmentItem,
+        on_delete=models.CASCADE,
+        related_name="tracking_entry",
+        null=True,
+        blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def model_type(self):
+        return "PackageDelivery" if self.package_id else "BulkShipmentItem"
+
+    @property
+    def shipment(self):
+        return self.package if self.package_id else self.bulk_item
+
+    @classmethod
+    def register(cls, packages=(), bulk_items=()):
+        """
+        Add registry rows for saved shipments; existing tracking IDs are left alone
+
+        Args:
+            packages (iterable): PackageDelivery instances
+            bulk_items (iterable): BulkShipmentItem instances
+        """
+        entries = [cls(tracking_id=package.tracking_id, package_id=package.pk) for package in packages]
+
+        bulk_items = list(bulk_items)
+        missing_pk = [item.tracking_id for item in bulk_items if item.pk is None]
+        if missing_pk:
+            # Backends that do not return ids from bulk_create
+            ids = dict(BulkShipmentItem.objects.filter(tracking_id__in=missing_pk).values_list('tracking_id', 'id'))
+        else:
+            ids = {}
+        entries.extend(
+            cls(tracking_id=item.tracking_id, bulk_item_id=item.pk or ids.get(item.tracking_id))
+            for item in bulk_items
+        )
+
+        cls.objects.bulk_create(entries, batch_size=500, ignore_conflicts=True)
+
+    def __str__(self):
+        return f"{self.tracking_id} - {self.model_type}"
+
+    class Meta:
+        verbose_name = "Tracking Registry Entry"
+        verbose_name_plural = "Tracking Registry"
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(package__isnull=False, bulk_item__isnull=True)
+                    | models.Q(package__isnull=True, bulk_item__isnull=False)
+                ),
+                name='tracking_registry_one_shipment',
+            ),
+        ]
+
+
+class MerchantDeliveryStats(models.Model):
+    """
+    Per-user delivery counts for the merchant dashboard.
+
+    Optional (MERCHANT_STATS_TABLE). A user's row is built from the
+    shipment tables the first time their stats are read, then moved with
+    F() updates on every create and status change, so later reads are a
+    primary-key lookup. Deletes drop the row and it is rebuilt on the
+    next read. Counts cover PackageDelivery and BulkShipmentItem.
+    """
+
+    STATUS_COUNTER_FIELDS = {
+        "DELIVERED": "delivered",
+        "OUT_FOR_DELIVERY": "out_for_delivery",
+    }
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="delivery_stats"
+    )
+    active_deliveries = models.IntegerField(default=0)
+    delivered = models.IntegerField(default=0)
+    out_for_delivery = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @staticmethod
+    def enabled():
+        return getattr(settings, 'MERCHANT_STATS_TABLE', False)
+
+    @classmethod
+    def compute(cls, user_id):
+        """
+        Count a user's deliveries with one conditional aggregate per model
+
+        Returns:
+            dict: active_deliveries, delivered, out_for_delivery
+        """
+        counts = {
+            'active_deliveries': models.Count('pk'),
+            'delivered': models.Count('pk', filter=models.Q(status="DELIVERED")),
+            'out_for_delivery': models.Count('pk', filter=models.Q(status="OUT_FOR_DELIVERY")),
+        }
+        packages = PackageDelivery.objects.filter(user_id=user_id).aggregate(**counts)
+        bulk_items = BulkShipmentItem.objects.filter(bulk_upload__user_id=user_id).aggregate(**counts)
+        return {field: packages[field] + bulk_items[field] for field in counts}
+
+    @classmethod
+    def for_user(cls, user_id):
+        """
+        Dashboard counts for a user; from the stats table when it is enabled
+
+        Returns:
+            dict: active_deliveries, delivered, out_for_delivery
+        """
+        if not cls.enabled():
+            return cls.compute(user_id)
+
+        row = cls.objects.filter(pk=user_id).values('active_deliveries', 'delivered', 'out_for_delivery').first()
+        if row is not None:
+            return row
+
+        counts = cls.compute(user_id)
+        # A concurrent first read may have stored the row already; keep that one
+        cls.objects.bulk_create([cls(user_id=user_id, **counts)], ignore_conflicts=True)
+        return counts
+
+    @classmethod
+    def adjust(cls, deltas, added=0, **lookup):
+        """
+        Move the counters of the rows matching ``lookup`` in one UPDATE
+
+        Users without a row are skipped; their row is built on first read.
+
+        Args:
+            deltas (dict): Delivery status -> change in count; statuses
+                without a counter are ignored
+            added (int): Change in the number of deliveries
+            **lookup: Filter selecting the rows, e.g. user_id=...
+        """
+        if not cls.enabled():
+            return
+        updates = {
+            cls.STATUS_COUNTER_FIELDS[delivery_status]: models.F(cls.STATUS_COUNTER_FIELDS[delivery_status]) + delta
+            for delivery_status, delta in deltas.items()
+            if delta and delivery_status in cls.STATUS_COUNTER_FIELDS
+        }
+        if added:
+            updates['active_deliveries'] = models.F('active_deliveries') + added
+        if updates:
+            cls.objects.filter(**lookup).update(**updates)
+
+    @classmethod
+    def discard(cls, user_ids):
+        """Drop stats rows after deletes; they are rebuilt on the next read"""
+        user_ids = [user_id for user_id in user_ids if user_id]
+        if cls.enabled() and user_ids:
+            cls.objects.filter(user_id__in=user_ids).delete()
+
+    def __str__(self):
+        return f"{self.user_id} - {self.active_deliveries} deliveries"
+
+    class Meta:
+        verbose_name = "Merchant Delivery Stats"
+        verbose_name_plural = "Merchant Delivery Stats"
+
+
+class PushOutbox(models.Model):
+    """
+    A push notification waiting to be sent to up to 500 device tokens
+
+    Requests only insert rows; packagemanagerapp.pushoutbox sends them in
+    the background (see manage.py dispatch_push_notifications). Tokens that
+    failed with a temporary error stay in ``tokens`` until the next attempt.
+    """
+
+    STATUS_CHOICES = [
+        ("QUEUED", "Queued"),
+        ("SENDING", "Sending"),
+        ("SENT", "Sent"),
+        ("FAILED", "Failed"),
+    ]
+
+    title = models.CharField(max_length=255)
+    body = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+    tokens = models.JSONField(default=list)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="QUEUED")
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    worker_id = models.CharField(max_length=100, blank=True, null=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    success_count = models.IntegerField(default=0)
+    failure_count = models.IntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.title} - {len(self.tokens)} tokens - {self.status}"
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = "Push Outbox Entry"
+        verbose_name_plural = "Push Outbox"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
@@ -1,17 +1,14 @@
 # your_app/notification_helpers.py
 
-from .models import FCMToken
-from .views import send_push_notification
+from .pushoutbox import enqueue_push_to_users
 
 def notify_user_on_order_placed(user_id, order_id):
     """
-    Send notification when order is placed
+    Queue a notification when order is placed
     """
     try:
-        fcm_token_obj = FCMToken.objects.get(user_id=user_id, is_active=True)
-        
-        result = send_push_notification(
-            fcm_token=fcm_token_obj.token,
+        queued = enqueue_push_to_users(
+            [user_id],
             title="Order Placed Successfully!",
             body=f"Your order #{order_id} has been confirmed",
             data={
@@ -20,11 +17,10 @@ def notify_user_on_order_placed(user_id, order_id):
                 'action': 'view_order'
             }
         )
-        
-        return result['success']
-    except FCMToken.DoesNotExist:
-        print(f"No FCM token for user {user_id}")
-        return False
+
+        if not queued:
+            print(f"No FCM token for user {user_id}")
+        return bool(queued)
     except Exception as e:
         print(f"Error sending notification: {e}")
         return False
@@ -32,13 +28,11 @@ def notify_user_on_order_placed(user_id, order_id):
 
 def notify_user_on_message_received(user_id, sender_name, message_preview):
     """
-    Send notification when user receives a new message
+    Queue a notification when user receives a new message
     """
     try:
-        fcm_token_obj = FCMToken.objects.get(user_id=user_id, is_active=True)
-        
-        result = send_push_notification(
-            fcm_token=fcm_token_obj.token,
+        queued = enqueue_push_to_users(
+            [user_id],
             title=f"New message from {sender_name}",
             body=message_preview,
             data={
@@ -47,11 +41,10 @@ def notify_user_on_message_received(user_id, sender_name, message_preview):
                 'action': 'open_chat'
             }
         )
-        
-        return result['success']
-    except FCMToken.DoesNotExist:
-        print(f"No FCM token for user {user_id}")
-        return False
+
+        if not queued:
+            print(f"No FCM token for user {user_id}")
+        return bool(queued)
     except Exception as e:
         print(f"Error sending notification: {e}")
-        return False
\ No newline at end of file
+        return False
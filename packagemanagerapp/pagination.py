@@ -0,0 +1,143 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from drf_yasg import openapi
+
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_MAX_PAGE_SIZE = 200
+
+
+# Query parameters accepted by every paginated list endpoint
+PAGINATION_PARAMETERS = [
+    openapi.Parameter(
+        'cursor',
+        openapi.IN_QUERY,
+        description="Opaque cursor from the previous page's next_cursor",
+        type=openapi.TYPE_STRING,
+        required=False
+    ),
+    openapi.Parameter(
+        'page_size',
+        openapi.IN_QUERY,
+        description="Rows per page",
+        type=openapi.TYPE_INTEGER,
+        required=False
+    ),
+]
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def _page_size(request):
+    default = int(getattr(settings, 'PAGINATION_PAGE_SIZE', DEFAULT_PAGE_SIZE))
+    maximum = int(getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', DEFAULT_MAX_PAGE_SIZE))
+    try:
+        page_size = int(request.GET.get('page_size', default))
+    except (TypeError, ValueError):
+        page_size = default
+    return max(1, min(page_size, maximum))
+
+
+def encode_cursor(values):
+    """Opaque cursor for the ordering values of the last row on a page"""
+    # Full isoformat; DjangoJSONEncoder would drop the microseconds
+    values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+    body = json.dumps(values, separators=(',', ':'))
+    return base64.urlsafe_b64encode(body.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, model, ordering):
+    """
+    Ordering values stored in ``cursor``, converted to Python values
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or was made for another ordering
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise InvalidCursor("Invalid cursor")
+
+    try:
+        return [
+            model._meta.get_field(field.lstrip('-')).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except ValidationError as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def _after(ordering, values):
+    """Filter matching the rows that sort after ``values`` under ``ordering``"""
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+
+    # Redundant bound on the leading column lets the database start an index
+    # range scan at the cursor instead of filtering the OR row by row
+    first = ordering[0]
+    bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+    return bound & condition
+
+
+def paginate_queryset(request, queryset, ordering=('-created_at', '-id')):
+    """
+    Return one keyset (cursor) page of ``queryset``
+
+    Rows are read in ``ordering``, which must end with a unique column and
+    should match an index, so every page costs the same however deep it is.
+    The client passes back ``next_cursor`` as ``?cursor=`` to get the next
+    page; ``?page_size=`` is capped at PAGINATION_MAX_PAGE_SIZE. Ordering
+    columns must not be nullable. ``queryset`` may be a values() projection
+    as long as it selects the ordering columns.
+
+    Args:
+        request: DRF/Django request carrying ``cursor`` and ``page_size``
+        queryset (QuerySet): Rows (model instances or values() dicts) to page through
+        ordering (tuple): Ordering fields, e.g. ('-created_at', '-id')
+
+    Returns:
+        tuple: (rows: list, pagination: dict with next_cursor, has_more, page_size)
+
+    Raises:
+        InvalidCursor: If ``cursor`` is malformed
+    """
+    page_size = _page_size(request)
+    queryset = queryset.order_by(*ordering)
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        queryset = queryset.filter(_after(ordering, decode_cursor(cursor, queryset.model, ordering)))
+
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        if isinstance(last, dict):
+            values = [last[field.lstrip('-')] for field in ordering]
+        else:
+            values = [getattr(last, field.lstrip('-')) for field in ordering]
+        next_cursor = encode_cursor(values)
+
+    return rows, {
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+        "page_size": page_size,
+    }
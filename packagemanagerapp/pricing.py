@@ -0,0 +1,311 @@
+from collections import namedtuple
+from decimal import Decimal
+import hashlib
+import logging
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from packagemanagerapp.models import PricingRule
+
+logger = logging.getLogger(__name__)
+
+WEIGHT_RANGES = ['1-5kg', '5-15kg', '15-30kg', '30kg+']
+SPEEDS = ['standard', 'express', 'instant']
+
+# Bit order of the addon bitmask
+ADDONS = ['signature_confirmation', 'fragile_handling', 'oversized_package']
+ADDON_BITS = {name: 1 << bit for bit, name in enumerate(ADDONS)}
+OVERSIZED_BIT = ADDON_BITS['oversized_package']
+
+# Weight ranges the calculators have always priced as oversized; anything
+# unrecognised is treated the same way
+OVERSIZED_WEIGHT = '30kg+'
+
+DEFAULT_CHECK_INTERVAL = 30
+
+# Used only if the pricing table is missing or has no active rule
+FALLBACK_PRICING = {
+    'single': {
+        'small_base_fee': Decimal('7.99'),
+        'medium_base_fee': Decimal('11.99'),
+        'large_base_fee': Decimal('17.99'),
+    },
+    'bulk': {
+        'small_base_fee': Decimal('5.99'),
+        'medium_base_fee': Decimal('9.99'),
+        'large_base_fee': Decimal('15.99'),
+    },
+}
+FALLBACK_SHARED_PRICING = {
+    'standard_speed_fee': Decimal('0.00'),
+    'express_speed_fee': Decimal('4.99'),
+    'instant_speed_fee': Decimal('6.99'),
+    'signature_confirmation_fee': Decimal('1.50'),
+    'fragile_handling_fee': Decimal('2.50'),
+    'oversized_package_fee': Decimal('8.00'),
+    'free_distance_km': Decimal('5.00'),
+    'per_km_rate': Decimal('0.90'),
+}
+
+PriceEntry = namedtuple('PriceEntry', ['base_fee', 'speed_fee', 'addons_fee', 'fixed_fee', 'applied_addons'])
+
+
+class CompiledPricing:
+    """
+    Immutable price table compiled from one PricingRule.
+
+    Every (weight_range, speed, addon bitmask) combination is priced up
+    front, so pricing a shipment is a single dict lookup plus the distance
+    fee. Unknown weight ranges price as oversized and unknown speeds carry
+    no speed fee, as the calculators always did.
+    """
+
+    __slots__ = (
+        'tier', 'version', 'fingerprint', 'valid_until', 'free_distance_km', 'per_km_rate',
+        'base_fees', 'speed_fees', 'addon_prices', 'entries',
+    )
+
+    def __init__(self, tier, version, values, valid_until=None):
+        object.__setattr__(self, 'tier', tier)
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'valid_until', valid_until)
+        # Identifies the prices themselves (an edited rule keeps its version),
+        # e.g. for keying cached quotes; stable across processes
+        signature = '|'.join([tier, str(version)] + [f'{key}={values[key]}' for key in sorted(values)])
+        object.__setattr__(self, 'fingerprint', hashlib.sha256(signature.encode('utf-8')).hexdigest()[:16])
+        object.__setattr__(self, 'free_distance_km', float(values['free_distance_km']))
+        object.__setattr__(self, 'per_km_rate', values['per_km_rate'])
+
+        base_fees = {
+            'small': values['small_base_fee'],
+            'medium': values['medium_base_fee'],
+            'large': values['large_base_fee'],
+        }
+        speed_fees = {speed: values[f'{speed}_speed_fee'] for speed in SPEEDS}
+        addon_prices = {name: values[f'{name}_fee'] for name in ADDONS}
+
+        weight_base = {
+            '1-5kg': base_fees['small'],
+            '5-15kg': base_fees['medium'],
+            '15-30kg': base_fees['large'],
+            OVERSIZED_WEIGHT: base_fees['large'],
+        }
+
+        entries = {}
+        for weight_range, base_fee in weight_base.items():
+            for speed in SPEEDS + [None]:
+                speed_fee = speed_fees.get(speed, Decimal('0.00'))
+                for mask in range(1 << len(ADDONS)):
+                    if weight_range == OVERSIZED_WEIGHT:
+                        mask_charged = mask | OVERSIZED_BIT
+                    else:
+                        mask_charged = mask
+                    applied = tuple(name for name in ADDONS if mask_charged & ADDON_BITS[name])
+                    addons_fee = sum((addon_prices[name] for name in applied), Decimal('0.00'))
+                    entries[(weight_range, speed, mask)] = PriceEntry(
+                        base_fee,
+                        speed_fee,
+                        addons_fee,
+                        base_fee + speed_fee + addons_fee,
+                        applied,
+                    )
+
+        object.__setattr__(self, 'base_fees', MappingProxyType(base_fees))
+        object.__setattr__(self, 'speed_fees', MappingProxyType(speed_fees))
+        object.__setattr__(self, 'addon_prices', MappingProxyType(addon_prices))
+        object.__setattr__(self, 'entries', MappingProxyType(entries))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledPricing is immutable")
+
+    @staticmethod
+    def addon_mask(addons):
+        """Bitmask for a list of addon names ('Fragile Handling' and 'fragile_handling' both match)"""
+        mask = 0
+        for addon in addons or []:
+            mask |= ADDON_BITS.get(addon.lower().replace(' ', '_'), 0)
+        return mask
+
+    def lookup(self, package_weight, delivery_speed, mask):
+        """
+        Fixed part of the price for one shipment
+
+        Args:
+            package_weight (str): Weight range (e.g., '1-5kg')
+            delivery_speed (str): Delivery speed (any case)
+            mask (int): Addon bitmask (see addon_mask)
+
+        Returns:
+            PriceEntry: base, speed and addon fees and the applied addons
+        """
+        weight_range = package_weight if package_weight in WEIGHT_RANGES else OVERSIZED_WEIGHT
+        speed = delivery_speed.lower() if delivery_speed else 'standard'
+        if speed not in self.speed_fees:
+            speed = None
+        return self.entries[(weight_range, speed, mask)]
+
+    def distance_fee(self, distance_km):
+        """Unrounded distance fee: free up to free_distance_km, then per_km_rate per km"""
+        if distance_km > self.free_distance_km:
+            extra_km = distance_km - self.free_distance_km
+            return Decimal(str(extra_km)) * self.per_km_rate
+        return Decimal('0.00')
+
+    def fee_breakdown(self, distance_km, package_weight, delivery_speed, addons=None):
+        """
+        Price one shipment
+
+        Args:
+            distance_km (float): Distance in kilometers
+            package_weight (str): Weight range (e.g., '1-5kg')
+            delivery_speed (str): Delivery speed ('standard', 'express', 'instant')
+            addons (list): Addon names (optional); an addon listed twice is
+                charged twice, as the calculators always did
+
+        Returns:
+            dict: base_fee, distance_fee, speed_fee, addons_fee and total_fee
+            rounded to cents, plus applied_addons
+        """
+        applied_addons = []
+        mask = 0
+        # Repeats are not in the compiled table
+        repeated_fee = Decimal('0.00')
+        for addon in addons or []:
+            name = addon.lower().replace(' ', '_')
+            bit = ADDON_BITS.get(name, 0)
+            if not bit:
+                continue
+            if mask & bit:
+                repeated_fee += self.addon_prices[name]
+            mask |= bit
+            applied_addons.append(addon)
+
+        entry = self.lookup(package_weight, delivery_speed, mask)
+        if 'oversized_package' in entry.applied_addons and not mask & OVERSIZED_BIT:
+            applied_addons.append('oversized_package')
+
+        distance_fee = self.distance_fee(distance_km)
+        return {
+            'base_fee': round(entry.base_fee, 2),
+            'distance_fee': round(distance_fee, 2),
+            'speed_fee': round(entry.speed_fee, 2),
+            'addons_fee': round(entry.addons_fee + repeated_fee, 2),
+            'total_fee': round(entry.fixed_fee + repeated_fee + distance_fee, 2),
+            'applied_addons': applied_addons,
+        }
+
+
+def _rule_values(rule):
+    fields = list(FALLBACK_SHARED_PRICING) + ['small_base_fee', 'medium_base_fee', 'large_base_fee']
+    return {field: getattr(rule, field) for field in fields}
+
+
+def compile_pricing(tier, now=None):
+    """
+    Compile the rule in effect for ``tier`` at ``now``
+
+    Returns:
+        CompiledPricing: The compiled table; valid_until is set to the
+        effective_from of the next scheduled version, if any
+    """
+    now = now or timezone.now()
+    rules = PricingRule.objects.filter(tier=tier, is_active=True)
+    rule = rules.filter(effective_from__lte=now).order_by('-effective_from', '-version').first()
+    next_change = rules.filter(effective_from__gt=now).order_by('effective_from').values_list(
+        'effective_from', flat=True
+    ).first()
+
+    if rule is None:
+        logger.warning(f"No active {tier} pricing rule, using built-in prices")
+        values = dict(FALLBACK_SHARED_PRICING, **FALLBACK_PRICING[tier])
+        return CompiledPricing(tier, 0, values, valid_until=next_change)
+
+    return CompiledPricing(tier, rule.version, _rule_values(rule), valid_until=next_change)
+
+
+class PricingCache:
+    """
+    Process-wide compiled pricing, refreshed through a version stamp.
+
+    The stamp (row count and latest updated_at of PricingRule) is read at
+    most once every PRICING_CHECK_INTERVAL seconds, so a rule saved by any
+    worker is picked up by every other worker within that interval without
+    a database read per request. Tables are also recompiled when a
+    future-dated rule becomes effective.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables = MappingProxyType({})
+        self._stamp = None
+        self._checked_at = None
+
+    def _interval(self):
+        return float(getattr(settings, 'PRICING_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL))
+
+    def _read_stamp(self):
+        return tuple(PricingRule.objects.aggregate(
+            count=Count('id'),
+            updated=Max('updated_at'),
+        ).values())
+
+    def _expired(self, tables):
+        now = timezone.now()
+        return any(table.valid_until and table.valid_until <= now for table in tables.values())
+
+    def get(self, tier):
+        """Compiled pricing for 'single' or 'bulk'"""
+        tables = self._tables
+        checked_at = self._checked_at
+        if (
+            tier not in tables
+            or checked_at is None
+            or time.monotonic() - checked_at >= self._interval()
+            or self._expired(tables)
+        ):
+            tables = self._refresh(tier)
+        return tables[tier]
+
+    def _refresh(self, tier):
+        with self._lock:
+            try:
+                stamp = self._read_stamp()
+                if stamp != self._stamp or self._expired(self._tables):
+                    tables = {name: compile_pricing(name) for name in set(self._tables) | {tier}}
+                else:
+                    tables = dict(self._tables)
+                    if tier not in tables:
+                        tables[tier] = compile_pricing(tier)
+            except DatabaseError as e:
+                # Table missing (e.g. before migrate): price from built-in values
+                logger.error(f"Could not load pricing rules: {str(e)}")
+                stamp = None
+                tables = dict(self._tables)
+                values = dict(FALLBACK_SHARED_PRICING, **FALLBACK_PRICING[tier])
+                tables.setdefault(tier, CompiledPricing(tier, 0, values))
+
+            self._stamp = stamp
+            self._tables = MappingProxyType(tables)
+            self._checked_at = time.monotonic()
+            return self._tables
+
+    def invalidate(self):
+        """Force a recompile on the next lookup in this process"""
+        with self._lock:
+            self._tables = MappingProxyType({})
+            self._stamp = None
+            self._checked_at = None
+
+
+pricing_cache = PricingCache()
+
+
+def get_pricing(tier):
+    """Compiled pricing currently in effect for 'single' or 'bulk'"""
+    return pricing_cache.get(tier)
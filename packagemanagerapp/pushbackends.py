@@ -0,0 +1,115 @@
+import time
+
+from django.conf import settings
+
+
+class MulticastResult:
+    """
+    Outcome of one multicast send
+
+    Attributes:
+        success_count (int): Tokens the message was delivered to
+        dead_tokens (list): Tokens that will never work again (unregistered,
+            malformed or belonging to another sender)
+        retry_tokens (list): Tokens that failed with a temporary error
+        error (str): Last error seen, if any
+    """
+
+    def __init__(self, success_count=0, dead_tokens=None, retry_tokens=None, error=None):
+        self.success_count = success_count
+        self.dead_tokens = dead_tokens or []
+        self.retry_tokens = retry_tokens or []
+        self.error = error
+
+
+class FirebasePushBackend:
+    """Sends through firebase_admin, one HTTP batch per multicast"""
+
+    def _message(self, messaging, tokens, title, body, data):
+        return messaging.MulticastMessage(
+            notification=messaging.Notification(
+                title=title,
+                body=body,
+            ),
+            # FCM only accepts string values in the data payload
+            data={str(key): str(value) for key, value in (data or {}).items()},
+            tokens=tokens,
+            apns=messaging.APNSConfig(
+                payload=messaging.APNSPayload(
+                    aps=messaging.Aps(
+                        sound='default',
+                        badge=1,
+                    )
+                )
+            ),
+            android=messaging.AndroidConfig(
+                priority='high',
+                notification=messaging.AndroidNotification(
+                    sound='default',
+                    priority='high',
+                )
+            )
+        )
+
+    def send_multicast(self, tokens, title, body, data=None):
+        from firebase_admin import exceptions
+
+        from packagemanagerapp.firebase_config import get_messaging
+
+        messaging = get_messaging()
+        dead_errors = (
+            messaging.UnregisteredError,
+            messaging.SenderIdMismatchError,
+            exceptions.InvalidArgumentError,
+            exceptions.NotFoundError,
+        )
+
+        batch = messaging.send_each_for_multicast(self._message(messaging, tokens, title, body, data))
+
+        result = MulticastResult()
+        for token, response in zip(tokens, batch.responses):
+            if response.success:
+                result.success_count += 1
+            elif isinstance(response.exception, dead_errors):
+                result.dead_tokens.append(token)
+            else:
+                result.retry_tokens.append(token)
+                result.error = str(response.exception)
+        return result
+
+
+class FakePushBackend:
+    """
+    Offline push backend for local development, tests and benchmarks
+
+    Each multicast takes ``latency`` seconds, like one FCM batch request.
+    Tokens starting with "dead-" are reported as unregistered and tokens
+    starting with "flaky-" fail with a temporary error.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.sent = []
+
+    def send_multicast(self, tokens, title, body, data=None):
+        if self.latency:
+            time.sleep(self.latency)
+
+        result = MulticastResult()
+        for token in tokens:
+            if token.startswith('dead-'):
+                result.dead_tokens.append(token)
+            elif token.startswith('flaky-'):
+                result.retry_tokens.append(token)
+                result.error = "Service unavailable"
+            else:
+                result.success_count += 1
+                self.sent.append((token, title))
+        return result
+
+
+def build_push_backend():
+    """Build the push backend selected by PUSH_BACKEND ('firebase' or 'fake')"""
+    if getattr(settings, 'PUSH_BACKEND', 'firebase') == 'fake':
+        return FakePushBackend(latency=float(getattr(settings, 'PUSH_FAKE_LATENCY', 0.0)))
+    return FirebasePushBackend()
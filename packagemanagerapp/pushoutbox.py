@@ -0,0 +1,246 @@
+from datetime import timedelta
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from packagemanagerapp.models import FCMToken, PushOutbox
+from packagemanagerapp.pushbackends import MulticastResult, build_push_backend
+
+logger = logging.getLogger(__name__)
+
+# FCM accepts at most this many tokens per multicast
+MULTICAST_LIMIT = 500
+
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Seconds before the first retry; doubles on every attempt up to the maximum
+DEFAULT_RETRY_DELAY = 30
+DEFAULT_MAX_RETRY_DELAY = 3600
+
+# Outbox rows claimed by a dispatcher that has not finished them in this long are requeued
+DEFAULT_STALE_SECONDS = 300
+
+DEFAULT_CLAIM_SIZE = 20
+
+DEFAULT_POLL_INTERVAL = 2
+
+# Device tokens not registered again for this long are deleted
+DEFAULT_TOKEN_STALE_DAYS = 60
+
+
+def enqueue_push(tokens, title, body, data=None):
+    """
+    Queue a push notification for background sending
+
+    Tokens are split into outbox rows of MULTICAST_LIMIT, written with one
+    bulk INSERT.
+
+    Args:
+        tokens (iterable): FCM device tokens (duplicates are dropped)
+        title (str): Notification title
+        body (str): Notification body
+        data (dict): Custom data payload (optional)
+
+    Returns:
+        int: Number of tokens queued
+    """
+    tokens = list(dict.fromkeys(tokens))
+    PushOutbox.objects.bulk_create([
+        PushOutbox(title=title, body=body, data=data or {}, tokens=tokens[start:start + MULTICAST_LIMIT])
+        for start in range(0, len(tokens), MULTICAST_LIMIT)
+    ])
+    return len(tokens)
+
+
+def enqueue_push_to_users(user_ids, title, body, data=None):
+    """
+    Queue a push notification to every active device of ``user_ids``
+
+    All tokens are read in one query on the (user, is_active) index and
+    fanned out into multicast batches by enqueue_push().
+
+    Returns:
+        int: Number of tokens queued (0 when none of the users has an active token)
+    """
+    tokens = (
+        FCMToken.objects.filter(user_id__in=list(user_ids), is_active=True)
+        .order_by()
+        .values_list('token', flat=True)
+    )
+    return enqueue_push(tokens, title, body, data)
+
+
+def prune_device_tokens(stale_days=None):
+    """
+    Delete deactivated tokens and tokens not registered for FCM_TOKEN_STALE_DAYS
+
+    Returns:
+        int: Number of tokens deleted
+    """
+    stale_days = stale_days or int(getattr(settings, 'FCM_TOKEN_STALE_DAYS', DEFAULT_TOKEN_STALE_DAYS))
+    cutoff = timezone.now() - timedelta(days=stale_days)
+    deleted, _ = FCMToken.objects.filter(Q(is_active=False) | Q(last_seen_at__lt=cutoff)).delete()
+    if deleted:
+        logger.info(f"Pruned {deleted} device tokens")
+    return deleted
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next try after ``attempts`` failed attempts"""
+    base = float(getattr(settings, 'PUSH_RETRY_DELAY', DEFAULT_RETRY_DELAY))
+    maximum = float(getattr(settings, 'PUSH_MAX_RETRY_DELAY', DEFAULT_MAX_RETRY_DELAY))
+    return min(base * 2 ** max(attempts - 1, 0), maximum)
+
+
+def claim_outbox(worker_id, limit=DEFAULT_CLAIM_SIZE):
+    """
+    Atomically claim up to ``limit`` outbox rows that are due
+
+    Rows are claimed with one conditional UPDATE on their status under a
+    claim id unique to this call, so racing dispatchers never get the same
+    row.
+
+    Returns:
+        list: Claimed PushOutbox rows
+    """
+    now = timezone.now()
+    candidates = list(
+        PushOutbox.objects.filter(status="QUEUED", next_attempt_at__lte=now)
+        .order_by('next_attempt_at')
+        .values_list('pk', flat=True)[:limit]
+    )
+    if not candidates:
+        return []
+
+    claim_id = f"{worker_id}:{uuid.uuid4().hex[:8]}"
+    PushOutbox.objects.filter(pk__in=candidates, status="QUEUED").update(
+        status="SENDING",
+        worker_id=claim_id,
+        claimed_at=now,
+        attempts=F('attempts') + 1,
+        updated_at=now,
+    )
+    return list(PushOutbox.objects.filter(worker_id=claim_id, status="SENDING"))
+
+
+def requeue_stale_outbox():
+    """
+    Put back rows whose dispatcher stopped before finishing them
+
+    Returns:
+        int: Number of rows requeued
+    """
+    stale_seconds = int(getattr(settings, 'PUSH_STALE_SECONDS', DEFAULT_STALE_SECONDS))
+    cutoff = timezone.now() - timedelta(seconds=stale_seconds)
+    requeued = PushOutbox.objects.filter(status="SENDING", claimed_at__lt=cutoff).update(
+        status="QUEUED",
+        worker_id=None,
+        updated_at=timezone.now(),
+    )
+    if requeued:
+        logger.warning(f"Requeued {requeued} stale push outbox rows")
+    return requeued
+
+
+def dispatch_outbox(rows, backend=None):
+    """
+    Send claimed outbox rows and record the outcome
+
+    Each row is one multicast. Delivered rows become SENT. Tokens that
+    failed with a temporary error are kept on the row and retried after
+    retry_delay(); after PUSH_MAX_ATTEMPTS the row is FAILED. Dead tokens
+    from all rows are deactivated with one UPDATE.
+
+    Returns:
+        dict: success_count, failure_count, retry_count and dead_count
+    """
+    backend = backend or build_push_backend()
+    max_attempts = int(getattr(settings, 'PUSH_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+    totals = {"success_count": 0, "failure_count": 0, "retry_count": 0, "dead_count": 0}
+    dead_tokens = []
+
+    for row in rows:
+        try:
+            result = backend.send_multicast(row.tokens, row.title, row.body, row.data)
+        except Exception as e:
+            logger.warning(f"Push outbox {row.pk} send failed: {str(e)}")
+            result = MulticastResult(retry_tokens=list(row.tokens), error=str(e))
+
+        dead_tokens.extend(result.dead_tokens)
+        now = timezone.now()
+        updates = {
+            "success_count": F('success_count') + result.success_count,
+            "failure_count": F('failure_count') + len(result.dead_tokens),
+            "worker_id": None,
+            "error": result.error,
+            "updated_at": now,
+        }
+
+        if not result.retry_tokens:
+            updates.update(status="SENT", sent_at=now)
+        elif row.attempts >= max_attempts:
+            updates.update(status="FAILED", failure_count=updates["failure_count"] + len(result.retry_tokens))
+            totals["failure_count"] += len(result.retry_tokens)
+        else:
+            updates.update(
+                status="QUEUED",
+                tokens=result.retry_tokens,
+                next_attempt_at=now + timedelta(seconds=retry_delay(row.attempts)),
+            )
+            totals["retry_count"] += len(result.retry_tokens)
+
+        PushOutbox.objects.filter(pk=row.pk).update(**updates)
+        totals["success_count"] += result.success_count
+        totals["failure_count"] += len(result.dead_tokens)
+
+    if dead_tokens:
+        totals["dead_count"] = FCMToken.objects.filter(token__in=dead_tokens, is_active=True).update(is_active=False)
+
+    return totals
+
+
+def run_dispatcher(worker_id=None, stop_event=None, poll_interval=DEFAULT_POLL_INTERVAL, once=False, backend=None):
+    """
+    Send queued push notifications until stopped
+
+    Args:
+        worker_id (str): Name recorded on claimed rows
+        stop_event (threading.Event): Set to stop the dispatcher
+        poll_interval (float): Seconds to wait when nothing is due
+        once (bool): Return as soon as nothing is due
+        backend: Push backend (defaults to build_push_backend())
+
+    Returns:
+        int: Number of outbox rows processed
+    """
+    worker_id = worker_id or f"push-{uuid.uuid4().hex[:8]}"
+    stop_event = stop_event or threading.Event()
+    backend = backend or build_push_backend()
+    processed = 0
+
+    try:
+        while not stop_event.is_set():
+            close_old_connections()
+            rows = claim_outbox(worker_id)
+
+            if not rows:
+                if once:
+                    break
+                stop_event.wait(poll_interval)
+                continue
+
+            totals = dispatch_outbox(rows, backend)
+            processed += len(rows)
+            logger.info(
+                f"{worker_id} sent {len(rows)} push batches: {totals['success_count']} delivered, "
+                f"{totals['retry_count']} to retry, {totals['dead_count']} tokens deactivated"
+            )
+    finally:
+        connection.close()
+
+    return processed
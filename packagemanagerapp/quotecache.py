@@ -0,0 +1,157 @@
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from packagemanagerapp.geocoding import normalize_address
+from packagemanagerapp.pricing import get_pricing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_CACHE_ALIAS = 'default'
+KEY_PREFIX = 'delivery-quote'
+
+# Log a hit ratio / latency summary every this many lookups
+STATS_LOG_EVERY = 500
+
+
+class QuoteCache:
+    """
+    Short-lived cache of get_delivery_quote results.
+
+    Quotes are keyed on the normalized addresses and speed, the weight and
+    addon list as given, plus the fingerprint of the pricing in effect, so a
+    pricing change never serves an old price; stale entries simply expire.
+    Only successful quotes are stored. Hit/miss counters and latency are
+    kept per process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'hit_seconds': 0.0,
+            'miss_seconds': 0.0,
+        }
+
+    def _ttl(self):
+        return int(getattr(settings, 'QUOTE_CACHE_TTL', DEFAULT_TTL_SECONDS))
+
+    def _backend(self):
+        return caches[getattr(settings, 'QUOTE_CACHE_ALIAS', DEFAULT_CACHE_ALIAS)]
+
+    @staticmethod
+    def normalize_speed(delivery_speed):
+        """Delivery speed as quotes are computed and cached ('Express' -> 'express')"""
+        return (delivery_speed or 'standard').strip().lower()
+
+    def make_key(self, pricing, pickup_address, delivery_address, package_weight, delivery_speed, addons):
+        """Cache key for one quote request under ``pricing``"""
+        # Weight and addons are echoed back in the quote (applied_addons
+        # keeps the caller's spelling), so they are keyed as given
+        parts = [
+            normalize_address(pickup_address),
+            normalize_address(delivery_address),
+            str(package_weight),
+            self.normalize_speed(delivery_speed),
+            ','.join(addons or []),
+        ]
+        digest = hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+        return f"{KEY_PREFIX}:{pricing.tier}:{pricing.fingerprint}:{digest}"
+
+    def _record(self, hit, seconds):
+        with self._lock:
+            if hit:
+                self._stats['hits'] += 1
+                self._stats['hit_seconds'] += seconds
+            else:
+                self._stats['misses'] += 1
+                self._stats['miss_seconds'] += seconds
+            lookups = self._stats['hits'] + self._stats['misses']
+        if lookups % STATS_LOG_EVERY == 0:
+            logger.info(f"Quote cache stats: {self.get_stats()}")
+
+    def get_quote(self, calculator, pickup_address, delivery_address, package_weight, delivery_speed, addons=None):
+        """
+        Return calculator.get_delivery_quote(...), served from cache when possible
+
+        Args:
+            calculator: DeliveryFeeCalculator (or anything with the same
+                get_delivery_quote signature and pricing_tier)
+            pickup_address (str): Pickup location address
+            delivery_address (str): Delivery location address
+            package_weight: Weight as passed to the calculator
+            delivery_speed (str): Delivery speed
+            addons (list): Addon names (optional)
+
+        Returns:
+            dict: The quote result, as returned by get_delivery_quote
+        """
+        if addons is None:
+            addons = []
+        # Quotes echo the speed back; callers sharing an entry must see the same one
+        delivery_speed = self.normalize_speed(delivery_speed)
+
+        ttl = self._ttl()
+        if ttl <= 0:
+            return calculator.get_delivery_quote(
+                pickup_address, delivery_address, package_weight, delivery_speed, addons
+            )
+
+        start = time.perf_counter()
+        pricing = get_pricing(calculator.pricing_tier)
+        key = self.make_key(pricing, pickup_address, delivery_address, package_weight, delivery_speed, addons)
+
+        backend = self._backend()
+        try:
+            result = backend.get(key)
+        except Exception as e:
+            # A cache outage must not break quoting
+            logger.warning(f"Quote cache read failed: {str(e)}")
+            result = None
+
+        if result is not None:
+            self._record(True, time.perf_counter() - start)
+            return result
+
+        result = calculator.get_delivery_quote(
+            pickup_address, delivery_address, package_weight, delivery_speed, addons
+        )
+        if result.get('success'):
+            try:
+                backend.set(key, result, ttl)
+            except Exception as e:
+                logger.warning(f"Quote cache write failed: {str(e)}")
+
+        self._record(False, time.perf_counter() - start)
+        return result
+
+    def get_stats(self):
+        """Return hit/miss counters, hit ratio and average latency (ms) for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+
+        hits, misses = stats['hits'], stats['misses']
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'lookups': lookups,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            'avg_hit_ms': round(stats['hit_seconds'] * 1000 / hits, 3) if hits else None,
+            'avg_miss_ms': round(stats['miss_seconds'] * 1000 / misses, 3) if misses else None,
+        }
+
+    def reset_stats(self):
+        """Reset counters for this process"""
+        with self._lock:
+            for key in self._stats:
+                self._stats[key] = 0
+
+
+quote_cache = QuoteCache()
@@ -1,4 +1,5 @@
 # logistics/serializers.py
+from django.db.models import Prefetch
 from rest_framework import serializers
 
 from onboarding.models import MerchantAddress, MerchantProfile
@@ -541,9 +542,12 @@ class BulkShipmentItemDetailSerializer(serializers.ModelSerializer):
         return stage_map.get(obj.status, 0)
 
     def get_events(self, obj):
-        """Return status history - bulk items may not have status history"""
-        # If you have a status history for bulk items, implement it here
-        # For now, return a single event
+        """Get all status history as events"""
+        history = obj.status_history.all().order_by('-timestamp')
+        if history:
+            return DeliveryStatusHistorySerializer(history, many=True).data
+
+        # Items that have not changed status since upload have no history yet
         return [{
             "status": obj.status,
             "notes": f"Bulk shipment item - Row {obj.row_number}",
@@ -806,29 +810,37 @@ class PackageDeliveryHistorySerializer(serializers.ModelSerializer):
         """Return description of the shipment"""
         return f"Shipment {obj.tracking_id} created, awaiting pickup"
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Prefetch the status history timeline, oldest first, in one query"""
+        return queryset.prefetch_related(
+            Prefetch('status_history', queryset=DeliveryStatusHistory.objects.order_by('timestamp'))
+        )
+
     def get_status_history(self, obj):
         """
         Return complete status history timeline for this delivery.
         This shows all status changes from creation to current state.
+        
+        Uses the history loaded by setup_eager_loading() when present.
         """
-        try:
-            history = DeliveryStatusHistory.objects.filter(
-                delivery=obj
-            ).order_by('created_at')
-            
-            history_data = []
-            for entry in history:
-                history_data.append({
-                    'date': self._format_date(entry.created_at),
-                    'status': self._get_status_display(entry.status),
-                    'status_code': entry.status,
-                    'notes': entry.notes or "",
-                    'timestamp': entry.created_at.isoformat(),
-                })
-            
-            return history_data
-        except:
-            # If DeliveryStatusHistory doesn't exist or there's an error
+        if 'status_history' in getattr(obj, '_prefetched_objects_cache', {}):
+            history = obj.status_history.all()
+        else:
+            history = obj.status_history.order_by('timestamp')
+        
+        history_data = []
+        for entry in history:
+            history_data.append({
+                'date': self._format_date(entry.timestamp),
+                'status': self._get_status_display(entry.status),
+                'status_code': entry.status,
+                'notes': entry.notes or "",
+                'timestamp': entry.timestamp.isoformat(),
+            })
+        
+        if not history_data:
+            # Deliveries created before status history was recorded
             return [{
                 'date': self.get_date(obj),
                 'status': self.get_current_status(obj),
@@ -836,6 +848,8 @@ class PackageDeliveryHistorySerializer(serializers.ModelSerializer):
                 'notes': f"Initial status: {self.get_current_status(obj)}",
                 'timestamp': obj.created_at.isoformat(),
             }]
+        
+        return history_data
 
 
 
@@ -990,6 +1004,13 @@ class MerchantNotificationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class BulkNotificationCreateSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+    category = serializers.ChoiceField(choices=MerchantNotification.CATEGORY_CHOICES)
+    title = serializers.CharField(max_length=200)
+    message = serializers.CharField()
+
+
 
 from rest_framework import serializers
 from .models import BulkShipmentUpload, BulkShipmentItem
@@ -1129,6 +1150,7 @@ class BulkShipmentUploadCreateSerializer(serializers.Serializer):
         choices=['standard', 'express', 'instant'],
         default='standard'
     )
+    process_async = serializers.BooleanField(required=False, default=False)
     
     def validate_csv_file(self, value):
         """Validate CSV file"""
@@ -0,0 +1,233 @@
+import logging
+
+from django.db import connections, models, transaction
+from django.db.models import F, QuerySet, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from packagemanagerapp.models import (
+    BulkShipmentItem,
+    BulkShipmentItemStatusHistory,
+    BulkShipmentUpload,
+    DeliveryStatusHistory,
+    MerchantDeliveryStats,
+    PackageDelivery,
+)
+from packagemanagerapp.trackingcache import invalidate_tracking
+from packagemanagerapp.trackingevents import publish_on_commit, status_event
+
+logger = logging.getLogger(__name__)
+
+HISTORY_BATCH_SIZE = 500
+
+
+def transition_deliveries(deliveries, new_status, notes=None, updated_by=None):
+    """
+    Move many deliveries to ``new_status`` and record their status history
+
+    Runs a fixed number of queries however many deliveries change: one
+    locking SELECT of the current statuses, one UPDATE and a batched
+    INSERT of DeliveryStatusHistory rows, plus one MerchantDeliveryStats
+    UPDATE per owner when that table is enabled. Deliveries already in
+    ``new_status`` are left alone, as PackageDelivery.save() would.
+
+    Args:
+        deliveries (QuerySet|iterable): PackageDelivery queryset or instances
+        new_status (str): Target status (one of STATUS_CHOICES)
+        notes (str): History note (optional; defaults to "Status changed from X to Y")
+        updated_by (User): User recorded on the history rows (optional)
+
+    Returns:
+        int: Number of deliveries whose status changed
+    """
+    if isinstance(deliveries, QuerySet):
+        selected = PackageDelivery.objects.filter(pk__in=deliveries.values('pk'))
+    else:
+        selected = PackageDelivery.objects.filter(pk__in=[delivery.pk for delivery in deliveries])
+
+    with transaction.atomic():
+        changed = list(
+            selected.exclude(status=new_status)
+            .select_for_update()
+            .order_by()
+            .values_list('pk', 'status', 'tracking_id', 'user_id')
+        )
+        if not changed:
+            return 0
+
+        PackageDelivery.objects.filter(pk__in=[pk for pk, _, _, _ in changed]).update(
+            status=new_status,
+            edited_at=timezone.now()
+        )
+        DeliveryStatusHistory.objects.bulk_create(
+            [
+                DeliveryStatusHistory(
+                    delivery_id=pk,
+                    status=new_status,
+                    notes=notes or f"Status changed from {old_status} to {new_status}",
+                    updated_by=updated_by
+                )
+                for pk, old_status, _, _ in changed
+            ],
+            batch_size=HISTORY_BATCH_SIZE
+        )
+
+        user_deltas = {}
+        for _, old_status, _, user_id in changed:
+            if user_id:
+                deltas = user_deltas.setdefault(user_id, {new_status: 0})
+                deltas[old_status] = deltas.get(old_status, 0) - 1
+                deltas[new_status] += 1
+        for user_id, deltas in user_deltas.items():
+            MerchantDeliveryStats.adjust(deltas, user_id=user_id)
+
+        invalidate_tracking(tracking_id for _, _, tracking_id, _ in changed)
+        publish_on_commit(
+            status_event("delivery_status", tracking_id, new_status, old_status, user_id=user_id)
+            for _, old_status, tracking_id, user_id in changed
+        )
+
+    logger.info(f"Moved {len(changed)} deliveries to {new_status}")
+    return len(changed)
+
+
+def _insert_item_history(items, new_status, notes, updated_by, timestamp):
+    """
+    INSERT ... SELECT one history row per item in ``items``
+
+    The SELECT is built by the ORM, so filtering and string concatenation
+    are compiled for whichever database backend is in use.
+    """
+    history = BulkShipmentItemStatusHistory._meta
+    if notes:
+        note = Value(notes)
+    else:
+        note = Concat(
+            Value("Status changed from "),
+            F('status'),
+            Value(f" to {new_status}"),
+            output_field=models.TextField()
+        )
+
+    # Only annotations are selected, so the column order is the order below
+    select = items.order_by().annotate(
+        history_item_id=F('pk'),
+        history_status=Value(new_status, output_field=models.CharField()),
+        history_timestamp=Value(timestamp, output_field=models.DateTimeField()),
+        history_notes=note,
+        history_updated_by_id=Value(updated_by.pk if updated_by else None, output_field=models.IntegerField()),
+    ).values_list(
+        'history_item_id', 'history_status', 'history_timestamp', 'history_notes', 'history_updated_by_id'
+    )
+
+    connection = connections[items.db]
+    select_sql, params = select.query.get_compiler(using=items.db).as_sql()
+    columns = ', '.join(
+        connection.ops.quote_name(history.get_field(name).column)
+        for name in ('item', 'status', 'timestamp', 'notes', 'updated_by')
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {connection.ops.quote_name(history.db_table)} ({columns}) {select_sql}",
+            params
+        )
+        return cursor.rowcount
+
+
+def _adjust_upload_counters(rows, new_status, uploads):
+    """
+    Move the status counters of the uploads of the locked ``rows`` that change
+    status, and their owners' stats
+
+    Args:
+        rows (list): (pk, status, tracking_id, bulk_upload_id) of the changing items
+        uploads (dict): bulk_upload_id -> (user_id, bulk_tracking_id)
+    """
+    deltas = {}
+    for _, old_status, _, bulk_upload_id in rows:
+        upload_deltas = deltas.setdefault(bulk_upload_id, {new_status: 0})
+        upload_deltas[old_status] = upload_deltas.get(old_status, 0) - 1
+        upload_deltas[new_status] += 1
+
+    for bulk_upload_id, upload_deltas in deltas.items():
+        BulkShipmentUpload.adjust_status_counters(bulk_upload_id, upload_deltas)
+        user_id = uploads[bulk_upload_id][0]
+        if user_id:
+            MerchantDeliveryStats.adjust(upload_deltas, user_id=user_id)
+
+
+def transition_bulk_items(items, new_status, notes=None, updated_by=None, **extra_updates):
+    """
+    Move bulk shipment items to ``new_status`` and record their status history
+
+    The selected items are locked (SELECT ... FOR UPDATE) and their current
+    statuses read first; counter deltas, history rows and live tracking
+    events all come from that snapshot, so concurrent transitions of the
+    same items cannot both apply a change.
+
+    Runs a fixed number of queries however many items are selected: the
+    locking SELECT, one SELECT of the uploads involved, one counter UPDATE
+    per upload, one INSERT ... SELECT of the history rows and one UPDATE.
+    With MERCHANT_STATS_TABLE on, each upload's owner stats get one more
+    UPDATE.
+
+    Args:
+        items (QuerySet): BulkShipmentItem queryset
+        new_status (str): Target status (one of STATUS_CHOICES)
+        notes (str): History note (optional; defaults to "Status changed from X to Y")
+        updated_by (User): User recorded on the history rows (optional)
+        **extra_updates: Other fields to set on every selected item (e.g. is_valid=True)
+
+    Returns:
+        int: Number of items updated (including ones already in ``new_status``)
+    """
+    selected = BulkShipmentItem.objects.filter(pk__in=items.values('pk'))
+    now = timezone.now()
+    changed = 0
+
+    with transaction.atomic(using=selected.db):
+        rows = list(
+            selected.select_for_update()
+            .order_by('pk')
+            .values_list('pk', 'status', 'tracking_id', 'bulk_upload_id')
+        )
+        if not rows:
+            return 0
+
+        changing = [row for row in rows if row[1] != new_status]
+        if changing:
+            uploads = {
+                pk: (user_id, bulk_tracking_id)
+                for pk, user_id, bulk_tracking_id in BulkShipmentUpload.objects.filter(
+                    pk__in={bulk_upload_id for _, _, _, bulk_upload_id in changing}
+                ).values_list('pk', 'user_id', 'bulk_tracking_id')
+            }
+            _adjust_upload_counters(changing, new_status, uploads)
+            # The rows are locked, so this reads the statuses of the snapshot
+            changed = _insert_item_history(
+                BulkShipmentItem.objects.filter(pk__in=[pk for pk, _, _, _ in changing]),
+                new_status, notes, updated_by, now
+            )
+
+        updated = BulkShipmentItem.objects.filter(pk__in=[pk for pk, _, _, _ in rows]).update(
+            status=new_status, updated_at=now, **extra_updates
+        )
+        invalidate_tracking(tracking_id for _, _, tracking_id, _ in rows)
+        if changing:
+            publish_on_commit(
+                (
+                    status_event(
+                        "bulk_item_status",
+                        tracking_id,
+                        new_status,
+                        old_status,
+                        user_id=uploads[bulk_upload_id][0],
+                        bulk_tracking_id=uploads[bulk_upload_id][1]
+                    )
+                    for _, old_status, tracking_id, bulk_upload_id in changing
+                ),
+                using=selected.db
+            )
+
+    logger.info(f"Moved {updated} bulk shipment items to {new_status} ({changed} changed)")
+    return updated
@@ -1,3 +1,1932 @@
-from django.test import TestCase
+import asyncio
+import itertools
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from onboarding.models import AccountValidation, DriverProfile, MerchantProfile, RegularUserAddress, RegularUserProfile
+from packagemanagerapp import firebase_config, trackingevents, views
+from packagemanagerapp import bulkdeliverycalculator
+from packagemanagerapp.bulkdeliverycalculator import ADDON_FLAGS, BulkDeliveryFeeCalculator
+from packagemanagerapp.bulkshipmentjobs import (
+    claim_next_job,
+    enqueue_bulk_shipment_job,
+    get_job_progress,
+    requeue_stale_jobs,
+    run_bulk_shipment_job,
+)
+from packagemanagerapp.bulkshipmentprocessor import iter_csv_rows, process_bulk_shipment_rows
+from packagemanagerapp.calculatorregistry import get_bulk_calculator, get_delivery_calculator
+
+from packagemanagerapp.models import (
+    BulkShipmentItem,
+    BulkShipmentItemStatusHistory,
+    BulkShipmentJob,
+    BulkShipmentUpload,
+    DeliveryStatusHistory,
+    DistanceMatrixEntry,
+    FCMToken,
+    GeocodeCacheEntry,
+    IssueFeedback,
+    MerchantDeliveryStats,
+    MerchantNotification,
+    NotificationCounter,
+    PackageDelivery,
+    PickupSchedule,
+    PricingRule,
+    PushOutbox,
+    TrackingRegistry,
+    generate_tracking_id,
+)
+from packagemanagerapp import geocoding
+from packagemanagerapp.geocoding import (
+    DistanceMatrixCache,
+    GeocodeCache,
+    StubGeocoder,
+    TokenBucket,
+    driving_distance,
+    geocode_cache,
+    geocode_concurrently,
+    grid_cell,
+)
+from packagemanagerapp.pagination import InvalidCursor, paginate_queryset
+from packagemanagerapp.pricing import (
+    SPEEDS,
+    WEIGHT_RANGES,
+    PricingCache,
+    compile_pricing,
+    get_pricing,
+    pricing_cache,
+)
+from packagemanagerapp.pushbackends import FakePushBackend
+from packagemanagerapp.quotecache import QuoteCache
+from packagemanagerapp.notification_helpers import notify_user_on_order_placed
+from packagemanagerapp.pushoutbox import (
+    claim_outbox,
+    dispatch_outbox,
+    enqueue_push,
+    enqueue_push_to_users,
+    prune_device_tokens,
+    requeue_stale_outbox,
+    retry_delay,
+)
+from packagemanagerapp.statustransitions import transition_bulk_items, transition_deliveries
+from packagemanagerapp.tracking import resolve_tracking_id
+from packagemanagerapp.trackingcache import get_cached_tracking
+from packagemanagerapp.trackingevents import (
+    RESET,
+    InProcessEventBus,
+    merchant_topic,
+    status_event,
+    tracking_topic,
+)
+from packagemanagerapp.views import update_bulk_upload_status
+
+
+def create_delivery(**kwargs):
+    fields = {
+        'pickup_address': "1 Main St, Calgary",
+        'pickup_contact_name': "Sender",
+        'pickup_contact_phone': "000",
+        'delivery_address': "2 Main St, Calgary",
+        'delivery_recipient_phone': "000",
+        'weight_range': "1-5kg",
+        'package_type': "parcel",
+    }
+    fields.update(kwargs)
+    return PackageDelivery.objects.create(**fields)
+
+
+class PackageDeliverySaveTests(TestCase):
+    def test_update_does_not_reread_status(self):
+        delivery = PackageDelivery.objects.get(pk=create_delivery().pk)
+        delivery.payment_status = 'paid'
+
+        # UPDATE only; no SELECT of the old status
+        with self.assertNumQueries(1):
+            delivery.save()
+
+    def test_status_change_writes_history(self):
+        delivery = PackageDelivery.objects.get(pk=create_delivery().pk)
+        delivery.status = 'PICKED_UP'
+
+        # UPDATE + history INSERT
+        with self.assertNumQueries(2):
+            delivery.save()
+
+        history = list(delivery.status_history.values_list('status', flat=True))
+        self.assertEqual(sorted(history), ['NOT_PICKED_UP', 'PICKED_UP'])
+
+        # Saved status is now the baseline
+        with self.assertNumQueries(1):
+            delivery.save()
+        self.assertEqual(delivery.status_history.count(), 2)
+
+    def test_update_fields_skips_status_history(self):
+        delivery = PackageDelivery.objects.get(pk=create_delivery().pk)
+        delivery.payment_status = 'paid'
+        delivery.status = 'PICKED_UP'
+
+        with self.assertNumQueries(1):
+            delivery.save(update_fields=['payment_status'])
+
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.payment_status, 'paid')
+        self.assertEqual(delivery.status, 'NOT_PICKED_UP')
+        self.assertEqual(delivery.status_history.count(), 1)
+
+
+class TransitionDeliveriesTests(TestCase):
+    def test_query_count_is_constant(self):
+        for count in (5, 50):
+            deliveries = [create_delivery() for _ in range(count)]
+            queryset = PackageDelivery.objects.filter(pk__in=[delivery.pk for delivery in deliveries])
+
+            # SELECT ... FOR UPDATE, UPDATE, history INSERT, plus the
+            # SAVEPOINT / RELEASE of atomic() inside the test transaction
+            with self.assertNumQueries(5):
+                changed = transition_deliveries(queryset, 'IN_TRANSIT')
+
+            self.assertEqual(changed, count)
+            self.assertEqual(
+                DeliveryStatusHistory.objects.filter(delivery__in=deliveries, status='IN_TRANSIT').count(),
+                count
+            )
+
+    def test_per_row_saves_cost_more(self):
+        deliveries = [create_delivery() for _ in range(20)]
+
+        # Per-row saves: UPDATE + history INSERT each
+        with self.assertNumQueries(40):
+            for delivery in deliveries:
+                delivery.status = 'PICKED_UP'
+                delivery.save()
+
+        with self.assertNumQueries(5):
+            transition_deliveries(deliveries, 'IN_TRANSIT')
+
+    def test_unchanged_deliveries_are_skipped(self):
+        delivered = create_delivery(status='DELIVERED')
+        pending = create_delivery()
+
+        changed = transition_deliveries([delivered, pending], 'DELIVERED', notes="Delivered by driver")
+
+        self.assertEqual(changed, 1)
+        self.assertEqual(delivered.status_history.count(), 1)
+        self.assertEqual(pending.status_history.latest('timestamp').notes, "Delivered by driver")
+
+
+def create_bulk_items(bulk_upload, count, **kwargs):
+    fields = {
+        'receiver_name': "Receiver",
+        'phone_number': "000",
+        'delivery_address': "2 Main St, Calgary",
+        'postal_code': "T2P 1J9",
+        'weight_range': "1-5kg",
+        'is_valid': True,
+        'status': "VALID",
+    }
+    fields.update(kwargs)
+    return BulkShipmentItem.objects.bulk_create([
+        BulkShipmentItem(
+            bulk_upload=bulk_upload,
+            tracking_id=generate_tracking_id(),
+            row_number=row,
+            **fields
+        )
+        for row in range(1, count + 1)
+    ])
+
+
+class TransitionBulkItemsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="merchant", email="merchant@example.com")
+        self.bulk_upload = BulkShipmentUpload.objects.create(user=self.user)
+
+    def test_query_count_is_constant(self):
+        for count in (10, 1000):
+            BulkShipmentItem.objects.all().delete()
+            create_bulk_items(self.bulk_upload, count)
+
+            # SELECT ... FOR UPDATE, upload SELECT, counter UPDATE, history
+            # INSERT ... SELECT, UPDATE, plus the SAVEPOINT / RELEASE of
+            # atomic() inside the test transaction
+            with self.assertNumQueries(7):
+                updated = transition_bulk_items(
+                    self.bulk_upload.shipment_items.all(), 'NOT_PICKED_UP', updated_by=self.user
+                )
+
+            self.assertEqual(updated, count)
+            self.assertEqual(
+                BulkShipmentItemStatusHistory.objects.filter(
+                    item__bulk_upload=self.bulk_upload,
+                    status='NOT_PICKED_UP',
+                    updated_by=self.user
+                ).count(),
+                count
+            )
+
+    def test_history_notes_and_unchanged_items(self):
+        changed, unchanged = create_bulk_items(self.bulk_upload, 2)
+        BulkShipmentItem.objects.filter(pk=unchanged.pk).update(status='PICKED_UP')
+
+        updated = transition_bulk_items(
+            self.bulk_upload.shipment_items.all(), 'PICKED_UP', is_valid=True, validation_error=None
+        )
+
+        self.assertEqual(updated, 2)
+        self.assertFalse(unchanged.status_history.exists())
+        self.assertEqual(
+            changed.status_history.get().notes,
+            "Status changed from VALID to PICKED_UP"
+        )
+
+        transition_bulk_items(self.bulk_upload.shipment_items.all(), 'IN_TRANSIT', notes="Left the depot")
+        self.assertEqual(
+            list(changed.status_history.values_list('status', 'notes')),
+            [('IN_TRANSIT', "Left the depot"), ('PICKED_UP', "Status changed from VALID to PICKED_UP")]
+        )
+
+    def test_item_save_writes_history(self):
+        item = BulkShipmentItem.objects.get(pk=create_bulk_items(self.bulk_upload, 1)[0].pk)
+        item.status = 'PICKED_UP'
+        item.save()
+        item.save()
+
+        self.assertEqual(list(item.status_history.values_list('status', flat=True)), ['PICKED_UP'])
+
+
+class BulkUploadStatusCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="merchant", email="merchant@example.com")
+        self.bulk_upload = BulkShipmentUpload.objects.create(user=self.user)
+
+    def assertCounters(self, **expected):
+        self.bulk_upload.refresh_from_db()
+        for item_status, field in BulkShipmentUpload.STATUS_COUNTER_FIELDS.items():
+            self.assertEqual(getattr(self.bulk_upload, field), expected.get(item_status, 0), item_status)
+
+    def test_transitions_move_counters(self):
+        items = create_bulk_items(self.bulk_upload, 4)
+        self.assertCounters()
+
+        transition_bulk_items(self.bulk_upload.shipment_items.all(), 'NOT_PICKED_UP')
+        self.assertCounters(NOT_PICKED_UP=4)
+
+        transition_bulk_items(self.bulk_upload.shipment_items.filter(pk__in=[items[0].pk, items[1].pk]), 'PICKED_UP')
+        self.assertCounters(NOT_PICKED_UP=2, PICKED_UP=2)
+
+        item = BulkShipmentItem.objects.get(pk=items[0].pk)
+        item.status = 'DELIVERED'
+        item.save()
+        item.save()
+        self.assertCounters(NOT_PICKED_UP=2, PICKED_UP=1, DELIVERED=1)
+
+        # A stale instance saved in full leaves the counters alone
+        stale = BulkShipmentUpload.objects.get(pk=self.bulk_upload.pk)
+        transition_bulk_items(self.bulk_upload.shipment_items.all(), 'DELIVERED')
+        stale.payment_status = 'Paid'
+        stale.save()
+        self.assertCounters(DELIVERED=4)
+
+    def test_rollup_status(self):
+        items = create_bulk_items(self.bulk_upload, 3)
+        update_bulk_upload_status(self.bulk_upload)
+        self.assertEqual(self.bulk_upload.status, 'NOT_PICKED_UP')
+
+        transition_bulk_items(self.bulk_upload.shipment_items.all(), 'DELIVERED')
+        transition_bulk_items(self.bulk_upload.shipment_items.filter(pk=items[0].pk), 'IN_TRANSIT')
+        update_bulk_upload_status(self.bulk_upload)
+        self.assertEqual(self.bulk_upload.status, 'IN_TRANSIT')
+
+        transition_bulk_items(self.bulk_upload.shipment_items.all(), 'DELIVERED')
+        update_bulk_upload_status(self.bulk_upload)
+        self.bulk_upload.refresh_from_db()
+        self.assertEqual(self.bulk_upload.status, 'DELIVERED')
+
+    def test_rollup_query_count_is_constant(self):
+        for count in (10, 1000):
+            BulkShipmentItem.objects.all().delete()
+            BulkShipmentUpload.objects.filter(pk=self.bulk_upload.pk).update(
+                status='PAID', not_picked_up_count=0, delivered_count=0
+            )
+            self.bulk_upload.status = 'PAID'
+            create_bulk_items(self.bulk_upload, count)
+            transition_bulk_items(self.bulk_upload.shipment_items.all(), 'NOT_PICKED_UP')
+            item = self.bulk_upload.shipment_items.first()
+            item.status = 'DELIVERED'
+            item.save()
+
+            # Counter refresh + status UPDATE
+            with self.assertNumQueries(2):
+                update_bulk_upload_status(self.bulk_upload)
+            self.assertEqual(self.bulk_upload.status, 'NOT_PICKED_UP')
+            self.assertEqual(self.bulk_upload.delivered_count, 1)
+
+    def test_repeated_transition_matches_recount(self):
+        MerchantDeliveryStats.objects.create(user=self.user)
+        items = create_bulk_items(self.bulk_upload, 4)
+        picked_up = self.bulk_upload.shipment_items.filter(pk__in=[items[0].pk, items[1].pk])
+
+        with override_settings(MERCHANT_STATS_TABLE=True):
+            # A second request moving the same items sees the first one's statuses
+            for selected, new_status in ((self.bulk_upload.shipment_items.all(), 'IN_TRANSIT'), (picked_up, 'DELIVERED')):
+                transition_bulk_items(selected, new_status)
+                transition_bulk_items(selected, new_status)
+            stats = MerchantDeliveryStats.objects.values('delivered').get(pk=self.user.pk)
+            recount = MerchantDeliveryStats.compute(self.user.id)
+
+        self.assertCounters(IN_TRANSIT=2, DELIVERED=2)
+        counters = {field: getattr(self.bulk_upload, field) for field in BulkShipmentUpload.STATUS_COUNTER_FIELDS.values()}
+        self.bulk_upload.recount_status_counters()
+        self.assertEqual(
+            counters,
+            {field: getattr(self.bulk_upload, field) for field in BulkShipmentUpload.STATUS_COUNTER_FIELDS.values()}
+        )
+        self.assertEqual(stats['delivered'], recount['delivered'])
+        self.assertEqual(
+            BulkShipmentItemStatusHistory.objects.filter(item__bulk_upload=self.bulk_upload).count(),
+            4 + 2
+        )
+
+    def test_recount_matches_items(self):
+        create_bulk_items(self.bulk_upload, 3, status='IN_TRANSIT')
+        create_bulk_items(self.bulk_upload, 2)
+
+        self.bulk_upload.recount_status_counters()
+
+        self.assertCounters(IN_TRANSIT=3)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="merchant", email="merchant@example.com")
+        self.deliveries = [create_delivery(user=self.user) for _ in range(7)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_walks_every_row_once(self):
+        queryset = PackageDelivery.objects.filter(user=self.user)
+        expected = list(queryset.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        seen = []
+        params = {'page_size': 3}
+        while True:
+            with self.assertNumQueries(1):
+                rows, pagination = paginate_queryset(RequestFactory().get('/', params), queryset)
+            seen.extend(row.id for row in rows)
+            if not pagination['has_more']:
+                break
+            params['cursor'] = pagination['next_cursor']
+
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        request = RequestFactory().get('/', {'cursor': 'not-a-cursor'})
+        with self.assertRaises(InvalidCursor):
+            paginate_queryset(request, PackageDelivery.objects.all())
+
+        response = self.client.get('/package/merchantdeliverylist', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_delivery_history_pages(self):
+        first = self.client.get('/package/merchantdeliverylist', {'page_size': 5}).json()
+        self.assertEqual(first['count'], 5)
+        self.assertTrue(first['pagination']['has_more'])
+
+        second = self.client.get(
+            '/package/merchantdeliverylist',
+            {'page_size': 5, 'cursor': first['pagination']['next_cursor']}
+        ).json()
+        self.assertEqual(second['count'], 2)
+        self.assertFalse(second['pagination']['has_more'])
+        self.assertIsNone(second['pagination']['next_cursor'])
+
+        tracking_ids = [row['shipment_id'] for row in first['data'] + second['data']]
+        self.assertEqual(sorted(tracking_ids), sorted(delivery.tracking_id for delivery in self.deliveries))
+
+
+class ListEndpointQueryCountTests(TestCase):
+    """List endpoints must not issue queries per row"""
+
+    LIST_VIEWS = [
+        'user_delivery_history',
+        'list_package_deliveries',
+        'list_latest_package_deliveries',
+        'delivery_history_view',
+        'latest_delivery_requests_view',
+        'billing_history_view',
+        'bulk_billing_history_view',
+        'get_notifications',
+        'get_all_bulk_shipments',
+        'get_alluser_bulk_shipments',
+        'admin_get_all_feedback',
+        'get_user_feedback',
+        'get_my_pickup_schedules',
+        'get_all_pickup_schedules',
+    ]
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="merchant", email="merchant@example.com")
+        self.factory = APIRequestFactory()
+        # Count the unread badge up front; its first read also stores the counter row
+        NotificationCounter.unread_for(self.user.id)
+        self.add_rows(2)
+
+    def add_rows(self, count):
+        for _ in range(count):
+            delivery = create_delivery(user=self.user)
+            delivery.status = 'PICKED_UP'
+            delivery.save()
+            BulkShipmentUpload.objects.create(user=self.user)
+            MerchantNotification.objects.create(
+                user=self.user, category='Order & Shipment', title="Shipment Created", message="Created"
+            )
+            IssueFeedback.objects.create(user=self.user, email=self.user.email, description="Late")
+            PickupSchedule.objects.create(
+                schedule_type='single',
+                delivery_type='same-day',
+                pickup_time_slot='morning',
+                shipment_name="Parcel",
+                created_by=self.user
+            )
+
+    def count_queries(self, name):
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(views, name)(request)
+        self.assertEqual(response.status_code, 200, name)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        before = {name: self.count_queries(name) for name in self.LIST_VIEWS}
+        self.add_rows(4)
+        after = {name: self.count_queries(name) for name in self.LIST_VIEWS}
+
+        self.assertEqual(after, before)
+
+    def test_delivery_history_costs_two_queries(self):
+        # Deliveries page + prefetched status history
+        for name in ('delivery_history_view', 'latest_delivery_requests_view'):
+            self.assertEqual(self.count_queries(name), 2, name)
+
+    def test_status_history_timeline(self):
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.user)
+        data = views.delivery_history_view(request).data['data']
+
+        self.assertEqual(
+            [entry['status_code'] for entry in data[0]['status_history']],
+            ['NOT_PICKED_UP', 'PICKED_UP']
+        )
+
+
+class MerchantStatisticsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="merchant", email="merchant@example.com")
+        self.factory = APIRequestFactory()
+        self.deliveries = [create_delivery(user=self.user) for _ in range(3)]
+        self.bulk_upload = BulkShipmentUpload.objects.create(user=self.user)
+        self.items = create_bulk_items(self.bulk_upload, 4)
+
+    def get(self, view):
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.user)
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_one_query_per_model(self):
+        transition_deliveries(self.deliveries[:1], 'DELIVERED')
+        transition_bulk_items(self.bulk_upload.shipment_items.filter(pk=self.items[0].pk), 'OUT_FOR_DELIVERY')
+
+        with self.assertNumQueries(2):
+            stats = self.get(views.merchant_delivery_statistics)
+        self.assertEqual(stats, {"active_deliveries": 7, "delivered": 1, "out_for_delivery": 1})
+
+        with self.assertNumQueries(1):
+            stats = self.get(views.delivery_statistics)
+        self.assertEqual(stats, {"total_deliveries": 3, "completed_deliveries": 1, "pending_deliveries": 2})
+
+    @override_settings(MERCHANT_STATS_TABLE=True)
+    def test_stats_table_follows_transitions(self):
+        # First read counts and stores the row, later reads are one lookup
+        self.get(views.merchant_delivery_statistics)
+        with self.assertNumQueries(1):
+            self.get(views.merchant_delivery_statistics)
+
+        delivery = PackageDelivery.objects.get(pk=self.deliveries[0].pk)
+        delivery.status = 'OUT_FOR_DELIVERY'
+        delivery.save()
+        transition_deliveries(self.deliveries, 'DELIVERED')
+        create_delivery(user=self.user)
+        transition_bulk_items(self.bulk_upload.shipment_items.all(), 'OUT_FOR_DELIVERY')
+        item = BulkShipmentItem.objects.get(pk=self.items[0].pk)
+        item.status = 'DELIVERED'
+        item.save()
+        BulkShipmentItem.objects.create(
+            bulk_upload=self.bulk_upload,
+            row_number=99,
+            receiver_name="Receiver",
+            phone_number="000",
+            delivery_address="2 Main St, Calgary",
+            postal_code="T2P 1J9",
+            weight_range="1-5kg",
+            status='DELIVERED'
+        )
+
+        expected = MerchantDeliveryStats.compute(self.user.id)
+        self.assertEqual(expected, {"active_deliveries": 9, "delivered": 5, "out_for_delivery": 3})
+        self.assertEqual(self.get(views.merchant_delivery_statistics), expected)
+
+        # Deletes drop the row; the next read rebuilds it
+        self.bulk_upload.delete()
+        self.assertFalse(MerchantDeliveryStats.objects.filter(pk=self.user.id).exists())
+        self.assertEqual(
+            self.get(views.merchant_delivery_statistics),
+            {"active_deliveries": 4, "delivered": 3, "out_for_delivery": 0}
+        )
+
+
+class MerchantUsersTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = User.objects.create_user(username="admin")
+        views.cache.delete(views.MERCHANT_USERS_CACHE_KEY)
+
+    def add_merchants(self, count, deliveries=3):
+        for _ in range(count):
+            user = User.objects.create_user(username=f"merchant-{generate_tracking_id()}")
+            MerchantProfile.objects.create(
+                user=user,
+                business_name="Merchant",
+                business_email=f"{user.username}@example.com",
+                business_phone="000",
+                business_registration_number="REG",
+                industry_type="retail",
+                monthly_order_volume=0,
+            )
+            for _ in range(deliveries):
+                create_delivery(user=user)
+
+    def get(self):
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.admin)
+        response = views.get_merchant_users(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    @override_settings(MERCHANT_USERS_CACHE_TTL=0)
+    def test_query_count_does_not_grow_with_merchants(self):
+        self.add_merchants(2)
+        with self.assertNumQueries(2):
+            self.get()
+        self.add_merchants(4)
+        with self.assertNumQueries(2):
+            data = self.get()
+        self.assertEqual(len(data["data"]), 6)
+        self.assertEqual({row["monthlyOrderVolume"] for row in data["data"]}, {0.5})
+
+    def test_old_deliveries_and_cache(self):
+        self.add_merchants(1, deliveries=6)
+        PackageDelivery.objects.filter(pk__in=PackageDelivery.objects.values('pk')[:3]).update(
+            created_at=timezone.now() - timedelta(days=200)
+        )
+        self.assertEqual(self.get()["data"][0]["monthlyOrderVolume"], 0.5)
+
+        # Served from cache until the TTL runs out
+        create_delivery(user=User.objects.get(username__startswith="merchant-"))
+        with self.assertNumQueries(0):
+            data = self.get()
+        self.assertEqual(data["data"][0]["monthlyOrderVolume"], 0.5)
+
+
+class AdminUserListingTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = User.objects.create_user(username="admin")
+        self.add_users(2)
+
+    def add_users(self, count):
+        for _ in range(count):
+            user = User.objects.create_user(username=f"regular-{generate_tracking_id()}")
+            RegularUserProfile.objects.create(
+                user=user, firstname="Ada", lastname="Lovelace", email=f"{user.username}@example.com"
+            )
+            RegularUserAddress.objects.create(
+                user=user, home_address="1 Main St", city="Calgary", state="AB", postal_code="T2P 1J9"
+            )
+            user = User.objects.create_user(username=f"driver-{generate_tracking_id()}")
+            DriverProfile.objects.create(
+                user=user,
+                firstname="Dan",
+                lastname="Driver",
+                email=f"{user.username}@example.com",
+                phone_number="000",
+                home_address="2 Main St",
+                city="Calgary",
+                postal_code="T2P 1J9",
+                vehicle_type="van",
+                vehicle_make_model="Ford Transit",
+                license_plate_number="ABC123",
+                insurance_expiry_date="2030-01-01",
+            )
+
+    def get(self, view, params=None, expected_status=200):
+        request = self.factory.get('/', params or {})
+        force_authenticate(request, user=self.admin)
+        response = view(request)
+        self.assertEqual(response.status_code, expected_status)
+        return response.data
+
+    def test_one_query_per_page(self):
+        for view in (views.get_regular_users, views.get_drivers):
+            with self.assertNumQueries(1):
+                self.get(view)
+        self.add_users(4)
+        for view in (views.get_regular_users, views.get_drivers):
+            with self.assertNumQueries(1):
+                self.assertEqual(len(self.get(view)["data"]), 6)
+
+    def test_rows_and_paging(self):
+        RegularUserAddress.objects.filter(pk=RegularUserAddress.objects.order_by('pk')[0].pk).delete()
+        data = self.get(views.get_regular_users, {"page_size": 1})
+        self.assertEqual(data["data"][0]["address"], "1 Main St, Calgary, AB")
+        self.assertTrue(data["pagination"]["has_more"])
+
+        data = self.get(views.get_regular_users, {"page_size": 1, "cursor": data["pagination"]["next_cursor"]})
+        self.assertIsNone(data["data"][0]["address"])
+        self.assertFalse(data["pagination"]["has_more"])
+
+        self.assertEqual(self.get(views.get_drivers)["data"][0]["address"], "2 Main St, Calgary")
+
+    def test_column_selection(self):
+        data = self.get(views.get_drivers, {"fields": "id,email"})
+        driver = DriverProfile.objects.latest('created_at', 'id')
+        self.assertEqual(data["data"][0], {"id": str(driver.user_id), "email": driver.email})
+
+        data = self.get(views.get_regular_users, {"fields": "id,password"}, expected_status=400)
+        self.assertIn("password", data["message"])
+
+    def test_delete_endpoints(self):
+        driver = DriverProfile.objects.first()
+        regular = RegularUserProfile.objects.first()
+
+        # The id has to belong to the matching kind of account
+        for view, user_id in ((views.delete_regular_user, driver.user_id), (views.delete_merchant_user, driver.user_id)):
+            request = self.factory.delete('/')
+            self.assertEqual(view(request, user_id=user_id).status_code, 400)
+
+        self.assertEqual(views.delete_driver(self.factory.delete('/'), user_id=driver.user_id).status_code, 200)
+        self.assertEqual(views.delete_regular_user(self.factory.delete('/'), user_id=regular.user_id).status_code, 200)
+        self.assertFalse(User.objects.filter(pk__in=[driver.user_id, regular.user_id]).exists())
+        self.assertFalse(RegularUserAddress.objects.filter(user_id=regular.user_id).exists())
+
+
+def full_table_scans(queryset):
+    """Tables the database plans to read in full to run ``queryset``"""
+    plan = queryset.explain()
+    if connection.vendor == 'sqlite':
+        # "SCAN table" without "USING [COVERING] INDEX ..."
+        return re.findall(r'\bSCAN (\w+)$', plan, re.MULTILINE)
+    if connection.vendor == 'postgresql':
+        return re.findall(r'Seq Scan on (\w+)', plan)
+    raise unittest.SkipTest(f"No query plan check for {connection.vendor}")
+
+
+class HotQueryPlanTests(TestCase):
+    """The filters views.py runs on every request must stay on an index"""
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Tiny test tables would otherwise always be read sequentially
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        user_id = 1
+        upload_id = 1
+        rows = ('-created_at', '-id')
+        self.hot_queries = {
+            'delivery history': PackageDelivery.objects.filter(user_id=user_id).order_by(*rows),
+            'billing history': PackageDelivery.objects.filter(user_id=user_id).order_by('-edited_at', '-id'),
+            'delivery statistics': PackageDelivery.objects.order_by().values('status').annotate(total=Count('id')),
+            'merchant delivery counts': PackageDelivery.objects.filter(
+                user_id=user_id
+            ).order_by().values('status').annotate(total=Count('id')),
+            'merchant bulk item counts': BulkShipmentItem.objects.filter(
+                bulk_upload__user_id=user_id
+            ).order_by().values('status').annotate(total=Count('id')),
+            'upload items by status': BulkShipmentItem.objects.filter(bulk_upload_id=upload_id, status='PICKED_UP'),
+            'bulk upload list': BulkShipmentUpload.objects.filter(user_id=user_id).order_by(*rows),
+            'notifications': MerchantNotification.objects.filter(user_id=user_id).order_by(*rows),
+            'latest OTP': AccountValidation.objects.filter(useremail="a@example.com").order_by('-id')[:1],
+            'anonymous feedback': IssueFeedback.objects.filter(email="a@example.com", user__isnull=True),
+            'user feedback': IssueFeedback.objects.filter(user_id=user_id),
+            'feedback list': IssueFeedback.objects.order_by(*rows)[:50],
+            'regular user list': RegularUserProfile.objects.order_by(*rows)[:50],
+            'driver list': DriverProfile.objects.order_by(*rows)[:50],
+            'push fan-out': FCMToken.objects.filter(user_id__in=[user_id, 2], is_active=True).values('token'),
+        }
+
+    def test_hot_queries_use_indexes(self):
+        for name, queryset in self.hot_queries.items():
+            with self.subTest(name):
+                self.assertEqual(full_table_scans(queryset), [], queryset.explain())
+
+    def test_detects_full_scan(self):
+        unindexed = PackageDelivery.objects.filter(delivery_address="2 Main St, Calgary")
+        self.assertEqual(full_table_scans(unindexed), ['packagemanagerapp_packagedelivery'])
+
+
+class FailingPushBackend:
+    def send_multicast(self, tokens, title, body, data=None):
+        raise ConnectionError("FCM unreachable")
+
+
+@override_settings(PUSH_MAX_ATTEMPTS=2, PUSH_RETRY_DELAY=30, PUSH_MAX_RETRY_DELAY=3600)
+class PushOutboxTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def add_tokens(self, tokens):
+        users = User.objects.bulk_create([User(username=f"device-{token}") for token in tokens])
+        FCMToken.objects.bulk_create([FCMToken(user=user, token=token) for user, token in zip(users, tokens)])
+        return [user.id for user in users]
+
+    def test_enqueue_splits_into_multicast_batches(self):
+        with self.assertNumQueries(1):
+            queued = enqueue_push([f"token-{n}" for n in range(1200)] + ["token-0"], "Title", "Body")
+        self.assertEqual(queued, 1200)
+        self.assertEqual(
+            [len(row.tokens) for row in PushOutbox.objects.order_by('pk')],
+            [500, 500, 200]
+        )
+
+    def test_request_only_enqueues(self):
+        user_ids = self.add_tokens(["token-a", "token-b"])
+        request = self.factory.post(
+            '/', {"user_ids": user_ids, "title": "Hello", "body": "World"}, format='json'
+        )
+        with self.assertNumQueries(2):
+            response = views.send_notification_to_multiple_users(request)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["data"]["queued_tokens"], 2)
+        self.assertEqual(PushOutbox.objects.get().status, "QUEUED")
+
+        request = self.factory.post('/', {"user_id": 999999, "title": "Hello", "body": "World"}, format='json')
+        self.assertEqual(views.send_notification_to_user(request).status_code, 404)
+
+    def test_dispatch(self):
+        self.add_tokens(["ok-1", "ok-2", "dead-1", "dead-2", "flaky-1"])
+        enqueue_push(["ok-1", "ok-2", "dead-1", "dead-2", "flaky-1"], "Title", "Body", {"order_id": 7})
+        backend = FakePushBackend()
+
+        rows = claim_outbox("test")
+        self.assertEqual(claim_outbox("other"), [])
+        totals = dispatch_outbox(rows, backend)
+        self.assertEqual(totals, {"success_count": 2, "failure_count": 2, "retry_count": 1, "dead_count": 2})
+        self.assertEqual(
+            set(FCMToken.objects.filter(is_active=False).values_list('token', flat=True)),
+            {"dead-1", "dead-2"}
+        )
+
+        # Only the flaky token is retried, after the backoff delay
+        row = PushOutbox.objects.get()
+        self.assertEqual((row.status, row.tokens, row.success_count), ("QUEUED", ["flaky-1"], 2))
+        self.assertGreater(row.next_attempt_at, timezone.now() + timedelta(seconds=25))
+        self.assertEqual(claim_outbox("test"), [])
+
+        PushOutbox.objects.update(next_attempt_at=timezone.now())
+        dispatch_outbox(claim_outbox("test"), backend)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts, row.failure_count), ("FAILED", 2, 3))
+        self.assertEqual([token for token, _ in backend.sent], ["ok-1", "ok-2"])
+
+    def test_backend_errors_retry_every_token(self):
+        enqueue_push(["ok-1", "ok-2"], "Title", "Body")
+        dispatch_outbox(claim_outbox("test"), FailingPushBackend())
+        row = PushOutbox.objects.get()
+        self.assertEqual((row.status, row.tokens, row.error), ("QUEUED", ["ok-1", "ok-2"], "FCM unreachable"))
+
+        PushOutbox.objects.update(next_attempt_at=timezone.now())
+        dispatch_outbox(claim_outbox("test"), FakePushBackend())
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.success_count, row.error), ("SENT", 2, None))
+
+    @override_settings(PUSH_STALE_SECONDS=300)
+    def test_stale_rows_are_requeued(self):
+        enqueue_push(["ok-1"], "Title", "Body")
+        enqueue_push(["ok-2"], "Title", "Body")
+        stale, alive = claim_outbox("dead-worker")
+        PushOutbox.objects.filter(pk=stale.pk).update(claimed_at=timezone.now() - timedelta(minutes=6))
+
+        self.assertEqual(requeue_stale_outbox(), 1)
+        self.assertEqual(
+            dict(PushOutbox.objects.values_list('pk', 'status')),
+            {stale.pk: "QUEUED", alive.pk: "SENDING"}
+        )
+        self.assertEqual([row.pk for row in claim_outbox("test")], [stale.pk])
+
+    def test_retry_delay_doubles_up_to_the_maximum(self):
+        self.assertEqual([retry_delay(attempts) for attempts in (1, 2, 3)], [30, 60, 120])
+        self.assertEqual(retry_delay(20), 3600)
+
+
+class FirebaseInitTests(TestCase):
+    def setUp(self):
+        import firebase_admin
+
+        apps = {}
+
+        def initialize_app(credential):
+            apps['[DEFAULT]'] = credential
+
+        patches = [
+            mock.patch.object(firebase_admin, '_apps', apps),
+            mock.patch.object(firebase_admin, 'get_app', side_effect=lambda: apps['[DEFAULT]']),
+            mock.patch.object(firebase_admin, 'delete_app', side_effect=lambda app: apps.clear()),
+            mock.patch.object(firebase_admin, 'initialize_app', side_effect=initialize_app),
+            mock.patch('firebase_admin.credentials.Certificate'),
+            mock.patch.object(firebase_config, '_initialized_pid', None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.firebase_admin = firebase_admin
+
+    def test_initializes_once_per_process(self):
+        firebase_config.get_messaging()
+        firebase_config.get_messaging()
+        self.assertEqual(self.firebase_admin.initialize_app.call_count, 1)
+        self.firebase_admin.delete_app.assert_not_called()
+
+        # A forked child drops the inherited app and starts its own
+        with mock.patch.object(firebase_config.os, 'getpid', return_value=firebase_config.os.getpid() + 1):
+            firebase_config.get_messaging()
+            firebase_config.get_messaging()
+        self.assertEqual(self.firebase_admin.initialize_app.call_count, 2)
+        self.assertEqual(self.firebase_admin.delete_app.call_count, 1)
+
+    @override_settings(FIREBASE_CREDENTIALS='/secrets/firebase.json')
+    def test_credentials_path_from_settings(self):
+        firebase_config.get_messaging()
+        self.firebase_admin.credentials.Certificate.assert_called_once_with('/secrets/firebase.json')
+
+
+class DeviceTokenTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user(username="merchant")
+
+    def post(self, view, data):
+        request = self.factory.post('/', data, format='json')
+        force_authenticate(request, user=self.user)
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_each_device_keeps_its_token(self):
+        self.post(views.save_fcm_token, {"fcm_token": "phone", "device_type": "ios"})
+        self.post(views.save_fcm_token, {"fcm_token": "tablet"})
+        FCMToken.objects.update(last_seen_at=timezone.now() - timedelta(days=5), is_active=False)
+
+        # Registering again reactivates the device and refreshes its last-seen time
+        self.post(views.save_fcm_token, {"fcm_token": "phone", "device_type": "ios"})
+        phone = FCMToken.objects.get(token="phone")
+        self.assertTrue(phone.is_active)
+        self.assertGreater(phone.last_seen_at, timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.user.fcm_tokens.count(), 2)
+
+        # Signing out of one device leaves the other
+        self.post(views.delete_fcm_token, {"fcm_token": "phone"})
+        self.assertEqual(list(self.user.fcm_tokens.values_list('token', flat=True)), ["tablet"])
+
+    def test_fan_out_reaches_every_active_device(self):
+        users = [self.user, User.objects.create_user(username="other")]
+        for user in users:
+            for device in ("phone", "tablet", "old"):
+                FCMToken.register(user, f"{user.username}-{device}")
+        FCMToken.objects.filter(token__endswith="-old").update(is_active=False)
+
+        with self.assertNumQueries(2):
+            queued = enqueue_push_to_users([user.id for user in users], "Title", "Body")
+        self.assertEqual(queued, 4)
+        self.assertEqual(
+            sorted(PushOutbox.objects.get().tokens),
+            ["merchant-phone", "merchant-tablet", "other-phone", "other-tablet"]
+        )
+
+        self.assertTrue(notify_user_on_order_placed(self.user.id, 42))
+        self.assertEqual(sorted(PushOutbox.objects.latest('pk').tokens), ["merchant-phone", "merchant-tablet"])
+
+    @override_settings(FCM_TOKEN_STALE_DAYS=30)
+    def test_prune_stale_and_dead_tokens(self):
+        for token in ("fresh", "stale", "dead"):
+            FCMToken.register(self.user, token)
+        FCMToken.objects.filter(token="stale").update(last_seen_at=timezone.now() - timedelta(days=31))
+        FCMToken.objects.filter(token="dead").update(is_active=False)
+
+        self.assertEqual(prune_device_tokens(), 2)
+        self.assertEqual(list(FCMToken.objects.values_list('token', flat=True)), ["fresh"])
+
+
+class NotificationCounterTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user(username="merchant")
+
+    def call(self, method, view, data=None, **kwargs):
+        request = getattr(self.factory, method)('/', data, format='json')
+        force_authenticate(request, user=self.user)
+        return view(request, **kwargs)
+
+    def badge(self):
+        response = self.call('get', views.get_unread_notification_count)
+        self.assertEqual(response.status_code, 200)
+        return response.data["data"]["unread_count"]
+
+    def test_bulk_notify_is_constant_queries(self):
+        users = [self.user] + [User.objects.create_user(username=f"merchant-{n}") for n in range(200)]
+        NotificationCounter.unread_for(self.user.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.call('post', views.create_bulk_notifications, {
+                "user_ids": [user.id for user in users] + [999999],
+                "category": "Order & Shipment",
+                "title": "Holiday hours",
+                "message": "Pickups pause on Monday",
+            })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["data"]["created_count"], 201)
+        # One INSERT per batch the backend allows: a single statement on PostgreSQL, 142 rows on SQLite
+        fields = [field for field in MerchantNotification._meta.concrete_fields if not field.primary_key]
+        batch_size = connection.ops.bulk_batch_size(fields, users)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), -(-len(users) // batch_size))
+        self.assertLessEqual(len(queries), 6)
+        self.assertEqual(MerchantNotification.objects.count(), 201)
+
+        # Existing counters were moved, missing ones are counted on first read
+        with self.assertNumQueries(1):
+            self.assertEqual(self.badge(), 1)
+        self.assertEqual(NotificationCounter.unread_for(users[-1].id), 1)
+
+    def test_counter_follows_read_and_delete(self):
+        first, second, third = [
+            MerchantNotification.objects.create(user=self.user, category="Order & Shipment", title=str(n), message="")
+            for n in range(3)
+        ]
+        self.assertEqual(self.badge(), 3)
+
+        self.call('put', views.mark_notification_as_read, {"is_read": True}, notification_id=first.id)
+        self.call('put', views.mark_notification_as_read, {"is_read": True}, notification_id=first.id)
+        self.assertEqual(self.badge(), 2)
+
+        self.call('put', views.mark_notification_as_read, {"is_read": False}, notification_id=first.id)
+        self.assertEqual(self.badge(), 3)
+
+        self.call('delete', views.delete_notification, notification_id=second.id)
+        third.is_read = True
+        third.save()
+        third.delete()
+        self.assertEqual(self.badge(), 1)
+        self.assertEqual(
+            NotificationCounter.objects.get(pk=self.user.pk).unread,
+            MerchantNotification.objects.filter(user=self.user, is_read=False).count()
+        )
+
+        response = self.call('get', views.get_notifications)
+        self.assertEqual(response.data["data"]["unread_count"], 1)
+
+    def test_mark_all_read_is_one_update(self):
+        MerchantNotification.notify([self.user.id, self.user.id], "Payment & Billing", "Paid", "")
+        MerchantNotification.objects.create(user=self.user, category="Payment & Billing", title="Paid", message="")
+        # A user listed twice is notified once
+        self.assertEqual(self.badge(), 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.call('put', views.mark_all_notifications_as_read)
+        self.assertEqual(response.data["data"]["updated_count"], 2)
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        self.assertIn('packagemanagerapp_merchantnotification', updates[0])
+        self.assertEqual(self.badge(), 0)
+        self.assertFalse(MerchantNotification.objects.filter(is_read=False).exists())
+
+
+class RecordingEventBus:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, events):
+        self.events.extend(events)
+
+
+class TrackingEventTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="merchant", email="merchant@example.com")
+        self.delivery = create_delivery(user=self.user)
+
+    async def test_bus_fans_out_to_topic_subscribers(self):
+        bus = InProcessEventBus(queue_size=2)
+        with bus.subscribe([tracking_topic("ALX-A"), merchant_topic(1)]) as watcher, \
+                bus.subscribe([tracking_topic("ALX-B")]) as other:
+            # Published from another thread, as on_commit callbacks in sync views are
+            publisher = threading.Thread(
+                target=bus.publish, args=([status_event("delivery_status", "ALX-A", "PICKED_UP", user_id=1)],)
+            )
+            publisher.start()
+            publisher.join()
+
+            event = await watcher.get(timeout=1)
+            self.assertEqual((event["tracking_id"], event["status"]), ("ALX-A", "PICKED_UP"))
+            # Subscribed to both of the event's topics, delivered once
+            self.assertIsNone(await watcher.get(timeout=0.05))
+            self.assertIsNone(await other.get(timeout=0.05))
+
+            # A subscriber that falls behind is told to reload
+            bus.publish([status_event("delivery_status", "ALX-B", status) for status in ("A", "B", "C")])
+            self.assertIs(await other.get(timeout=1), RESET)
+            self.assertEqual(bus.subscriber_count(), 2)
+
+        self.assertEqual(bus.subscriber_count(), 0)
+
+    def test_status_changes_publish_after_commit(self):
+        bulk_upload = BulkShipmentUpload.objects.create(user=self.user)
+        items = create_bulk_items(bulk_upload, 2)
+        bus = RecordingEventBus()
+
+        with mock.patch.object(trackingevents, '_bus', bus):
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.delivery.status = 'PICKED_UP'
+                self.delivery.save()
+            self.assertEqual(bus.events, [])
+
+            for callback in callbacks:
+                callback()
+            with self.captureOnCommitCallbacks(execute=True):
+                transition_deliveries([self.delivery], 'IN_TRANSIT')
+                transition_bulk_items(BulkShipmentItem.objects.filter(pk=items[0].pk), 'VALID')
+                transition_bulk_items(bulk_upload.shipment_items.all(), 'PICKED_UP')
+
+        self.assertEqual(
+            [(event["type"], event["tracking_id"], event["previous_status"], event["status"]) for _, event in bus.events],
+            [
+                ("delivery_status", self.delivery.tracking_id, 'NOT_PICKED_UP', 'PICKED_UP'),
+                ("delivery_status", self.delivery.tracking_id, 'PICKED_UP', 'IN_TRANSIT'),
+                ("bulk_item_status", items[0].tracking_id, 'VALID', 'PICKED_UP'),
+                ("bulk_item_status", items[1].tracking_id, 'VALID', 'PICKED_UP'),
+            ]
+        )
+        topics, event = bus.events[-1]
+        self.assertEqual(topics, [tracking_topic(items[1].tracking_id), merchant_topic(self.user.id)])
+        self.assertEqual(event["bulk_tracking_id"], bulk_upload.bulk_tracking_id)
+
+    async def read_event(self, stream):
+        return await asyncio.wait_for(anext(stream), timeout=1)
+
+    async def disconnect(self, stream):
+        # The ASGI handler cancels the stream when the client disconnects
+        reader = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        reader.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reader
+
+    async def test_tracking_stream(self):
+        response = await self.async_client.get(f"/package/track/{self.delivery.tracking_id}/events")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await self.read_event(stream)).startswith(b"retry: "))
+        snapshot = await self.read_event(stream)
+        self.assertTrue(snapshot.startswith(b"event: snapshot\n"))
+        self.assertIn(b'"status": "NOT_PICKED_UP"', snapshot)
+
+        bus = trackingevents.get_event_bus()
+        self.assertEqual(bus.subscriber_count(tracking_topic(self.delivery.tracking_id)), 1)
+        bus.publish([status_event("delivery_status", self.delivery.tracking_id, "PICKED_UP", "NOT_PICKED_UP")])
+        self.assertTrue((await self.read_event(stream)).startswith(b"event: delivery_status\n"))
+
+        await self.disconnect(stream)
+        self.assertEqual(bus.subscriber_count(tracking_topic(self.delivery.tracking_id)), 0)
+
+        response = await self.async_client.get("/package/track/ALX-MISSING/events")
+        self.assertEqual(response.status_code, 404)
+
+    async def test_merchant_stream_needs_a_token(self):
+        response = await self.async_client.get("/package/merchantdeliverylist/events")
+        self.assertEqual(response.status_code, 401)
+
+        token = AccessToken.for_user(self.user)
+        response = await self.async_client.get(f"/package/merchantdeliverylist/events?token={token}")
+        self.assertEqual(response.status_code, 200)
+        stream = aiter(response.streaming_content)
+        await self.read_event(stream)
+        self.assertIn(b'"active_deliveries": 1', await self.read_event(stream))
+        await self.disconnect(stream)
+        self.assertEqual(trackingevents.get_event_bus().subscriber_count(), 0)
+
+    def test_streams_refused_under_wsgi(self):
+        response = self.client.get(f"/package/track/{self.delivery.tracking_id}/events")
+        self.assertEqual(response.status_code, 501)
+
+
+class FlakyBulkCalculator(BulkDeliveryFeeCalculator):
+    """Raises for 'Broken' addresses and whenever a batch includes a 30kg+ row"""
+
+    def calculate_distance(self, pickup_address, delivery_address):
+        if 'Broken' in delivery_address:
+            raise RuntimeError("Geocoder timed out")
+        return super().calculate_distance(pickup_address, delivery_address)
+
+    def calculate_delivery_fees(self, distances, package_weights, delivery_speeds, addon_flags=None):
+        if '30kg+' in package_weights:
+            raise ValueError("No price for 30kg+")
+        return super().calculate_delivery_fees(distances, package_weights, delivery_speeds, addon_flags)
+
+
+class BulkShipmentProcessorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="merchant", email="merchant@example.com")
+        self.bulk_upload = BulkShipmentUpload.objects.create(user=self.user)
+
+    def csv_file(self, lines):
+        header = b"receiver_name,phone_number,address,postal_code,package_size\n"
+        return SimpleUploadedFile("shipments.csv", header + b"".join(lines), content_type="text/csv")
+
+    def good_lines(self, count):
+        return [f"Receiver {n},000,{n} Main St Calgary,T2P,1-5kg\n".encode() for n in range(count)]
+
+    def test_row_errors_only_fail_their_row(self):
+        lines = self.good_lines(10)
+        lines.insert(2, b"Broken,000,1 Broken St Calgary,T2P,1-5kg\n")
+        lines.insert(5, b"Heavy,000,1 Heavy St Calgary,T2P,30kg+\n")
+        lines.insert(8, b"Bad \xff\xfe,000,1 Main St Calgary,T2P,1-5kg\n")
+
+        with self.assertLogs('packagemanagerapp.bulkshipmentprocessor', 'WARNING'):
+            upload = process_bulk_shipment_rows(
+                self.bulk_upload,
+                iter_csv_rows(self.csv_file(lines)),
+                batch_size=5,
+                calculator=FlakyBulkCalculator(geolocator=get_bulk_calculator().geolocator),
+            )
+
+        self.assertEqual((upload.total_shipments, upload.valid_shipments, upload.invalid_shipments), (13, 10, 3))
+        self.assertEqual(upload.status, "PENDING")
+        self.assertEqual(
+            [(entry['row'], entry['error']) for entry in upload.validation_errors],
+            [
+                (3, "Geocoder timed out"),
+                (6, "No price for 30kg+"),
+                (9, "Row contains characters that are not valid UTF-8"),
+            ]
+        )
+        self.assertEqual(
+            list(upload.shipment_items.order_by('row_number').values_list('row_number', 'status')),
+            [(n, "INVALID" if n in (3, 6, 9) else "VALID") for n in range(1, 14)]
+        )
+        self.assertEqual(
+            upload.total_delivery_fee,
+            sum(upload.shipment_items.filter(is_valid=True).values_list('delivery_fee', flat=True))
+        )
+
+    def test_every_row_failing_marks_upload_failed(self):
+        lines = [b"Broken,000,1 Broken St Calgary,T2P,1-5kg\n"] * 10
+
+        with self.assertLogs('packagemanagerapp.bulkshipmentprocessor', 'WARNING'):
+            upload = process_bulk_shipment_rows(
+                self.bulk_upload,
+                iter_csv_rows(self.csv_file(lines)),
+                calculator=FlakyBulkCalculator(geolocator=get_bulk_calculator().geolocator),
+            )
+
+        self.assertEqual((upload.valid_shipments, upload.invalid_shipments), (0, 10))
+        self.assertEqual(upload.status, "FAILED")
+
+
+def create_pricing_rule(tier='bulk', effective_from=None, **kwargs):
+    fields = {
+        'small_base_fee': '5.99',
+        'medium_base_fee': '9.99',
+        'large_base_fee': '15.99',
+        'express_speed_fee': '4.99',
+        'instant_speed_fee': '6.99',
+        'signature_confirmation_fee': '1.50',
+        'fragile_handling_fee': '2.50',
+        'oversized_package_fee': '8.00',
+        'per_km_rate': '0.90',
+    }
+    fields.update(kwargs)
+    return PricingRule.objects.create(
+        tier=tier,
+        effective_from=effective_from or timezone.now() - timedelta(minutes=1),
+        **fields
+    )
+
+
+class BulkPricingParityTests(TestCase):
+    """calculate_delivery_fees must match calculate_delivery_fee row for row"""
+
+    fee_keys = ['base_fee', 'distance_fee', 'speed_fee', 'addons_fee', 'total_fee']
+
+    def setUp(self):
+        pricing_cache.invalidate()
+        self.addCleanup(pricing_cache.invalidate)
+        self.calculator = get_bulk_calculator()
+
+    def rows(self):
+        free_km = get_pricing('bulk').free_distance_km
+        distances = [0, 1.5, free_km - 0.01, free_km, free_km + 0.001, free_km + 0.005, 7.3, 12.345, 59.99]
+        # Every cent past the free distance for two km, which includes all
+        # the fees landing on half a cent
+        distances += [free_km + cents / 100 for cents in range(1, 201)]
+        flag_sets = list(itertools.product((False, True), repeat=len(ADDON_FLAGS)))
+        weights = WEIGHT_RANGES + ['50kg']
+        speeds = SPEEDS + ['Express', None, 'overnight']
+        return list(itertools.product(distances, weights, speeds, flag_sets))
+
+    def assert_parity(self):
+        rows = self.rows()
+        distances, weights, speeds, flags = (list(column) for column in zip(*rows))
+
+        batch = self.calculator.calculate_delivery_fees(distances, weights, speeds, flags)
+
+        self.assertEqual(len(batch), len(rows))
+        for (distance_km, weight, speed, row_flags), fees in zip(rows, batch):
+            addons = [name for name, enabled in zip(ADDON_FLAGS, row_flags) if enabled]
+            expected = self.calculator.calculate_delivery_fee(distance_km, weight, speed, addons)
+            with self.subTest(distance_km=distance_km, weight=weight, speed=speed, addons=addons):
+                self.assertEqual(fees, expected)
+                # Same cents, and the same two-place Decimals
+                self.assertEqual(
+                    [str(fees[key]) for key in self.fee_keys], [str(expected[key]) for key in self.fee_keys]
+                )
+
+    def test_matches_per_row_pricing(self):
+        self.assert_parity()
+
+    def test_matches_per_row_pricing_on_half_cent_rates(self):
+        # 0.45/km puts every odd cent of distance on a half cent
+        create_pricing_rule(free_distance_km='2.50', per_km_rate='0.45')
+        pricing_cache.invalidate()
+        self.assertEqual(get_pricing('bulk').free_distance_km, 2.5)
+
+        self.assert_parity()
+
+    def test_matches_without_numpy(self):
+        with mock.patch.object(bulkdeliverycalculator, 'np', None):
+            self.assert_parity()
+
+
+class RecordingStubGeocoder(StubGeocoder):
+    """StubGeocoder that records when each address was sent"""
+
+    def __init__(self, latency=0.0, latencies=None):
+        super().__init__(latency=latency)
+        self.latencies = latencies or {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def geocode(self, address):
+        with self._lock:
+            self.calls.append((time.monotonic(), address))
+        time.sleep(self.latencies.get(address, 0))
+        return super().geocode(address)
+
+
+class GeocodeConcurrentlyTests(SimpleTestCase):
+    def test_identical_addresses_are_geocoded_once(self):
+        geocoder = RecordingStubGeocoder()
+        addresses = [
+            "123 Main Street NW, Calgary",
+            "123 main st. nw , calgary",
+            "9 Centre Ave, Airdrie",
+            "123 MAIN ST NW, CALGARY",
+            "9 Centre Avenue, Airdrie",
+        ]
+
+        locations = geocode_concurrently(addresses, geocoder.geocode, max_workers=4, rate_limiter=TokenBucket(0))
+
+        self.assertEqual(
+            sorted(address for _, address in geocoder.calls),
+            ["123 Main Street NW, Calgary", "9 Centre Ave, Airdrie"]
+        )
+        self.assertEqual(set(locations), set(addresses))
+        for address in addresses:
+            expected = StubGeocoder().geocode(address)
+            self.assertEqual(
+                (locations[address].latitude, locations[address].longitude),
+                (expected.latitude, expected.longitude)
+            )
+
+    def test_results_follow_input_order(self):
+        addresses = [f"{n} Main St, Calgary" for n in range(8)] + ["1 Nowhere Rd, Calgary"]
+        # Earlier addresses take longest, so they finish last
+        geocoder = RecordingStubGeocoder(latencies={address: (8 - n) * 0.01 for n, address in enumerate(addresses)})
+
+        locations = geocode_concurrently(addresses, geocoder.geocode, max_workers=8, rate_limiter=TokenBucket(0))
+
+        self.assertEqual(list(locations), addresses)
+        self.assertIsNone(locations["1 Nowhere Rd, Calgary"])
+
+    def test_rate_limit_holds_with_many_workers(self):
+        rate = 20
+        geocoder = RecordingStubGeocoder(latency=0.01)
+        addresses = [f"{n} Main St, Calgary" for n in range(11)]
+
+        geocode_concurrently(addresses, geocoder.geocode, max_workers=8, rate_limiter=TokenBucket(rate, capacity=1))
+
+        times = sorted(sent for sent, _ in geocoder.calls)
+        self.assertEqual(len(times), len(addresses))
+        # One token up front, then one every 1/rate seconds
+        for n, sent in enumerate(times):
+            self.assertGreaterEqual(sent - times[0], n / rate - 0.005)
+
+    def test_heartbeat_runs_after_each_lookup(self):
+        geocoder = RecordingStubGeocoder()
+        addresses = [f"{n} Main St, Calgary" for n in range(10)]
+        beats = []
+
+        geocode_concurrently(
+            addresses, geocoder.geocode, rate_limiter=TokenBucket(0), heartbeat=lambda: beats.append(1)
+        )
+        self.assertEqual(len(beats), len(addresses))
+
+        def stop():
+            raise RuntimeError("stop")
+
+        geocoder = RecordingStubGeocoder(latency=0.01)
+        with self.assertRaises(RuntimeError):
+            geocode_concurrently(
+                addresses, geocoder.geocode, max_workers=1, rate_limiter=TokenBucket(0), heartbeat=stop
+            )
+        # Lookups still queued when the heartbeat raised are cancelled
+        self.assertLess(len(geocoder.calls), len(addresses))
+
+
+class TrackingCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username="merchant", email="merchant@example.com")
+        self.delivery = PackageDelivery.objects.get(pk=create_delivery(user=self.user).pk)
+        self.bulk_upload = BulkShipmentUpload.objects.create(user=self.user)
+        self.items = create_bulk_items(self.bulk_upload, 2)
+        TrackingRegistry.register(bulk_items=self.items)
+
+    def get(self, tracking_id, **headers):
+        return self.client.get(f"/package/track/{tracking_id}", **headers)
+
+    def test_unchanged_page_returns_304(self):
+        response = self.get(self.delivery.tracking_id)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.get(self.delivery.tracking_id, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.get(self.delivery.tracking_id, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_status_change_invalidates_on_commit(self):
+        etag = self.get(self.delivery.tracking_id)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.delivery.status = 'PICKED_UP'
+            self.delivery.save()
+            # Still cached until the transaction commits
+            self.assertIsNotNone(get_cached_tracking(self.delivery.tracking_id))
+
+        self.assertIsNone(get_cached_tracking(self.delivery.tracking_id))
+        response = self.get(self.delivery.tracking_id, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_bulk_transition_invalidates(self):
+        for item in self.items:
+            self.assertEqual(self.get(item.tracking_id).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_bulk_items(self.bulk_upload.shipment_items.filter(pk=self.items[0].pk), 'PICKED_UP')
+
+        self.assertIsNone(get_cached_tracking(self.items[0].tracking_id))
+        self.assertIsNotNone(get_cached_tracking(self.items[1].tracking_id))
+
+    def test_rolled_back_change_keeps_cache(self):
+        self.get(self.delivery.tracking_id)
+        self.get(self.items[0].tracking_id)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.delivery.status = 'PICKED_UP'
+                    self.delivery.save()
+                    transition_bulk_items(self.bulk_upload.shipment_items.all(), 'PICKED_UP')
+                    raise RuntimeError("rolled back")
+            except RuntimeError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertIsNotNone(get_cached_tracking(self.delivery.tracking_id))
+        self.assertIsNotNone(get_cached_tracking(self.items[0].tracking_id))
+
+    def test_upload_save_invalidates_only_when_item_pages_change(self):
+        bulk_upload = BulkShipmentUpload.objects.get(pk=self.bulk_upload.pk)
+        for item in self.items:
+            self.get(item.tracking_id)
+
+        # No SELECT of the items and nothing to drop when the pages are unchanged
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            bulk_upload.validation_errors = ["edited"]
+            with self.assertNumQueries(1):
+                bulk_upload.save()
+        self.assertEqual(callbacks, [])
+        self.assertIsNotNone(get_cached_tracking(self.items[0].tracking_id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_upload.payment_status = 'Paid'
+            bulk_upload.save()
+        for item in self.items:
+            self.assertIsNone(get_cached_tracking(item.tracking_id))
+        self.assertEqual(self.get(self.items[0].tracking_id).json()['payment_status'], 'Paid')
+
+
+class BulkShipmentJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="merchant", email="merchant@example.com")
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def enqueue(self, **kwargs):
+        return enqueue_bulk_shipment_job(BulkShipmentUpload.objects.create(user=self.user, **kwargs))
+
+    def enqueue_csv(self, rows):
+        lines = ["receiver_name,phone_number,address,postal_code,package_size"] + [
+            f"Receiver {n},000,{n} Main St Calgary,T2P,1-5kg" for n in range(rows)
+        ]
+        return self.enqueue(
+            csv_file=SimpleUploadedFile("upload.csv", "\n".join(lines).encode()),
+            total_shipments=rows
+        )
+
+    def item_rows(self, job):
+        items = BulkShipmentItem.objects.filter(bulk_upload_id=job.bulk_upload_id).order_by('row_number')
+        return list(items.values_list('row_number', flat=True))
+
+    def test_each_job_is_claimed_once(self):
+        first, second = self.enqueue(), self.enqueue()
+
+        self.assertEqual(claim_next_job("worker-a").pk, first.pk)
+        self.assertEqual(claim_next_job("worker-b").pk, second.pk)
+        self.assertIsNone(claim_next_job("worker-c"))
+        self.assertEqual(
+            dict(BulkShipmentJob.objects.values_list('pk', 'worker_id')),
+            {first.pk: "worker-a", second.pk: "worker-b"}
+        )
+
+    def test_claim_race_has_one_winner(self):
+        job = self.enqueue()
+        winners = []
+        raced = []
+
+        def claim_first(execute, sql, params, many, context):
+            # worker-a claims the job after worker-b read it as QUEUED
+            if sql.startswith('UPDATE') and not raced:
+                raced.append(True)
+                winners.append(claim_next_job("worker-a"))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(claim_first):
+            loser = claim_next_job("worker-b")
+
+        self.assertIsNone(loser)
+        self.assertEqual(winners[0].pk, job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker_id, job.attempts), ("RUNNING", "worker-a", 1))
+
+    @override_settings(BULK_SHIPMENT_JOB_STALE_SECONDS=600, BULK_SHIPMENT_JOB_MAX_ATTEMPTS=3)
+    def test_stale_jobs_are_requeued_or_failed(self):
+        retry, exhausted, alive = self.enqueue(), self.enqueue(), self.enqueue()
+        for _ in range(3):
+            claim_next_job("worker-a")
+        BulkShipmentJob.objects.filter(pk=exhausted.pk).update(attempts=3)
+        BulkShipmentJob.objects.filter(pk__in=[retry.pk, exhausted.pk]).update(
+            updated_at=timezone.now() - timedelta(minutes=11)
+        )
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+
+        statuses = dict(BulkShipmentJob.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {retry.pk: "QUEUED", exhausted.pk: "FAILED", alive.pk: "RUNNING"})
+        self.assertIsNone(BulkShipmentJob.objects.get(pk=retry.pk).worker_id)
+        self.assertEqual(BulkShipmentUpload.objects.get(pk=exhausted.bulk_upload_id).status, "FAILED")
+
+        # The requeued job goes to the next worker with its attempt counted
+        job = claim_next_job("worker-b")
+        self.assertEqual((job.pk, job.attempts), (retry.pk, 2))
+
+    def test_prefetch_sends_heartbeat(self):
+        self.enqueue_csv(3)
+        job = claim_next_job("worker-a")
+        stale = timezone.now() - timedelta(minutes=11)
+        BulkShipmentJob.objects.filter(pk=job.pk).update(updated_at=stale)
+
+        def prefetch(csv_file, pickup_address, calculator, heartbeat):
+            # A long geocoding pass: the job must not look stale afterwards
+            heartbeat()
+            self.assertGreater(BulkShipmentJob.objects.get(pk=job.pk).updated_at, stale)
+            self.assertEqual(requeue_stale_jobs(), 0)
+            return 0
+
+        with mock.patch('packagemanagerapp.bulkshipmentjobs.HEARTBEAT_INTERVAL', 0), \
+                mock.patch('packagemanagerapp.bulkshipmentjobs.prefetch_csv_distances', side_effect=prefetch) as patch:
+            run_bulk_shipment_job(job)
+
+        patch.assert_called_once()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_processed), ("COMPLETED", 3))
+
+    @override_settings(BULK_SHIPMENT_BATCH_SIZE=2)
+    def test_requeued_job_is_left_to_its_new_owner(self):
+        self.enqueue_csv(6)
+        job = claim_next_job("worker-a")
+        new_owner = []
+        snapshot = []
+
+        def requeue_after_first_batch(csv_file):
+            # worker-a stalls after its first batch; the job is requeued and
+            # worker-b claims it before worker-a reports the second batch
+            for n, row in enumerate(iter_csv_rows(csv_file)):
+                if n == 2:
+                    BulkShipmentJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(minutes=11))
+                    requeue_stale_jobs()
+                    new_owner.append(claim_next_job("worker-b"))
+                    snapshot.extend(BulkShipmentUpload.objects.filter(pk=job.bulk_upload_id).values_list(
+                        'status', 'valid_shipments', 'invalid_shipments', 'total_shipments'
+                    ))
+                yield row
+
+        with self.assertLogs('packagemanagerapp.bulkshipmentjobs', level='WARNING') as logs, \
+                mock.patch('packagemanagerapp.bulkshipmentjobs.iter_csv_rows', requeue_after_first_batch):
+            run_bulk_shipment_job(job)
+
+        self.assertIn("worker-a lost bulk shipment job", logs.output[-1])
+        job.refresh_from_db()
+        self.assertEqual(
+            (job.status, job.worker_id, job.attempts, job.rows_processed, job.error),
+            ("RUNNING", "worker-b", 2, 0, None)
+        )
+        # worker-a's second batch was rolled back and nothing was cleaned up
+        self.assertEqual(self.item_rows(job), [1, 2])
+        upload = BulkShipmentUpload.objects.get(pk=job.bulk_upload_id)
+        self.assertEqual(
+            [(upload.status, upload.valid_shipments, upload.invalid_shipments, upload.total_shipments)],
+            snapshot
+        )
+
+        run_bulk_shipment_job(new_owner[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_processed), ("COMPLETED", 6))
+        self.assertEqual(self.item_rows(job), [1, 2, 3, 4, 5, 6])
+
+    def test_progress_eta(self):
+        job = self.enqueue(total_shipments=400)
+        self.assertIsNone(get_job_progress(job.bulk_upload)['eta_seconds'])
+
+        claim_next_job("worker-a")
+        BulkShipmentJob.objects.filter(pk=job.pk).update(
+            rows_processed=100,
+            started_at=timezone.now() - timedelta(seconds=10)
+        )
+        progress = get_job_progress(job.bulk_upload)
+        self.assertEqual((progress['job_status'], progress['percent_complete']), ("RUNNING", 25.0))
+        # 100 rows in 10s leaves 300 rows, about 30s
+        self.assertAlmostEqual(progress['eta_seconds'], 30, delta=1)
+
+        BulkShipmentJob.objects.filter(pk=job.pk).update(status="COMPLETED")
+        progress = get_job_progress(job.bulk_upload)
+        self.assertEqual((progress['rows_processed'], progress['eta_seconds']), (400, 0))
+
+
+class PricingTests(TestCase):
+    def setUp(self):
+        PricingRule.objects.all().delete()
+        pricing_cache.invalidate()
+        self.addCleanup(pricing_cache.invalidate)
+
+    def test_repeated_addons_are_charged_per_occurrence(self):
+        pricing = compile_pricing('bulk')
+
+        fees = pricing.fee_breakdown(0, '1-5kg', 'standard', ['fragile_handling', 'Fragile Handling', 'gift_wrap'])
+        self.assertEqual(fees['addons_fee'], Decimal('5.00'))
+        self.assertEqual(fees['total_fee'], Decimal('10.99'))
+        self.assertEqual(fees['applied_addons'], ['fragile_handling', 'Fragile Handling'])
+
+        # 30kg+ always pays the oversized addon once; asking for it twice pays twice
+        fees = pricing.fee_breakdown(0, '30kg+', 'standard', [])
+        self.assertEqual((fees['addons_fee'], fees['applied_addons']), (Decimal('8.00'), ['oversized_package']))
+        fees = pricing.fee_breakdown(0, '30kg+', 'standard', ['oversized_package', 'oversized_package'])
+        self.assertEqual(fees['addons_fee'], Decimal('16.00'))
+
+    def test_compile_picks_the_rule_in_effect(self):
+        now = timezone.now()
+        create_pricing_rule(effective_from=now - timedelta(days=10), small_base_fee='4.00')
+        current = create_pricing_rule(effective_from=now - timedelta(days=1), small_base_fee='5.00')
+        create_pricing_rule(effective_from=now - timedelta(hours=1), small_base_fee='9.00', is_active=False)
+        upcoming = create_pricing_rule(effective_from=now + timedelta(days=2), small_base_fee='6.00')
+        create_pricing_rule(effective_from=now + timedelta(days=5), small_base_fee='7.00')
+        create_pricing_rule(tier='single', effective_from=now - timedelta(hours=2), small_base_fee='8.00')
+
+        pricing = compile_pricing('bulk', now=now)
+        self.assertEqual((pricing.version, pricing.base_fees['small']), (current.version, Decimal('5.00')))
+        self.assertEqual(pricing.valid_until, upcoming.effective_from)
+
+        pricing = compile_pricing('bulk', now=upcoming.effective_from)
+        self.assertEqual((pricing.version, pricing.base_fees['small']), (upcoming.version, Decimal('6.00')))
+
+        PricingRule.objects.filter(tier='bulk').update(is_active=False)
+        with self.assertLogs('packagemanagerapp.pricing', 'WARNING'):
+            pricing = compile_pricing('bulk', now=now)
+        self.assertEqual((pricing.version, pricing.base_fees['small']), (0, Decimal('5.99')))
+
+    def test_cache_picks_up_an_edited_rule_after_the_check_interval(self):
+        rule = create_pricing_rule()
+        process_cache = PricingCache()
+
+        with override_settings(PRICING_CHECK_INTERVAL=60):
+            original = process_cache.get('bulk')
+            rule.small_base_fee = Decimal('6.49')
+            rule.save()
+
+            # Within the interval the compiled table is served without a query
+            with self.assertNumQueries(0):
+                self.assertIs(process_cache.get('bulk'), original)
+
+        with override_settings(PRICING_CHECK_INTERVAL=0):
+            edited = process_cache.get('bulk')
+
+        self.assertEqual((edited.version, edited.base_fees['small']), (rule.version, Decimal('6.49')))
+        self.assertNotEqual(edited.fingerprint, original.fingerprint)
+
+
+class QuoteCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        pricing_cache.invalidate()
+        self.addCleanup(cache.clear)
+        self.addCleanup(pricing_cache.invalidate)
+        self.quotes = QuoteCache()
+        self.calculator = get_delivery_calculator()
+
+    def quote(self, pickup="123 Main Street NW, Calgary", speed="express", addons=("fragile_handling",)):
+        return self.quotes.get_quote(self.calculator, pickup, "9 Elm Ave, Airdrie", "5-15kg", speed, list(addons))
+
+    def test_key_is_stable_across_spellings(self):
+        pricing = get_pricing('single')
+
+        def key(pickup="123 Main Street NW, Calgary", speed="express", addons=("fragile_handling",), weight="5-15kg"):
+            return self.quotes.make_key(pricing, pickup, "9 Elm Ave, Airdrie", weight, speed, list(addons))
+
+        self.assertEqual(key(), key(pickup="123 main st. nw , calgary"))
+        self.assertEqual(key(), key(speed=" Express"))
+        self.assertEqual(key(speed=None), key(speed="standard"))
+        self.assertNotEqual(key(), key(weight="5-15KG"))
+        self.assertNotEqual(key(), key(addons=("fragile_handling", "fragile_handling")))
+        self.assertNotEqual(key(), key(addons=("Fragile Handling",)))
+
+    def test_shared_entry_echoes_the_normalized_speed(self):
+        wrapped = mock.patch.object(self.calculator, 'get_delivery_quote', wraps=self.calculator.get_delivery_quote)
+        with wrapped as quote:
+            first = self.quote(speed="Express")
+            second = self.quote(pickup="123 main st. nw , calgary", speed="express")
+
+        self.assertEqual(quote.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(second['quote']['details']['delivery_speed'], "express")
+        self.assertEqual(second['quote']['details']['estimated_delivery_time'], "1-2 hours")
+
+    def test_pricing_change_misses(self):
+        first = self.quote()
+
+        create_pricing_rule(tier='single', medium_base_fee='20.00')
+        pricing_cache.invalidate()
+        second = self.quote()
+
+        self.assertEqual(second['quote']['breakdown']['base_fee'], 20.0)
+        self.assertNotEqual(first['quote']['total_fee'], second['quote']['total_fee'])
+        self.assertEqual((self.quotes.get_stats()['hits'], self.quotes.get_stats()['misses']), (0, 2))
+
+    def test_stats(self):
+        self.assertEqual(self.quotes.get_stats()['hit_ratio'], 0.0)
+
+        self.quote()
+        self.quote()
+        self.quote(speed="EXPRESS")
+        self.quote(speed="instant")
+        # Failed quotes are not cached
+        self.quotes.get_quote(self.calculator, "1 Main St, Toronto", "9 Elm Ave, Airdrie", "5-15kg", "express", [])
+        self.quotes.get_quote(self.calculator, "1 Main St, Toronto", "9 Elm Ave, Airdrie", "5-15kg", "express", [])
+
+        stats = self.quotes.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['lookups']), (2, 4, 6))
+        self.assertEqual(stats['hit_ratio'], round(2 / 6, 4))
+        self.assertIsNotNone(stats['avg_hit_ms'])
+
+        self.quotes.reset_stats()
+        self.assertEqual(self.quotes.get_stats()['lookups'], 0)
+
+
+@override_settings(GEOCODE_RATE_LIMIT=0)
+class GeocodeCacheTests(TestCase):
+    def setUp(self):
+        self.geocoder = RecordingStubGeocoder()
+        self.cache = GeocodeCache()
+
+    def sent(self):
+        return [address for _, address in self.geocoder.calls]
+
+    def test_memory_then_database_then_geocoder(self):
+        expected = StubGeocoder().geocode("123 Main Street NW, Calgary")
+        point = self.cache.get_coordinates("123 Main Street NW, Calgary", self.geocoder.geocode)
+        self.assertEqual(point, (expected.latitude, expected.longitude))
+
+        # Same address spelled differently, served from memory
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.get_coordinates("123 main st. nw , calgary", self.geocoder.geocode), point)
+
+        # Another process starts with an empty memory tier and reads the table
+        other = GeocodeCache()
+        with self.assertNumQueries(2):
+            self.assertEqual(other.get_coordinates("123 MAIN ST NW, CALGARY", self.geocoder.geocode), point)
+        with self.assertNumQueries(0):
+            other.get_coordinates("123 MAIN ST NW, CALGARY", self.geocoder.geocode)
+
+        # Expired rows are geocoded again
+        GeocodeCacheEntry.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(GeocodeCache().get_coordinates("123 Main Street NW, Calgary", self.geocoder.geocode), point)
+
+        self.assertEqual(self.sent(), ["123 Main Street NW, Calgary"] * 2)
+        self.assertEqual(
+            {key: value for key, value in self.cache.get_stats().items() if key in ('memory_hits', 'misses')},
+            {'memory_hits': 1, 'misses': 1}
+        )
+        self.assertEqual(other.get_stats()['db_hits'], 1)
+
+    def test_not_found_is_cached_and_errors_are_not(self):
+        self.assertIsNone(self.cache.get_coordinates("1 Nowhere Rd, Calgary", self.geocoder.geocode))
+        self.assertIsNone(GeocodeCache().get_coordinates("1 Nowhere Rd, Calgary", self.geocoder.geocode))
+        self.assertEqual(len(self.geocoder.calls), 1)
+        self.assertFalse(GeocodeCacheEntry.objects.get().found)
+
+        def failing(address):
+            raise RuntimeError("Geocoder timed out")
+
+        with self.assertRaises(RuntimeError):
+            self.cache.get_coordinates("9 Elm Ave, Airdrie", failing)
+        self.assertEqual(GeocodeCacheEntry.objects.count(), 1)
+        self.assertEqual(self.cache.get_stats()['errors'], 1)
+
+    def test_get_many_reads_the_table_in_batches(self):
+        stored = [f"{n} Main St, Calgary" for n in range(5)]
+        GeocodeCache().get_many(stored, self.geocoder.geocode)
+        self.geocoder.calls.clear()
+        self.cache.get_coordinates(stored[0], self.geocoder.geocode)
+
+        addresses = stored + ["7 Elm Ave, Airdrie", "7 elm avenue, airdrie", "1 Nowhere Rd, Calgary"]
+        with mock.patch.object(geocoding, 'DB_LOOKUP_BATCH_SIZE', 2):
+            # stored[0] is in memory; six keys take three SELECTs, then one
+            # last_used_at UPDATE and one upsert of the two new addresses
+            with self.assertNumQueries(5):
+                points = self.cache.get_many(addresses, self.geocoder.geocode)
+
+        self.assertEqual(list(points), addresses)
+        self.assertEqual(points["7 Elm Ave, Airdrie"], points["7 elm avenue, airdrie"])
+        self.assertIsNone(points["1 Nowhere Rd, Calgary"])
+        self.assertEqual(sorted(self.sent()), ["1 Nowhere Rd, Calgary", "7 Elm Ave, Airdrie"])
+        stats = self.cache.get_stats()
+        # Warming stored[0] read it from the table too
+        self.assertEqual((stats['memory_hits'], stats['db_hits'], stats['misses']), (1, 5, 2))
+        self.assertEqual(GeocodeCacheEntry.objects.count(), 7)
+
+
+@override_settings(GEOCODE_RATE_LIMIT=0, DISTANCE_MATRIX_GRID=0.001)
+class DistanceMatrixTests(TestCase):
+    def setUp(self):
+        geocode_cache.clear()
+        self.addCleanup(geocode_cache.clear)
+        self.matrix = DistanceMatrixCache()
+
+    def test_points_in_one_grid_cell_share_a_distance(self):
+        origin, nearby_origin = (51.0450, -114.0700), (51.04502, -114.07003)
+        destination, nearby_destination = (51.0800, -114.1000), (51.08004, -114.09998)
+        self.assertEqual(grid_cell(origin), "0.001:51045:-114070")
+        self.assertEqual(grid_cell(origin), grid_cell(nearby_origin))
+        self.assertNotEqual(grid_cell(origin), grid_cell((51.0460, -114.0700)))
+
+        distance_km = self.matrix.get_distance(origin, destination)
+        self.assertEqual(distance_km, driving_distance(origin, destination))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.matrix.get_distance(nearby_origin, nearby_destination), distance_km)
+
+        # A fresh process reads the pair back from the table
+        other = DistanceMatrixCache()
+        with self.assertNumQueries(1):
+            self.assertEqual(other.get_distance(nearby_origin, destination), distance_km)
+
+        self.assertEqual(DistanceMatrixEntry.objects.count(), 1)
+        self.assertEqual(
+            [self.matrix.get_stats()[key] for key in ('memory_hits', 'db_hits', 'misses')], [1, 0, 1]
+        )
+        self.assertEqual(other.get_stats()['db_hits'], 1)
+
+    def test_prefetch_loads_every_pair(self):
+        geocoder = StubGeocoder()
+        origin = "1 Centre St, Calgary"
+        destinations = [f"{n} Main St, Calgary" for n in range(6)] + ["5 main street, calgary", "1 Nowhere Rd, Calgary"]
+
+        self.assertEqual(self.matrix.prefetch(origin, destinations, geocoder.geocode), 6)
+        self.assertEqual(DistanceMatrixEntry.objects.count(), 6)
+        self.assertEqual(self.matrix.get_stats()['misses'], 6)
+
+        points = geocode_cache.get_many([origin] + destinations[:6], geocoder.geocode)
+        with self.assertNumQueries(0):
+            for address in destinations[:6]:
+                self.assertEqual(
+                    self.matrix.get_distance(points[origin], points[address]),
+                    driving_distance(points[origin], points[address])
+                )
+
+        # Stored pairs are read DB_LOOKUP_BATCH_SIZE destinations at a time
+        other = DistanceMatrixCache()
+        with mock.patch.object(geocoding, 'DB_LOOKUP_BATCH_SIZE', 2), self.assertNumQueries(3):
+            self.assertEqual(other.prefetch(origin, destinations, geocoder.geocode), 6)
+        self.assertEqual([other.get_stats()[key] for key in ('db_hits', 'misses')], [6, 0])
+
+
+class TrackingRegistryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="merchant", email="merchant@example.com")
+        self.bulk_upload = BulkShipmentUpload.objects.create(user=self.user)
+
+    def test_resolves_both_types_in_one_query(self):
+        delivery = create_delivery(user=self.user)
+        item = create_bulk_items(self.bulk_upload, 1)[0]
+        TrackingRegistry.register(bulk_items=[item])
+
+        with self.assertNumQueries(1):
+            model_type, shipment = resolve_tracking_id(delivery.tracking_id, fallback=False)
+        self.assertEqual((model_type, shipment.pk), ("PackageDelivery", delivery.pk))
+
+        with self.assertNumQueries(1):
+            model_type, shipment = resolve_tracking_id(item.tracking_id, fallback=False)
+            self.assertEqual(shipment.bulk_upload.user.email, "merchant@example.com")
+        self.assertEqual((model_type, shipment.pk), ("BulkShipmentItem", item.pk))
+
+        self.assertEqual(resolve_tracking_id("ALX-MISSING", fallback=False), (None, None))
+
+    def test_register_is_idempotent_and_fills_missing_ids(self):
+        items = create_bulk_items(self.bulk_upload, 3)
+        # As returned by backends that do not set ids on bulk_create
+        unsaved = [BulkShipmentItem(tracking_id=item.tracking_id) for item in items[:2]]
+
+        TrackingRegistry.register(bulk_items=unsaved)
+        TrackingRegistry.register(bulk_items=items)
+
+        self.assertEqual(
+            dict(TrackingRegistry.objects.values_list('tracking_id', 'bulk_item_id')),
+            {item.tracking_id: item.pk for item in items}
+        )
+
+    def test_fallback_registers_unindexed_shipments(self):
+        item = create_bulk_items(self.bulk_upload, 1)[0]
+
+        self.assertEqual(resolve_tracking_id(item.tracking_id, fallback=False), (None, None))
+        model_type, shipment = resolve_tracking_id(item.tracking_id, fallback=True)
+        self.assertEqual((model_type, shipment.pk), ("BulkShipmentItem", item.pk))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_tracking_id(item.tracking_id, fallback=False)[1].pk, item.pk)
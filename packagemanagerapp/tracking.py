@@ -0,0 +1,82 @@
+import logging
+
+from django.conf import settings
+
+from packagemanagerapp.models import BulkShipmentItem, PackageDelivery, TrackingRegistry
+
+logger = logging.getLogger(__name__)
+
+
+def registry_fallback_enabled():
+    """Whether tracking IDs missing from the registry are looked up in both tables"""
+    return getattr(settings, 'TRACKING_REGISTRY_FALLBACK', True)
+
+
+def resolve_tracking_id(tracking_id, fallback=None):
+    """
+    Find the shipment behind a public tracking ID
+
+    Resolved through TrackingRegistry in one indexed query, with the
+    shipment (and for bulk items, the upload and its user) joined in.
+    Shipments created before the registry existed are found with the old
+    two-table lookup and registered, unless TRACKING_REGISTRY_FALLBACK is
+    off (set it once backfill_tracking_registry has run).
+
+    Args:
+        tracking_id (str): Tracking ID (e.g. 'ALX-1A2B3C4D5E')
+        fallback (bool): Override TRACKING_REGISTRY_FALLBACK (optional)
+
+    Returns:
+        tuple: (model_type: str|None, shipment: PackageDelivery|BulkShipmentItem|None)
+    """
+    try:
+        entry = TrackingRegistry.objects.select_related(
+            'package',
+            'bulk_item__bulk_upload__user',
+        ).get(tracking_id=tracking_id)
+        return entry.model_type, entry.shipment
+    except TrackingRegistry.DoesNotExist:
+        pass
+
+    if fallback is None:
+        fallback = registry_fallback_enabled()
+    if not fallback:
+        return None, None
+
+    package = PackageDelivery.objects.filter(tracking_id=tracking_id).first()
+    if package is not None:
+        TrackingRegistry.register(packages=[package])
+        return "PackageDelivery", package
+
+    bulk_item = BulkShipmentItem.objects.select_related('bulk_upload__user').filter(
+        tracking_id=tracking_id
+    ).first()
+    if bulk_item is not None:
+        TrackingRegistry.register(bulk_items=[bulk_item])
+        return "BulkShipmentItem", bulk_item
+
+    return None, None
+
+
+def resolve_tracking_status(tracking_id):
+    """
+    Current status of the shipment behind a tracking ID
+
+    Reads only the two status columns through TrackingRegistry, for callers
+    such as the live tracking streams that need no other fields. Falls back
+    to resolve_tracking_id() for shipments missing from the registry.
+
+    Returns:
+        tuple: (model_type: str|None, status: str|None)
+    """
+    entry = TrackingRegistry.objects.filter(tracking_id=tracking_id).values_list(
+        'package__status', 'bulk_item__status'
+    ).first()
+    if entry is not None:
+        package_status, bulk_item_status = entry
+        if package_status is not None:
+            return "PackageDelivery", package_status
+        return "BulkShipmentItem", bulk_item_status
+
+    model_type, shipment = resolve_tracking_id(tracking_id)
+    return model_type, shipment.status if shipment is not None else None
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_CACHE_ALIAS = 'default'
+KEY_PREFIX = 'tracking-response'
+
+
+def _backend():
+    return caches[getattr(settings, 'TRACKING_CACHE_ALIAS', DEFAULT_CACHE_ALIAS)]
+
+
+def _ttl():
+    return int(getattr(settings, 'TRACKING_CACHE_TTL', DEFAULT_TTL_SECONDS))
+
+
+def tracking_cache_key(tracking_id):
+    return f"{KEY_PREFIX}:{tracking_id}"
+
+
+def make_etag(data):
+    """Strong ETag for a serialized tracking response"""
+    body = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+    return quote_etag(hashlib.sha256(body.encode('utf-8')).hexdigest()[:32])
+
+
+def etag_matches(etag, if_none_match):
+    """Whether an If-None-Match header value covers ``etag``"""
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    # Weak comparison, as If-None-Match requires
+    return '*' in etags or etag in etags or f'W/{etag}' in etags
+
+
+def get_cached_tracking(tracking_id):
+    """
+    Cached (etag, data) for a tracking page, or None
+
+    Returns:
+        tuple|None: (etag: str, data: dict)
+    """
+    if _ttl() <= 0:
+        return None
+    try:
+        return _backend().get(tracking_cache_key(tracking_id))
+    except Exception as e:
+        logger.warning(f"Tracking cache read failed: {str(e)}")
+        return None
+
+
+def cache_tracking(tracking_id, data):
+    """
+    Store a rendered tracking response
+
+    Returns:
+        str: The response ETag
+    """
+    data = dict(data)
+    etag = make_etag(data)
+    ttl = _ttl()
+    if ttl > 0:
+        try:
+            _backend().set(tracking_cache_key(tracking_id), (etag, data), ttl)
+        except Exception as e:
+            logger.warning(f"Tracking cache write failed: {str(e)}")
+    return etag
+
+
+def invalidate_tracking(tracking_ids):
+    """
+    Drop cached tracking pages once the current transaction commits
+
+    Deleting only after commit stops a concurrent request from caching the
+    pre-update rows again. A request that read the rows just before the
+    commit can still store them afterwards; those entries expire after
+    TRACKING_CACHE_TTL.
+
+    Args:
+        tracking_ids (iterable): Tracking IDs whose pages changed
+    """
+    keys = [tracking_cache_key(tracking_id) for tracking_id in tracking_ids if tracking_id]
+    if not keys:
+        return
+
+    def delete():
+        try:
+            _backend().delete_many(keys)
+        except Exception as e:
+            logger.warning(f"Tracking cache invalidation failed: {str(e)}")
+
+    transaction.on_commit(delete)
@@ -0,0 +1,321 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Events a subscriber may have waiting before it is told to reset
+DEFAULT_QUEUE_SIZE = 200
+
+DEFAULT_REDIS_CHANNEL = 'alalax-tracking-events'
+
+# Seconds between comment lines that keep idle streams open through proxies
+DEFAULT_KEEPALIVE = 15
+
+# Streams are closed after this long; EventSource reconnects by itself
+DEFAULT_MAX_STREAM_SECONDS = 3600
+
+# Milliseconds EventSource waits before reconnecting
+RECONNECT_DELAY_MS = 3000
+
+# Put in a subscriber's queue in place of the events it could not keep up with
+RESET = object()
+
+_lock = threading.Lock()
+_bus = None
+
+
+def tracking_topic(tracking_id):
+    return f"tracking:{tracking_id}"
+
+
+def merchant_topic(user_id):
+    return f"merchant:{user_id}"
+
+
+def status_event(event_type, tracking_id, status, previous_status=None, user_id=None, **extra):
+    """
+    Status change event for the subscribers of a tracking ID and its merchant
+
+    Returns:
+        tuple: (topics: list, event: dict)
+    """
+    topics = [tracking_topic(tracking_id)]
+    if user_id:
+        topics.append(merchant_topic(user_id))
+    event = {
+        "type": event_type,
+        "tracking_id": tracking_id,
+        "status": status,
+        "previous_status": previous_status,
+        "timestamp": timezone.now().isoformat(),
+        **extra,
+    }
+    return topics, event
+
+
+class Subscription:
+    """
+    Events for a set of topics, read by one stream on its event loop
+
+    Events are handed over with call_soon_threadsafe, so publishers on any
+    thread never block on a slow reader. A reader that falls
+    TRACKING_STREAM_QUEUE_SIZE events behind gets RESET instead and should
+    reload the current state.
+    """
+
+    def __init__(self, bus, topics, loop, queue_size):
+        self.bus = bus
+        self.topics = tuple(topics)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def deliver(self, event):
+        """Queue ``event``; only call on ``self.loop``"""
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET)
+
+    async def get(self, timeout=None):
+        """Next event, RESET, or None when nothing arrived within ``timeout`` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _deliver_batch(batch):
+    for subscription, event in batch:
+        subscription.deliver(event)
+
+
+class InProcessEventBus:
+    """
+    Fans events out to the subscribers in this process
+
+    Subscribers are kept in a topic -> subscriptions map, so an idle
+    subscriber costs a map entry and an empty queue, and publishing an event
+    touches only the subscribers of its topics. Deliveries are grouped into
+    one callback per event loop.
+    """
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or int(getattr(settings, 'TRACKING_STREAM_QUEUE_SIZE', DEFAULT_QUEUE_SIZE))
+        self._lock = threading.Lock()
+        self._topics = {}
+
+    def subscribe(self, topics):
+        """Subscribe the running event loop to ``topics``"""
+        subscription = Subscription(self, topics, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            for topic in subscription.topics:
+                self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._topics[topic]
+
+    def subscriber_count(self, topic=None):
+        with self._lock:
+            if topic is not None:
+                return len(self._topics.get(topic, ()))
+            return len({subscription for subscribers in self._topics.values() for subscription in subscribers})
+
+    def publish(self, events):
+        """
+        Send events to their topics' subscribers; safe to call from any thread
+
+        Args:
+            events (iterable): (topics, event) pairs as built by status_event()
+        """
+        self.dispatch(events)
+
+    def dispatch(self, events):
+        by_loop = {}
+        with self._lock:
+            for topics, event in events:
+                # A subscriber to several of the event's topics gets it once
+                receivers = set()
+                for topic in topics:
+                    receivers.update(self._topics.get(topic, ()))
+                for subscription in receivers:
+                    by_loop.setdefault(subscription.loop, []).append((subscription, event))
+
+        for loop, batch in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver_batch, batch)
+            except RuntimeError:
+                # The loop has shut down; its streams are gone
+                for subscription, _ in batch:
+                    subscription.close()
+
+
+class RedisEventBus(InProcessEventBus):
+    """
+    Shares events between processes through a Redis pub/sub channel
+
+    Events are published to Redis only. Every process runs one listener
+    thread that receives all events and fans them out to its own
+    subscribers, so WSGI workers and the management commands can publish to
+    streams served by the ASGI processes.
+    """
+
+    def __init__(self, url=None, channel=None, queue_size=None):
+        super().__init__(queue_size=queue_size)
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("TRACKING_EVENT_BACKEND 'redis' needs the redis package")
+        self.channel = channel or getattr(settings, 'TRACKING_EVENT_REDIS_CHANNEL', DEFAULT_REDIS_CHANNEL)
+        self._client = redis.Redis.from_url(url or settings.TRACKING_EVENT_REDIS_URL)
+        self._listener = None
+
+    def subscribe(self, topics):
+        self._start_listener()
+        return super().subscribe(topics)
+
+    def publish(self, events):
+        events = [[list(topics), event] for topics, event in events]
+        if events:
+            self._client.publish(self.channel, json.dumps(events, cls=DjangoJSONEncoder))
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='tracking-events', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        delay = 1
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                delay = 1
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        self.dispatch(json.loads(message['data']))
+            except Exception as e:
+                logger.warning(f"Tracking event listener lost Redis, retrying in {delay}s: {str(e)}")
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+
+
+def build_event_bus():
+    """
+    Build the bus selected by TRACKING_EVENT_BACKEND
+
+    'memory' (events stay in this process), 'redis', or the dotted path of
+    a class with the InProcessEventBus interface.
+    """
+    backend = getattr(settings, 'TRACKING_EVENT_BACKEND', 'memory')
+    if backend == 'memory':
+        return InProcessEventBus()
+    if backend == 'redis':
+        return RedisEventBus()
+    return import_string(backend)()
+
+
+def get_event_bus():
+    """The process-wide event bus, built on first use"""
+    global _bus
+
+    if _bus is None:
+        with _lock:
+            if _bus is None:
+                _bus = build_event_bus()
+    return _bus
+
+
+def publish_on_commit(events, using=None):
+    """
+    Publish events once the current transaction commits
+
+    Subscribers then only hear about changes they can read back, and
+    nothing is sent for a transaction that rolls back.
+
+    Args:
+        events (iterable): (topics, event) pairs as built by status_event()
+    """
+    events = list(events)
+    if not events:
+        return
+
+    def publish():
+        try:
+            get_event_bus().publish(events)
+        except Exception as e:
+            logger.warning(f"Publishing {len(events)} tracking events failed: {str(e)}")
+
+    transaction.on_commit(publish, using=using)
+
+
+def format_sse(data, event=None):
+    """One server-sent event"""
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data, cls=DjangoJSONEncoder)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def event_stream(topics, load_snapshot=None, keepalive=None, max_seconds=None):
+    """
+    Server-sent events for ``topics`` until the client leaves or max_seconds pass
+
+    ``load_snapshot`` (a coroutine function returning the current state) is
+    awaited after subscribing, so no change made in between is missed.
+    Events are not replayed on reconnect; the client gets a fresh snapshot
+    instead. After a RESET the stream sends a 'reset' event and closes.
+    """
+    keepalive = keepalive or float(getattr(settings, 'TRACKING_STREAM_KEEPALIVE', DEFAULT_KEEPALIVE))
+    max_seconds = max_seconds or float(getattr(settings, 'TRACKING_STREAM_MAX_SECONDS', DEFAULT_MAX_STREAM_SECONDS))
+    deadline = time.monotonic() + max_seconds
+
+    with get_event_bus().subscribe(topics) as subscription:
+        yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+        if load_snapshot is not None:
+            yield format_sse(await load_snapshot(), event="snapshot")
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            event = await subscription.get(timeout=min(keepalive, remaining))
+            if event is None:
+                yield ": keepalive\n\n"
+            elif event is RESET:
+                yield format_sse({"reason": "Too many events; reload and reconnect"}, event="reset")
+                break
+            else:
+                yield format_sse(event, event=event["type"])
@@ -7,6 +7,7 @@ urlpatterns = [
     path('updatepackagestatus/<str:tracking_id>/status', views.update_package_status),
     path('shippingquote', views.submit_quote),
     path('track/<str:tracking_id>', views.get_delivery_order_details),
+    path('track/<str:tracking_id>/events', views.stream_tracking_events, name='stream_tracking_events'),
     path('history', views.user_delivery_history, name='user-delivery-history'),
     path('deliverypackages', views.list_package_deliveries),
     path("deliverypackages/latest", views.list_latest_package_deliveries,name="latest-package-deliveries"),
@@ -34,10 +35,14 @@ urlpatterns = [
     
     # merchant endpoints
     path('merchantdeliverylist', views.delivery_history_view, name='delivery_history_view'),
+    path('merchantdeliverylist/events', views.stream_merchant_events, name='stream_merchant_events'),
     path('latestmerchantdeliverylist', views.latest_delivery_requests_view, name='latest_delivery_requests_view'),
     path('billinghistory', views.billing_history_view, name='billing_history_view'),
     path('bulkbillinghistory', views.bulk_billing_history_view, name='bulk_billing_history_view'),
     path('notifications/', views.get_notifications, name='get_notifications'),
+    path('notifications/unread-count/', views.get_unread_notification_count, name='unread_notification_count'),
+    path('notifications/read-all/', views.mark_all_notifications_as_read, name='mark_all_notifications_read'),
+    path('notifications/bulk/', views.create_bulk_notifications, name='create_bulk_notifications'),
     path('notifications/<int:notification_id>/read/', views.mark_notification_as_read, name='mark_notification_read'),
     path('notifications/<int:notification_id>/', views.delete_notification, name='delete_notification'),
     # 
@@ -53,6 +58,9 @@ urlpatterns = [
     # List all bulk shipments
     path('allbulk-shipment/list/', views.get_alluser_bulk_shipments, name='get_alluser_bulk_shipments'),
     
+    # Processing progress of a queued upload
+    path('bulk-shipment/<str:bulk_tracking_id>/progress/', views.get_bulk_shipment_progress, name='get_bulk_shipment_progress'),
+    
     # Get specific bulk shipment for user
     path('bulk-shipment/<str:bulk_tracking_id>/', views.get_bulk_shipment, name='get_bulk_shipment'),
     
@@ -1,4 +1,9 @@
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from django.shortcuts import render
 from rest_framework.permissions import AllowAny
 # Create your views here.
@@ -11,13 +16,32 @@ from drf_yasg.utils import swagger_auto_schema
 from django.shortcuts import get_object_or_404
 from django.db import transaction
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Count
+from django.db.models import Count, Prefetch, Q, Sum
 from onboarding.serializer import *
-from packagemanagerapp.bulkdeliverycalculator import BulkDeliveryFeeCalculator
-from packagemanagerapp.calculatedeliverydetails import DeliveryFeeCalculator
-from packagemanagerapp.utils import send_multicast_notification, send_push_notification
+from packagemanagerapp.bulkshipmentjobs import (
+    enqueue_bulk_shipment_job,
+    get_job_progress,
+    should_process_async,
+)
+from packagemanagerapp.bulkshipmentprocessor import (
+    MINIMUM_SHIPMENTS,
+    BulkShipmentFileError,
+    count_csv_rows,
+    iter_csv_rows,
+    prefetch_csv_distances,
+    process_bulk_shipment_rows,
+)
+from packagemanagerapp.calculatorregistry import get_bulk_calculator, get_delivery_calculator
+from packagemanagerapp.pagination import PAGINATION_PARAMETERS, InvalidCursor, paginate_queryset
+from packagemanagerapp.pushoutbox import enqueue_push_to_users
+from packagemanagerapp.quotecache import quote_cache
+from packagemanagerapp.statustransitions import transition_bulk_items
+from packagemanagerapp.tracking import resolve_tracking_id, resolve_tracking_status
+from packagemanagerapp.trackingcache import cache_tracking, etag_matches, get_cached_tracking
+from packagemanagerapp.trackingevents import event_stream, merchant_topic, tracking_topic
 from .serializers import *
 from .models import *
 import stripe
@@ -29,13 +53,10 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from datetime import timezone as dt_timezone
 from django.utils import timezone 
-from django.db.models.functions import TruncMonth
 from django.views.decorators.http import require_http_methods
 import json
 from .models import FCMToken
-from .firebase_config import get_messaging
 import csv
-import io
 from decimal import Decimal
 import logging
 from .serializers import GenericResponseSerializer
@@ -99,7 +120,7 @@ def create_package_delivery(request):
         package_weight = weight_mapping.get(weight_range, 10)
         
         # Calculate delivery fee
-        calculator = DeliveryFeeCalculator()
+        calculator = get_delivery_calculator()
         fee_result = calculator.get_delivery_quote(
             pickup_address=pickup_location,
             delivery_address=delivery_location,
@@ -268,9 +289,11 @@ def calculate_delivery_fee(request):
             addons.append('oversized_package')
         addons = serializer.get_addons_list()
         
-        # Calculate delivery fee
-        calculator = DeliveryFeeCalculator()
-        fee_result = calculator.get_delivery_quote(
+        # Calculate delivery fee (repeat requests from the quote form are
+        # served from the quote cache)
+        calculator = get_delivery_calculator()
+        fee_result = quote_cache.get_quote(
+            calculator,
             pickup_address=pickup_location,
             delivery_address=delivery_location,
             package_weight=get_weight_range(package_weight),
@@ -503,7 +526,7 @@ def create_package_delivery_mobile(request):
     weight_range = get_weight_range(weight_kg)
     
     # Calculate delivery fee
-    calculator = DeliveryFeeCalculator()
+    calculator = get_delivery_calculator()
     fee_result = calculator.get_delivery_quote(
         pickup_address=pickup_location,
         delivery_address=delivery_location,
@@ -647,20 +670,13 @@ def update_package_status(request, tracking_id):
     """
     Update status for both regular PackageDelivery and BulkShipmentItem
     """
-    # Try to find the package in PackageDelivery first
-    try:
-        package = PackageDelivery.objects.get(tracking_id=tracking_id)
-        model_type = "PackageDelivery"
-    except PackageDelivery.DoesNotExist:
-        # If not found, try BulkShipmentItem
-        try:
-            package = BulkShipmentItem.objects.get(tracking_id=tracking_id)
-            model_type = "BulkShipmentItem"
-        except BulkShipmentItem.DoesNotExist:
-            return Response(
-                {"error": f"No package found with tracking ID: {tracking_id}"},
-                status=status.HTTP_404_NOT_FOUND
-            )
+    # Single registry lookup tells which model the tracking ID belongs to
+    model_type, package = resolve_tracking_id(tracking_id)
+    if package is None:
+        return Response(
+            {"error": f"No package found with tracking ID: {tracking_id}"},
+            status=status.HTTP_404_NOT_FOUND
+        )
     
     # Prepare the status update
     updateStatus = {'status': request.data}
@@ -766,8 +782,10 @@ def update_selective_bulk_shipments(request, bulk_tracking_id):
             else:
                 shipment_items = bulk_upload.shipment_items.all()
             
-            updated_count = shipment_items.update(
-                status=new_status,
+            updated_count = transition_bulk_items(
+                shipment_items,
+                new_status,
+                updated_by=request.user,
                 is_valid=True,
                 validation_error=None
             )
@@ -796,31 +814,21 @@ def update_selective_bulk_shipments(request, bulk_tracking_id):
 def update_bulk_upload_status(bulk_upload):
     """
     Helper function to intelligently update bulk upload status based on all shipment items
-    """
-    shipment_items = bulk_upload.shipment_items.all()
     
-    # Get all statuses (excluding PENDING, VALID, INVALID)
-    statuses = shipment_items.exclude(
-        status__in=['PENDING', 'VALID', 'INVALID']
-    ).values_list('status', flat=True)
+    Derived from the upload's per-status item counters, which item
+    transitions keep current, so the cost does not grow with the upload.
+    """
+    bulk_upload.refresh_from_db(fields=list(BulkShipmentUpload.STATUS_COUNTER_FIELDS.values()))
     
-    if not statuses:
+    new_status = bulk_upload.rollup_status()
+    if new_status is None:
         # No valid delivery statuses yet
         return
+    if new_status == bulk_upload.status:
+        return
     
-    # Determine overall status based on items
-    if all(s == "DELIVERED" for s in statuses):
-        bulk_upload.status = "DELIVERED"
-    elif any(s == "OUT_FOR_DELIVERY" for s in statuses):
-        bulk_upload.status = "OUT_FOR_DELIVERY"
-    elif any(s == "IN_TRANSIT" for s in statuses):
-        bulk_upload.status = "IN_TRANSIT"
-    elif any(s == "PICKED_UP" for s in statuses):
-        bulk_upload.status = "PICKED_UP"
-    else:
-        bulk_upload.status = "NOT_PICKED_UP"
-    
-    bulk_upload.save()
+    bulk_upload.status = new_status
+    bulk_upload.save(update_fields=['status', 'updated_at'])
 
 
 @swagger_auto_schema(
@@ -836,31 +844,38 @@ def update_bulk_upload_status(bulk_upload):
 def get_delivery_order_details(request, tracking_id):
     """
     Retrieve delivery order details using tracking ID.
-    Searches both PackageDelivery and BulkShipmentItem models.
+    Covers both PackageDelivery and BulkShipmentItem models.
+    
+    Rendered pages are cached per tracking ID until the shipment changes;
+    a matching If-None-Match gets 304 without touching the database.
     """
-    # First, try to find in PackageDelivery
-    try:
-        delivery = PackageDelivery.objects.get(tracking_id=tracking_id)
-        serializer = DeliveryOrderDetailSerializer(delivery)
-        return Response(
-            serializer.data,
-            status=status.HTTP_200_OK
-        )
-    except PackageDelivery.DoesNotExist:
-        pass
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    cached = get_cached_tracking(tracking_id)
+    if cached is not None:
+        etag, data = cached
+        if etag_matches(etag, if_none_match):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return Response(data, status=status.HTTP_200_OK, headers={'ETag': etag})
     
-    # If not found, try BulkShipmentItem
-    try:
-        bulk_item = BulkShipmentItem.objects.select_related('bulk_upload__user').get(
-            tracking_id=tracking_id
-        )
-        serializer = BulkShipmentItemDetailSerializer(bulk_item)
+    model_type, shipment = resolve_tracking_id(tracking_id)
+    
+    if model_type == "PackageDelivery":
+        serializer = DeliveryOrderDetailSerializer(shipment)
+    elif model_type == "BulkShipmentItem":
+        serializer = BulkShipmentItemDetailSerializer(shipment)
+    else:
+        serializer = None
+    
+    if serializer is not None:
+        data = serializer.data
+        etag = cache_tracking(tracking_id, data)
+        if etag_matches(etag, if_none_match):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
         return Response(
-            serializer.data,
-            status=status.HTTP_200_OK
+            data,
+            status=status.HTTP_200_OK,
+            headers={'ETag': etag}
         )
-    except BulkShipmentItem.DoesNotExist:
-        pass
     
     # If not found in either model, return 404
     return Response(
@@ -870,6 +885,115 @@ def get_delivery_order_details(request, tracking_id):
         },
         status=status.HTTP_404_NOT_FOUND
     )
+
+
+def streaming_unsupported(request):
+    """
+    501 for stream requests that reached a WSGI worker, which would buffer
+    the stream until it ends; None under ASGI
+    """
+    if isinstance(request, ASGIRequest):
+        return None
+    return JsonResponse(
+        {
+            "error": "Live tracking unavailable",
+            "detail": "Event streams are only served by the ASGI application"
+        },
+        status=status.HTTP_501_NOT_IMPLEMENTED
+    )
+
+
+def sse_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def tracking_snapshot(tracking_id):
+    """Current status of a shipment for a live tracking stream, or None"""
+    model_type, shipment_status = resolve_tracking_status(tracking_id)
+    if model_type is None:
+        return None
+    return {"tracking_id": tracking_id, "type": model_type, "status": shipment_status}
+
+
+@require_http_methods(["GET"])
+async def stream_tracking_events(request, tracking_id):
+    """
+    Server-sent events with the status changes of one shipment
+
+    Replaces polling get_delivery_order_details. Sends a 'snapshot' event
+    with the current status, then a 'delivery_status' or 'bulk_item_status'
+    event for every change. Served only under ASGI (alalax_be/asgi.py).
+    """
+    unsupported = streaming_unsupported(request)
+    if unsupported is not None:
+        return unsupported
+
+    if await sync_to_async(tracking_snapshot)(tracking_id) is None:
+        return JsonResponse(
+            {
+                "error": "Tracking ID not found",
+                "detail": f"No delivery found with tracking ID: {tracking_id}"
+            },
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    async def load_snapshot():
+        return await sync_to_async(tracking_snapshot)(tracking_id)
+
+    return sse_response(event_stream([tracking_topic(tracking_id)], load_snapshot))
+
+
+def authenticate_stream(request):
+    """
+    User of a JWT from the Authorization header or, since EventSource cannot
+    send headers, the ?token= query parameter
+    """
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header else request.GET.get('token', '').encode()
+    if not raw_token:
+        raise AuthenticationFailed("Authentication credentials were not provided")
+    return authenticator.get_user(authenticator.get_validated_token(raw_token))
+
+
+def merchant_snapshot(user):
+    """Dashboard delivery counts sent when a merchant stream opens"""
+    return {"statistics": MerchantDeliveryStats.for_user(user.id)}
+
+
+@require_http_methods(["GET"])
+async def stream_merchant_events(request):
+    """
+    Server-sent events with the status changes of a merchant's shipments
+
+    Replaces polling delivery_history_view. Every delivery and bulk item
+    change of the authenticated merchant is sent as it happens. Served only
+    under ASGI (alalax_be/asgi.py).
+    """
+    unsupported = streaming_unsupported(request)
+    if unsupported is not None:
+        return unsupported
+
+    try:
+        user = await sync_to_async(authenticate_stream)(request)
+    except (AuthenticationFailed, InvalidToken, TokenError) as e:
+        return JsonResponse(
+            {
+                "status": status.HTTP_401_UNAUTHORIZED,
+                "message": "Authentication failed",
+                "errors": {"token": str(e)}
+            },
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    async def load_snapshot():
+        return await sync_to_async(merchant_snapshot)(user)
+
+    return sse_response(event_stream([merchant_topic(user.id)], load_snapshot))
     
     
 
@@ -981,7 +1105,7 @@ def submit_quote(request):
         package_weight = weight_mapping.get(weight_range, 10)
         
         # Calculate delivery fee
-        calculator = DeliveryFeeCalculator()
+        calculator = get_delivery_calculator()
         fee_result = calculator.get_delivery_quote(
             pickup_address=pickup_location,
             delivery_address=delivery_location,
@@ -1243,7 +1367,9 @@ def user_delivery_history(request):
     deliveries = (
         PackageDelivery.objects
         .filter(user=user)
-        .prefetch_related('status_history')
+        .prefetch_related(
+            Prefetch('status_history', queryset=DeliveryStatusHistory.objects.order_by('timestamp'))
+        )
         .order_by('-created_at')
     )
 
@@ -1252,8 +1378,8 @@ def user_delivery_history(request):
     for delivery in deliveries:
         events = []
 
-        # Status history (already ordered by -timestamp)
-        history = delivery.status_history.all().order_by('timestamp')
+        # Status history, prefetched oldest first
+        history = delivery.status_history.all()
 
         for item in history:
             timestamp = timezone.localtime(item.timestamp)
@@ -1291,13 +1417,14 @@ def user_delivery_history(request):
 @swagger_auto_schema(
     method='get',
     tags=['Package'],
+    manual_parameters=PAGINATION_PARAMETERS,
 )
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def list_package_deliveries(request):
     """
-    Returns all package delivery requests for the authenticated user,
-    grouped as:
+    Returns one page of package delivery requests for the authenticated user,
+    newest first, grouped as:
     - pickup_information
     - delivery_information
     - package_information
@@ -1305,13 +1432,17 @@ def list_package_deliveries(request):
     """
 
     # deliveries = PackageDelivery.objects.filter(user=request.user)
-    deliveries = PackageDelivery.objects.all()
+    try:
+        deliveries, pagination = paginate_queryset(request, PackageDelivery.objects.all())
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     serializer = PackageDeliveryListSerializer(deliveries, many=True)
 
     return Response(
         {
-            "count": deliveries.count(),
+            "count": len(deliveries),
+            "pagination": pagination,
             "data": serializer.data
         },
         status=status.HTTP_200_OK
@@ -1362,56 +1493,124 @@ def delivery_statistics(request):
     - pending (not completed) deliveries
     """
 
-    total_deliveries = PackageDelivery.objects.count()
-    completed_deliveries = PackageDelivery.objects.filter(
-        status="DELIVERED"
-    ).count()
-    pending_deliveries = PackageDelivery.objects.exclude(
-        status="DELIVERED"
-    ).count()
+    # All three counts in one query
+    counts = PackageDelivery.objects.aggregate(
+        total_deliveries=Count('id'),
+        completed_deliveries=Count('id', filter=Q(status="DELIVERED")),
+        pending_deliveries=Count('id', filter=~Q(status="DELIVERED")),
+    )
 
     return Response(
         {
-            "total_deliveries": total_deliveries,
-            "completed_deliveries": completed_deliveries,
-            "pending_deliveries": pending_deliveries,
+            "total_deliveries": counts["total_deliveries"],
+            "completed_deliveries": counts["completed_deliveries"],
+            "pending_deliveries": counts["pending_deliveries"],
         },
         status=status.HTTP_200_OK
     )
 
 
 
+# Admin user listings: output key -> (values() lookups, formatter)
+def _joined(*parts):
+    return ", ".join(parts) if parts[0] is not None else None
+
+
+REGULAR_USER_COLUMNS = {
+    "id": (("user_id",), str),
+    "firstName": (("firstname",), None),
+    "lastName": (("lastname",), None),
+    "email": (("email",), None),
+    "phone": (("phone_number",), None),
+    "address": (
+        (
+            "user__regular_address__home_address",
+            "user__regular_address__city",
+            "user__regular_address__state",
+        ),
+        _joined,
+    ),
+    "emailVerificationStatus": (("emailVerificationStatus",), None),
+}
+
+DRIVER_COLUMNS = {
+    "id": (("user_id",), str),
+    "firstName": (("firstname",), None),
+    "lastName": (("lastname",), None),
+    "email": (("email",), None),
+    "phone": (("phone_number",), None),
+    "address": (("home_address", "city"), _joined),
+    "emailVerificationStatus": (("emailVerificationStatus",), None),
+}
+
+FIELDS_PARAMETER = openapi.Parameter(
+    'fields',
+    openapi.IN_QUERY,
+    description="Comma-separated output fields to return (default: all)",
+    type=openapi.TYPE_STRING,
+    required=False
+)
+
+
+def paginate_columns(request, queryset, columns):
+    """
+    One page of ``queryset`` as dicts holding the ``?fields=`` columns
+    
+    Only the database columns behind the requested fields are selected, in
+    a single values() query (relations are joined, not fetched per row).
+    
+    Raises:
+        ValueError: If ``?fields=`` names an unknown field or the cursor is invalid
+    """
+    requested = request.GET.get('fields')
+    if requested:
+        names = [name.strip() for name in requested.split(',') if name.strip()]
+        unknown = [name for name in names if name not in columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    else:
+        names = list(columns)
+
+    lookups = {'created_at', 'id'}
+    for name in names:
+        lookups.update(columns[name][0])
+
+    rows, pagination = paginate_queryset(
+        request,
+        queryset.values(*lookups),
+        ordering=('-created_at', '-id')
+    )
+
+    response = []
+    for row in rows:
+        item = {}
+        for name in names:
+            fields, formatter = columns[name]
+            values = [row[field] for field in fields]
+            item[name] = formatter(*values) if formatter else values[0]
+        response.append(item)
+    return response, pagination
+
+
 @swagger_auto_schema(
     tags=["PackageApp"],
     methods=["GET"],
+    manual_parameters=[FIELDS_PARAMETER] + PAGINATION_PARAMETERS,
 )
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_regular_users(request):
-    users = RegularUserProfile.objects.select_related("user")
-
-    response = []
-
-    for profile in users:
-        address = getattr(profile.user, "regular_address", None)
-
-        full_address = None
-        if address:
-            full_address = f"{address.home_address}, {address.city}, {address.state}"
-
-        response.append({
-            "id": str(profile.user.id),
-            "firstName": profile.firstname,
-            "lastName": profile.lastname,
-            "email": profile.email,
-            "phone": profile.phone_number,
-            "address": full_address,
-            "emailVerificationStatus": profile.emailVerificationStatus,
-        })
+    try:
+        response, pagination = paginate_columns(
+            request, RegularUserProfile.objects.all(), REGULAR_USER_COLUMNS
+        )
+    except ValueError as e:
+        return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     return Response(
         {
             "data": response,
+            "pagination": pagination,
             "message": "Users fetched successfully"
         },
         status=status.HTTP_200_OK
@@ -1428,36 +1627,13 @@ def get_regular_users(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_merchant_users(request):
-    merchants = MerchantProfile.objects.select_related("user")
-
-    six_months_ago = timezone.now() - timedelta(days=180)
-    response = []
-
-    for merchant in merchants:
-        deliveries = (
-            PackageDelivery.objects
-            .filter(
-                user=merchant.user,
-                created_at__gte=six_months_ago
-            )
-            .annotate(month=TruncMonth("created_at"))
-            .values("month")
-            .annotate(total=Count("id"))
-        )
-
-        total_deliveries = sum(item["total"] for item in deliveries)
-        average_monthly = round(total_deliveries / 6, 2)
-
-        response.append({
-            "id": str(merchant.user.id),
-            "businessName": merchant.business_name,
-            "businessEmail": merchant.business_email,
-            "businessRegNumber": merchant.business_registration_number,
-            "businessPhone": merchant.business_phone,
-            "industryType": merchant.industry_type,
-            "monthlyOrderVolume": average_monthly,
-            "emailVerificationStatus": merchant.emailVerificationStatus,
-        })
+    """
+    List merchants with their average monthly deliveries over the last six months
+    
+    Built from two queries (merchants, and one delivery count grouped by
+    user) and cached for MERCHANT_USERS_CACHE_TTL seconds.
+    """
+    response = get_cached_merchant_rows()
 
     return Response(
         {
@@ -1468,33 +1644,86 @@ def get_merchant_users(request):
     )
 
 
+MERCHANT_USERS_CACHE_KEY = 'merchant-users'
+
+
+def build_merchant_rows():
+    """Merchant listing rows for get_merchant_users"""
+    six_months_ago = timezone.now() - timedelta(days=180)
+
+    # Deliveries per user over the window; summing monthly buckets gives the same total
+    recent_deliveries = dict(
+        PackageDelivery.objects
+        .filter(created_at__gte=six_months_ago, user__isnull=False)
+        .order_by()
+        .values_list('user_id')
+        .annotate(total=Count('id'))
+    )
+
+    merchants = MerchantProfile.objects.values_list(
+        'user_id',
+        'business_name',
+        'business_email',
+        'business_registration_number',
+        'business_phone',
+        'industry_type',
+        'emailVerificationStatus',
+    )
+
+    response = []
+    for user_id, name, email, reg_number, phone, industry, verified in merchants:
+        response.append({
+            "id": str(user_id),
+            "businessName": name,
+            "businessEmail": email,
+            "businessRegNumber": reg_number,
+            "businessPhone": phone,
+            "industryType": industry,
+            "monthlyOrderVolume": round(recent_deliveries.get(user_id, 0) / 6, 2),
+            "emailVerificationStatus": verified,
+        })
+    return response
+
+
+def get_cached_merchant_rows():
+    """build_merchant_rows(), served from cache for MERCHANT_USERS_CACHE_TTL seconds"""
+    ttl = int(getattr(settings, 'MERCHANT_USERS_CACHE_TTL', 300))
+    if ttl <= 0:
+        return build_merchant_rows()
+
+    try:
+        rows = cache.get(MERCHANT_USERS_CACHE_KEY)
+    except Exception as e:
+        logger.warning(f"Merchant list cache read failed: {str(e)}")
+        rows = None
+    if rows is not None:
+        return rows
+
+    rows = build_merchant_rows()
+    try:
+        cache.set(MERCHANT_USERS_CACHE_KEY, rows, ttl)
+    except Exception as e:
+        logger.warning(f"Merchant list cache write failed: {str(e)}")
+    return rows
+
+
 @swagger_auto_schema(
     tags=["PackageApp"],
     methods=["GET"],
+    manual_parameters=[FIELDS_PARAMETER] + PAGINATION_PARAMETERS,
 )
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_drivers(request):
-    drivers = DriverProfile.objects.select_related("user")
-
-    response = []
-
-    for driver in drivers:
-        address = f"{driver.home_address}, {driver.city}"
-
-        response.append({
-            "id": str(driver.user.id),
-            "firstName": driver.firstname,
-            "lastName": driver.lastname,
-            "email": driver.email,
-            "phone": driver.phone_number,
-            "address": address,
-            "emailVerificationStatus": driver.emailVerificationStatus,
-        })
+    try:
+        response, pagination = paginate_columns(request, DriverProfile.objects.all(), DRIVER_COLUMNS)
+    except ValueError as e:
+        return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     return Response(
         {
             "data": response,
+            "pagination": pagination,
             "message": "Drivers fetched successfully"
         },
         status=status.HTTP_200_OK
@@ -1520,17 +1749,16 @@ def delete_regular_user(request, user_id):
         )
         # return JsonResponse({"error": "Invalid request method"}, status=405)
 
-    try:
-        profile = RegularUserProfile.objects.select_related("user").get(user__id=user_id)
-        profile.user.delete()  # cascades
+    # Delete straight from the filtered queryset (cascades) without loading the profile
+    deleted, _ = User.objects.filter(id=user_id, regularuserprofile__isnull=False).delete()
+    if deleted:
         return Response(
             {
                 "message": "Regular user deleted successfully"
             },
             status=status.HTTP_200_OK
         )
-    except RegularUserProfile.DoesNotExist:
-        
+    else:
         return Response(
             {
                 "status": status.HTTP_400_BAD_REQUEST,
@@ -1558,18 +1786,16 @@ def delete_merchant_user(request, user_id):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    try:
-        merchant = MerchantProfile.objects.select_related("user").get(user__id=user_id)
-        merchant.user.delete()  # cascades
-
+    deleted, _ = User.objects.filter(id=user_id, merchantprofile__isnull=False).delete()
+    if deleted:
+        cache.delete(MERCHANT_USERS_CACHE_KEY)
         return Response(
             {
                 "message": "Merchant deleted successfully"
             },
             status=status.HTTP_200_OK
         )
-    except MerchantProfile.DoesNotExist:
-        
+    else:
         return Response(
             {
                 "status": status.HTTP_400_BAD_REQUEST,
@@ -1597,18 +1823,15 @@ def delete_driver(request, user_id):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    try:
-        driver = DriverProfile.objects.select_related("user").get(user__id=user_id)
-        driver.user.delete()  # cascades
-
+    deleted, _ = User.objects.filter(id=user_id, driverprofile__isnull=False).delete()
+    if deleted:
         return Response(
             {
                 "message": "Driver deleted successfully"
             },
             status=status.HTTP_200_OK
         )
-    except DriverProfile.DoesNotExist:
-        
+    else:
         return Response(
             {
                 "status": status.HTTP_400_BAD_REQUEST,
@@ -1727,7 +1950,7 @@ def stripe_webhook(request):
                 package = PackageDelivery.objects.get(tracking_id=tracking_id)
                 package.payment_status = 'paid'
                 package.stripe_payment_intent_id = payment_intent['id']
-                package.save()
+                package.save(update_fields=['payment_status'])
                 
                 logger.info(f"Payment confirmed for package {tracking_id}")
             except PackageDelivery.DoesNotExist:
@@ -1741,7 +1964,7 @@ def stripe_webhook(request):
             try:
                 package = PackageDelivery.objects.get(tracking_id=tracking_id)
                 package.payment_status = 'failed'
-                package.save()
+                package.save(update_fields=['payment_status'])
                 
                 logger.warning(f"Payment failed for package {tracking_id}")
             except PackageDelivery.DoesNotExist:
@@ -1779,7 +2002,9 @@ def stripe_webhook(request):
 @permission_classes([IsAuthenticated])
 def save_fcm_token(request):
     """
-    Save or update FCM token for authenticated user
+    Register the FCM token of one of the authenticated user's devices
+    
+    Users may be signed in on several devices; each keeps its own token.
     """
     try:
         fcm_token = request.data.get('fcm_token')
@@ -1794,15 +2019,8 @@ def save_fcm_token(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Update or create FCM token for user
-        token_obj, created = FCMToken.objects.update_or_create(
-            user=request.user,
-            defaults={
-                'token': fcm_token,
-                'device_type': device_type,
-                'is_active': True
-            }
-        )
+        # Add this device, or refresh its last-seen time
+        token_obj, created = FCMToken.register(request.user, fcm_token, device_type)
         
         action = 'created' if created else 'updated'
         print(f"✅ FCM Token {action} for user: {request.user.username}")
@@ -1829,6 +2047,12 @@ def save_fcm_token(request):
 @swagger_auto_schema(
     method="post",
     tags=["Push Notifications"],
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'fcm_token': openapi.Schema(type=openapi.TYPE_STRING, description='Token of the device signing out (optional; default all devices)'),
+        },
+    ),
     # responses={
     #     200: openapi.Response(
     #         description="Token deleted successfully",
@@ -1846,9 +2070,16 @@ def save_fcm_token(request):
 def delete_fcm_token(request):
     """
     Delete FCM token when user logs out
+    
+    Only the device whose ``fcm_token`` is sent is removed; without one,
+    every device of the user is.
     """
     try:
-        deleted_count, _ = FCMToken.objects.filter(user=request.user).delete()
+        tokens = FCMToken.objects.filter(user=request.user)
+        fcm_token = request.data.get('fcm_token')
+        if fcm_token:
+            tokens = tokens.filter(token=fcm_token)
+        deleted_count, _ = tokens.delete()
         
         if deleted_count > 0:
             message = "Token deleted successfully"
@@ -1926,10 +2157,9 @@ def send_notification_to_user(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get user's FCM token
-        try:
-            fcm_token_obj = FCMToken.objects.get(user_id=user_id, is_active=True)
-        except FCMToken.DoesNotExist:
+        # Queue for the push dispatcher (manage.py dispatch_push_notifications)
+        queued = enqueue_push_to_users([user_id], title, body, custom_data)
+        if not queued:
             return Response(
                 {
                     "success": False,
@@ -1938,33 +2168,16 @@ def send_notification_to_user(request):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Send notification
-        result = send_push_notification(
-            fcm_token=fcm_token_obj.token,
-            title=title,
-            body=body,
-            data=custom_data
+        return Response(
+            {
+                "success": True,
+                "message": "Notification queued",
+                "data": {
+                    "queued_tokens": queued
+                }
+            },
+            status=status.HTTP_202_ACCEPTED
         )
-        
-        if result['success']:
-            return Response(
-                {
-                    "success": True,
-                    "message": "Notification sent successfully",
-                    "data": {
-                        "message_id": result.get('message_id')
-                    }
-                },
-                status=status.HTTP_200_OK
-            )
-        else:
-            return Response(
-                {
-                    "success": False,
-                    "message": result.get('error')
-                },
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
             
     except Exception as e:
         print(f"❌ Error sending notification: {str(e)}")
@@ -2032,13 +2245,10 @@ def send_notification_to_multiple_users(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get all active FCM tokens for these users
-        fcm_tokens = FCMToken.objects.filter(
-            user_id__in=user_ids,
-            is_active=True
-        ).values_list('token', flat=True)
+        # Queue for the push dispatcher, in multicast batches of 500 tokens
+        queued = enqueue_push_to_users(user_ids, title, body, custom_data)
         
-        if not fcm_tokens:
+        if not queued:
             return Response(
                 {
                     "success": False,
@@ -2047,24 +2257,15 @@ def send_notification_to_multiple_users(request):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Send to multiple devices
-        result = send_multicast_notification(
-            fcm_tokens=list(fcm_tokens),
-            title=title,
-            body=body,
-            data=custom_data
-        )
-        
         return Response(
             {
                 "success": True,
-                "message": f"Notification sent to {result['success_count']} devices",
+                "message": f"Notification queued for {queued} devices",
                 "data": {
-                    "success_count": result['success_count'],
-                    "failure_count": result['failure_count']
+                    "queued_tokens": queued
                 }
             },
-            status=status.HTTP_200_OK
+            status=status.HTTP_202_ACCEPTED
         )
         
     except Exception as e:
@@ -2084,13 +2285,14 @@ def send_notification_to_multiple_users(request):
 @swagger_auto_schema(
     method='get',
     tags=['Package'],
-    operation_description="Returns delivery history for the logged-in merchant user with status timeline"
+    operation_description="Returns delivery history for the logged-in merchant user with status timeline",
+    manual_parameters=PAGINATION_PARAMETERS,
 )
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def delivery_history_view(request):
     """
-    Returns all package deliveries for the logged-in merchant user.
+    Returns package deliveries for the logged-in merchant user, one page at a time.
     Each delivery includes its complete status history timeline.
     
     The response format is designed to work with the React search functionality
@@ -2098,10 +2300,20 @@ def delivery_history_view(request):
     """
     user = request.user
     
-    # Get all deliveries for the logged-in user, ordered by most recent
-    deliveries = PackageDelivery.objects.filter(
-        user=user
-    ).order_by('-created_at')
+    # Get one page of deliveries for the logged-in user, ordered by most recent
+    try:
+        deliveries, pagination = paginate_queryset(
+            request,
+            PackageDeliveryHistorySerializer.setup_eager_loading(
+                PackageDelivery.objects.filter(user=user)
+            ),
+            ordering=('-created_at', '-id')
+        )
+    except InvalidCursor as e:
+        return Response(
+            {"success": False, "message": str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
     # Serialize the data
     serializer = PackageDeliveryHistorySerializer(deliveries, many=True)
@@ -2109,7 +2321,8 @@ def delivery_history_view(request):
     return Response(
         {
             "success": True,
-            "count": deliveries.count(),
+            "count": len(deliveries),
+            "pagination": pagination,
             "data": serializer.data
         },
         status=status.HTTP_200_OK
@@ -2134,8 +2347,8 @@ def latest_delivery_requests_view(request):
     user = request.user
     
     # Get the latest 5 deliveries for the logged-in user
-    deliveries = PackageDelivery.objects.filter(
-        user=user
+    deliveries = PackageDeliveryHistorySerializer.setup_eager_loading(
+        PackageDelivery.objects.filter(user=user)
     ).order_by('-created_at')[:5]
     
     # Serialize the data
@@ -2158,7 +2371,8 @@ def latest_delivery_requests_view(request):
 @swagger_auto_schema(
     method='get',
     tags=['Billing'],
-    operation_description="Returns billing/invoice history for the logged-in merchant user"
+    operation_description="Returns billing/invoice history for the logged-in merchant user",
+    manual_parameters=PAGINATION_PARAMETERS,
 )
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -2177,17 +2391,28 @@ def billing_history_view(request):
     deliveries = PackageDelivery.objects.filter(
         user=user,
         # delivery_fee__isnull=False  # Only include deliveries with fees calculated
-    ).order_by('-edited_at')
+    )
+    try:
+        page, pagination = paginate_queryset(request, deliveries, ordering=('-edited_at', '-id'))
+    except InvalidCursor as e:
+        return Response(
+            {"success": False, "message": str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
     # Serialize the data
-    serializer = BillingHistorySerializer(deliveries, many=True)
+    serializer = BillingHistorySerializer(page, many=True)
+    
+    # Total over all invoices, summed in the database
+    total_amount = deliveries.aggregate(total=Sum('delivery_fee'))['total']
     
     return Response(
         {
             "success": True,
-            "count": deliveries.count(),
-            "total_amount": sum(float(d.delivery_fee or 0) for d in deliveries),
+            "count": len(page),
+            "total_amount": float(total_amount or 0),
             "currency": "CAD",
+            "pagination": pagination,
             "data": serializer.data
         },
         status=status.HTTP_200_OK
@@ -2199,7 +2424,8 @@ def billing_history_view(request):
 @swagger_auto_schema(
     method='get',
     tags=['Billing'],
-    operation_description="Returns bulk shipment billing/invoice history for the logged-in merchant user"
+    operation_description="Returns bulk shipment billing/invoice history for the logged-in merchant user",
+    manual_parameters=PAGINATION_PARAMETERS,
 )
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -2218,17 +2444,28 @@ def bulk_billing_history_view(request):
     deliveries = BulkShipmentUpload.objects.filter(
         user=user,
         # delivery_fee__isnull=False  # Only include deliveries with fees calculated
-    ).order_by('-updated_at')
+    )
+    try:
+        page, pagination = paginate_queryset(request, deliveries, ordering=('-updated_at', '-id'))
+    except InvalidCursor as e:
+        return Response(
+            {"success": False, "message": str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
     # Serialize the data
-    serializer = BulkBillingHistorySerializer(deliveries, many=True)
+    serializer = BulkBillingHistorySerializer(page, many=True)
+    
+    # Total over all invoices, summed in the database
+    total_amount = deliveries.aggregate(total=Sum('total_delivery_fee'))['total']
     
     return Response(
         {
             "success": True,
-            "count": deliveries.count(),
-            "total_amount": sum(float(d.total_delivery_fee or 0) for d in deliveries),
+            "count": len(page),
+            "total_amount": float(total_amount or 0),
             "currency": "CAD",
+            "pagination": pagination,
             "data": serializer.data
         },
         status=status.HTTP_200_OK
@@ -2240,7 +2477,8 @@ def bulk_billing_history_view(request):
 @swagger_auto_schema(
     method="get",
     tags=["Notifications"],
-    operation_description="Get all notifications for the authenticated user",
+    operation_description="Get notifications for the authenticated user, newest first, one page at a time",
+    manual_parameters=PAGINATION_PARAMETERS,
     # responses={
     #     200: openapi.Response(
     #         description="Notifications retrieved successfully",
@@ -2269,12 +2507,14 @@ def bulk_billing_history_view(request):
 @permission_classes([IsAuthenticated])
 def get_notifications(request):
     """
-    Retrieve all notifications for the authenticated user
+    Retrieve one page of notifications for the authenticated user
     """
     try:
-        notifications = MerchantNotification.objects.filter(
-            user=request.user
-        ).order_by('-created_at')
+        notifications, pagination = paginate_queryset(
+            request,
+            MerchantNotification.objects.filter(user=request.user),
+            ordering=('-created_at', '-id')
+        )
         
         serializer = MerchantNotificationSerializer(notifications, many=True)
         
@@ -2283,11 +2523,22 @@ def get_notifications(request):
                 "status": status.HTTP_200_OK,
                 "message": "Notifications retrieved successfully",
                 "data": {
-                    "notifications": serializer.data
+                    "notifications": serializer.data,
+                    "unread_count": NotificationCounter.unread_for(request.user.id),
+                    "pagination": pagination
                 }
             },
             status=status.HTTP_200_OK
         )
+    except InvalidCursor as e:
+        return Response(
+            {
+                "status": status.HTTP_400_BAD_REQUEST,
+                "message": "Failed to retrieve notifications",
+                "errors": {"cursor": str(e)}
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
     except Exception as e:
         return Response(
             {
@@ -2299,6 +2550,136 @@ def get_notifications(request):
         )
 
 
+@swagger_auto_schema(
+    method="get",
+    tags=["Notifications"],
+    operation_description="Number of unread notifications of the authenticated user, for the notification badge",
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_unread_notification_count(request):
+    """
+    Read the user's unread counter, a single-row lookup
+    """
+    try:
+        return Response(
+            {
+                "status": status.HTTP_200_OK,
+                "message": "Unread notification count retrieved successfully",
+                "data": {
+                    "unread_count": NotificationCounter.unread_for(request.user.id)
+                }
+            },
+            status=status.HTTP_200_OK
+        )
+    except Exception as e:
+        return Response(
+            {
+                "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "message": "Failed to retrieve unread notification count",
+                "errors": {"error": str(e)}
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@swagger_auto_schema(
+    method="post",
+    tags=["Notifications"],
+    operation_description="Create the same notification for many users",
+    request_body=BulkNotificationCreateSerializer,
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_bulk_notifications(request):
+    """
+    Notify many users at once; rows are written with bulk_create
+    """
+    serializer = BulkNotificationCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(
+            {
+                "status": status.HTTP_400_BAD_REQUEST,
+                "message": "Validation failed",
+                "errors": serializer.errors
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        data = serializer.validated_data
+        user_ids = list(
+            User.objects.filter(id__in=set(data['user_ids'])).order_by('id').values_list('id', flat=True)
+        )
+        if not user_ids:
+            return Response(
+                {
+                    "status": status.HTTP_404_NOT_FOUND,
+                    "message": "No users found",
+                    "errors": {"user_ids": "None of these users exist"}
+                },
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        created = MerchantNotification.notify(user_ids, data['category'], data['title'], data['message'])
+
+        return Response(
+            {
+                "status": status.HTTP_201_CREATED,
+                "message": f"Notification created for {created} users",
+                "data": {
+                    "created_count": created
+                }
+            },
+            status=status.HTTP_201_CREATED
+        )
+    except Exception as e:
+        return Response(
+            {
+                "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "message": "Failed to create notifications",
+                "errors": {"error": str(e)}
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@swagger_auto_schema(
+    method="put",
+    tags=["Notifications"],
+    operation_description="Mark every notification of the authenticated user as read",
+)
+@api_view(['PUT'])
+@permission_classes([IsAuthenticated])
+def mark_all_notifications_as_read(request):
+    """
+    Mark all notifications as read with one UPDATE
+    """
+    try:
+        updated = MerchantNotification.mark_all_read(request.user.id)
+
+        return Response(
+            {
+                "status": status.HTTP_200_OK,
+                "message": "All notifications marked as read",
+                "data": {
+                    "updated_count": updated,
+                    "unread_count": 0
+                }
+            },
+            status=status.HTTP_200_OK
+        )
+    except Exception as e:
+        return Response(
+            {
+                "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "message": "Failed to update notifications",
+                "errors": {"error": str(e)}
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @swagger_auto_schema(
     method="put",
     tags=["Notifications"],
@@ -2342,6 +2723,7 @@ def mark_notification_as_read(request, notification_id):
             user=request.user
         )
         
+        # save() moves the user's unread counter when the flag changes
         notification.is_read = request.data.get('is_read', True)
         notification.save()
         
@@ -2410,6 +2792,7 @@ def delete_notification(request, notification_id):
             user=request.user
         )
         
+        # delete() decrements the unread counter for an unread notification
         notification.delete()
         
         return Response(
@@ -2483,173 +2866,87 @@ def upload_bulk_shipment(request):
     pickup_contact_phone = serializer.validated_data.get('pickup_contact_phone', '')
     
     try:
-        # Read CSV file
-        csv_content = csv_file.read().decode('utf-8')
-        csv_reader = csv.DictReader(io.StringIO(csv_content))
-        
-        # Validate CSV headers
-        required_headers = ['receiver_name', 'phone_number', 'address', 'postal_code', 'package_size']
-        if not all(header in csv_reader.fieldnames for header in required_headers):
-            # print(header)
-            # print(header)
+        # Validate headers and count rows in a single streaming pass
+        try:
+            total_rows = count_csv_rows(csv_file)
+        except BulkShipmentFileError as e:
             return Response(
                 {
                     "status": status.HTTP_400_BAD_REQUEST,
                     "message": "Invalid CSV format",
                     "errors": {
-                        "csv_file": f"CSV must contain these columns: {', '.join(required_headers)}"
+                        "csv_file": str(e)
                     }
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Read all rows
-        rows = list(csv_reader)
-            # print(header)
-            # print(header)
-        
         # Validate minimum rows (at least 10)
-        if len(rows) < 10:
+        if total_rows < MINIMUM_SHIPMENTS:
             return Response(
                 {
                     "status": status.HTTP_400_BAD_REQUEST,
                     "message": "Minimum shipment requirement not met",
                     "errors": {
-                        "csv_file": f"Bulk shipments require at least 10 items. Your file contains {len(rows)} items."
+                        "csv_file": f"Bulk shipments require at least {MINIMUM_SHIPMENTS} items. Your file contains {total_rows} items."
                     }
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create BulkShipmentUpload record
-        bulk_upload = BulkShipmentUpload.objects.create(
-            user=request.user,
-            status="PROCESSING",
-            total_shipments=len(rows),
-            csv_file=csv_file
-        )
-        
-        # Initialize calculator
-        calculator = BulkDeliveryFeeCalculator()
-        
-        # Process each row
-        valid_count = 0
-        invalid_count = 0
-        total_fees = {
-            'delivery_fee': Decimal('0.00'),
-            'base_fee': Decimal('0.00'),
-            'distance_fee': Decimal('0.00'),
-            'speed_fee': Decimal('0.00'),
-            'addons_fee': Decimal('0.00'),
-        }
-        
-        validation_errors = []
-        
-        for idx, row in enumerate(rows, start=1):
-            try:
-                # Extract data from row
-                receiver_name = row.get('receiver_name', '').strip()
-                phone_number = row.get('phone_number', '').strip()
-                delivery_address = row.get('address', '').strip()
-                postal_code = row.get('postal_code', '').strip()
-                package_size = row.get('package_size', '').strip()
-                
-                # Basic validation
-                if not all([receiver_name, phone_number, delivery_address, postal_code, package_size]):
-                    raise ValueError("Missing required fields")
-                
-                # Validate package size format
-                is_valid, error = calculator.validate_package_weight(package_size)
-                if not is_valid:
-                    raise ValueError(error)
-                
-                # Validate delivery address
-                is_valid, cleaned_address, error = calculator.validate_location(delivery_address)
-                if not is_valid:
-                    raise ValueError(error)
-                
-                # Calculate distance (using pickup address from request or default)
-                distance_km, distance_error = calculator.calculate_distance(
-                    pickup_address or "Calgary, Alberta, Canada",
-                    cleaned_address
+        # Large files (or callers that ask for it) are handed to the job queue
+        if should_process_async(total_rows, serializer.validated_data.get('process_async')):
+            with transaction.atomic():
+                bulk_upload = BulkShipmentUpload.objects.create(
+                    user=request.user,
+                    status="PROCESSING",
+                    total_shipments=total_rows,
+                    csv_file=csv_file
                 )
-                
-                if distance_error:
-                    raise ValueError(distance_error)
-                
-                # Calculate fees for this shipment
-                fee_breakdown = calculator.calculate_delivery_fee(
-                    distance_km=distance_km,
-                    package_weight=package_size,
+                enqueue_bulk_shipment_job(
+                    bulk_upload,
                     delivery_speed=delivery_speed,
-                    addons=[]
-                )
-                
-                # Create BulkShipmentItem
-                BulkShipmentItem.objects.create(
-                    bulk_upload=bulk_upload,
-                    row_number=idx,
-                    receiver_name=receiver_name,
-                    phone_number=phone_number,
-                    delivery_address=cleaned_address,
-                    postal_code=postal_code,
-                    weight_range=package_size,
                     pickup_address=pickup_address,
                     pickup_contact_name=pickup_contact_name,
                     pickup_contact_phone=pickup_contact_phone,
-                    delivery_fee=fee_breakdown['total_fee'],
-                    base_fee=fee_breakdown['base_fee'],
-                    distance_fee=fee_breakdown['distance_fee'],
-                    speed_fee=fee_breakdown['speed_fee'],
-                    addons_fee=fee_breakdown['addons_fee'],
-                    distance_km=Decimal(str(distance_km)),
-                    is_valid=True,
-                    status="VALID"
                 )
-                
-                # Accumulate totals
-                total_fees['delivery_fee'] += fee_breakdown['total_fee']
-                total_fees['base_fee'] += fee_breakdown['base_fee']
-                total_fees['distance_fee'] += fee_breakdown['distance_fee']
-                total_fees['speed_fee'] += fee_breakdown['speed_fee']
-                total_fees['addons_fee'] += fee_breakdown['addons_fee']
-                
-                valid_count += 1
-                
-            except Exception as e:
-                # Create invalid item
-                BulkShipmentItem.objects.create(
-                    bulk_upload=bulk_upload,
-                    row_number=idx,
-                    receiver_name=row.get('receiver_name', ''),
-                    phone_number=row.get('phone_number', ''),
-                    delivery_address=row.get('address', ''),
-                    postal_code=row.get('postal_code', ''),
-                    weight_range=row.get('package_size', ''),
-                    is_valid=False,
-                    status="INVALID",
-                    validation_error=str(e)
-                )
-                
-                validation_errors.append({
-                    'row': idx,
-                    'error': str(e),
-                    'data': row
-                })
-                
-                invalid_count += 1
-        
-        # Update bulk upload with totals
-        bulk_upload.valid_shipments = valid_count
-        bulk_upload.invalid_shipments = invalid_count
-        bulk_upload.total_delivery_fee = total_fees['delivery_fee']
-        bulk_upload.total_base_fee = total_fees['base_fee']
-        bulk_upload.total_distance_fee = total_fees['distance_fee']
-        bulk_upload.total_speed_fee = total_fees['speed_fee']
-        bulk_upload.total_addons_fee = total_fees['addons_fee']
-        bulk_upload.validation_errors = validation_errors
-        bulk_upload.status = "PENDING" if valid_count > 0 else "FAILED"
-        bulk_upload.save()
+            
+            return Response(
+                {
+                    "status": status.HTTP_202_ACCEPTED,
+                    "message": f"Bulk shipment queued for processing: {total_rows} rows",
+                    "data": get_job_progress(bulk_upload),
+                    "progress_url": f"/package/bulk-shipment/{bulk_upload.bulk_tracking_id}/progress/"
+                },
+                status=status.HTTP_202_ACCEPTED
+            )
+        
+        # Load geocodes and distances for the whole file in one batched lookup
+        calculator = get_bulk_calculator()
+        prefetch_csv_distances(csv_file, pickup_address, calculator)
+        
+        with transaction.atomic():
+            # Create BulkShipmentUpload record
+            bulk_upload = BulkShipmentUpload.objects.create(
+                user=request.user,
+                status="PROCESSING",
+                total_shipments=total_rows,
+                csv_file=csv_file
+            )
+            
+            # Validate, price and store rows in batches
+            process_bulk_shipment_rows(
+                bulk_upload,
+                iter_csv_rows(csv_file),
+                delivery_speed=delivery_speed,
+                pickup_address=pickup_address,
+                pickup_contact_name=pickup_contact_name,
+                pickup_contact_phone=pickup_contact_phone,
+                calculator=calculator,
+            )
+        
+        valid_count = bulk_upload.valid_shipments
+        invalid_count = bulk_upload.invalid_shipments
         
         # Serialize response
         response_serializer = BulkShipmentUploadSerializer(bulk_upload)
@@ -2677,6 +2974,39 @@ def upload_bulk_shipment(request):
 
 
 
+@swagger_auto_schema(
+    method="get",
+    tags=["Bulk Shipment"],
+    operation_description="Get processing progress of a bulk shipment upload",
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_bulk_shipment_progress(request, bulk_tracking_id):
+    """Report rows processed, valid/invalid counts and ETA for a bulk upload"""
+    try:
+        bulk_upload = BulkShipmentUpload.objects.get(
+            bulk_tracking_id=bulk_tracking_id,
+            user=request.user
+        )
+    except BulkShipmentUpload.DoesNotExist:
+        return Response(
+            {
+                "status": status.HTTP_404_NOT_FOUND,
+                "message": "Bulk shipment not found"
+            },
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    return Response(
+        {
+            "status": status.HTTP_200_OK,
+            "message": "Bulk shipment progress retrieved successfully",
+            "data": get_job_progress(bulk_upload)
+        },
+        status=status.HTTP_200_OK
+    )
+
+
 @swagger_auto_schema(
     method="get",
     tags=["Bulk Shipment"],
@@ -2769,6 +3099,7 @@ def get_all_bulk_shipment(request, bulk_tracking_id):
     method="get",
     tags=["Bulk Shipment"],
     operation_description="Get all bulk shipments for current user",
+    manual_parameters=PAGINATION_PARAMETERS,
     # responses={
     #     200: openapi.Response(
     #         description="List of bulk shipments",
@@ -2779,20 +3110,35 @@ def get_all_bulk_shipment(request, bulk_tracking_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_all_bulk_shipments(request):
-    """Get all bulk shipments for the authenticated user"""
+    """Get bulk shipments for the authenticated user, newest first, one page at a time"""
     try:
-        bulk_shipments = BulkShipmentUpload.objects.filter(user=request.user)
+        bulk_shipments, pagination = paginate_queryset(
+            request,
+            BulkShipmentUpload.objects.filter(user=request.user).select_related('user'),
+            ordering=('-created_at', '-id')
+        )
         serializer = BulkShipmentUploadListSerializer(bulk_shipments, many=True)
         
         return Response(
             {
                 "status": status.HTTP_200_OK,
                 "message": "Bulk shipments retrieved successfully",
+                "pagination": pagination,
                 "data": serializer.data
             },
             status=status.HTTP_200_OK
         )
         
+    except InvalidCursor as e:
+        return Response(
+            {
+                "status": status.HTTP_400_BAD_REQUEST,
+                "message": "Failed to retrieve bulk shipments",
+                "errors": {"cursor": str(e)}
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+        
     except Exception as e:
         logger.error(f"Error fetching bulk shipments: {str(e)}")
         return Response(
@@ -2810,6 +3156,7 @@ def get_all_bulk_shipments(request):
     method="get",
     tags=["Bulk Shipment"],
     operation_description="Get all bulk shipments for current user",
+    manual_parameters=PAGINATION_PARAMETERS,
     # responses={
     #     200: openapi.Response(
     #         description="List of bulk shipments",
@@ -2820,20 +3167,35 @@ def get_all_bulk_shipments(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_alluser_bulk_shipments(request):
-    """Get all bulk shipments for the authenticated user"""
+    """Get bulk shipments for the authenticated user, newest first, one page at a time"""
     try:
-        bulk_shipments = BulkShipmentUpload.objects.all()
+        bulk_shipments, pagination = paginate_queryset(
+            request,
+            BulkShipmentUpload.objects.select_related('user'),
+            ordering=('-created_at', '-id')
+        )
         serializer = BulkShipmentUploadListSerializer(bulk_shipments, many=True)
         
         return Response(
             {
                 "status": status.HTTP_200_OK,
                 "message": "Bulk shipments retrieved successfully",
+                "pagination": pagination,
                 "data": serializer.data
             },
             status=status.HTTP_200_OK
         )
         
+    except InvalidCursor as e:
+        return Response(
+            {
+                "status": status.HTTP_400_BAD_REQUEST,
+                "message": "Failed to retrieve bulk shipments",
+                "errors": {"cursor": str(e)}
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+        
     except Exception as e:
         logger.error(f"Error fetching bulk shipments: {str(e)}")
         return Response(
@@ -2886,10 +3248,12 @@ def update_bulk_shipment_payment(request, bulk_tracking_id):
         bulk_upload.save()
         
         # Update all valid items to NOT_PICKED_UP status
-        BulkShipmentItem.objects.filter(
-            bulk_upload=bulk_upload,
-            is_valid=True
-        ).update(status='NOT_PICKED_UP')
+        transition_bulk_items(
+            BulkShipmentItem.objects.filter(bulk_upload=bulk_upload, is_valid=True),
+            'NOT_PICKED_UP',
+            notes="Payment received",
+            updated_by=request.user
+        )
         
         return Response(
             {
@@ -2973,12 +3337,16 @@ def update_bulk_shipment_status(request):
             
             # Update all valid shipment items to the new status
             # Only update items that are not INVALID or PENDING
-            updated_count = BulkShipmentItem.objects.filter(
-                bulk_upload=bulk_upload,
-                is_valid=True
-            ).exclude(
-                status__in=['INVALID', 'PENDING']
-            ).update(status=new_status)
+            updated_count = transition_bulk_items(
+                BulkShipmentItem.objects.filter(
+                    bulk_upload=bulk_upload,
+                    is_valid=True
+                ).exclude(
+                    status__in=['INVALID', 'PENDING']
+                ),
+                new_status,
+                updated_by=request.user
+            )
             
             # If updating to a delivery status, ensure items are marked as valid
             if new_status in ['NOT_PICKED_UP', 'PICKED_UP', 'IN_TRANSIT', 'OUT_FOR_DELIVERY', 'DELIVERED']:
@@ -3418,7 +3786,7 @@ def get_all_pickup_schedules(request):
         )
     
     try:
-        pickups = PickupSchedule.objects.all()
+        pickups = PickupSchedule.objects.select_related('created_by')
         
         # Optional filtering
         schedule_type = request.query_params.get('schedule_type', None)
@@ -3798,10 +4166,12 @@ def update_bulk_shipment_payment(request, bulk_tracking_id):
         bulk_upload.save()
         
         # Update all valid items to NOT_PICKED_UP status
-        updated_count = BulkShipmentItem.objects.filter(
-            bulk_upload=bulk_upload,
-            is_valid=True
-        ).update(status='NOT_PICKED_UP')
+        updated_count = transition_bulk_items(
+            BulkShipmentItem.objects.filter(bulk_upload=bulk_upload, is_valid=True),
+            'NOT_PICKED_UP',
+            notes="Payment received",
+            updated_by=request.user
+        )
         
         logger.info(f"Payment updated for {bulk_tracking_id}: {updated_count} items set to NOT_PICKED_UP")
         
@@ -3976,10 +4346,11 @@ def stripe_webhook_bulk_payment(request):
                 bulk_upload.save()
                 
                 # Update all valid items to NOT_PICKED_UP
-                updated_count = BulkShipmentItem.objects.filter(
-                    bulk_upload=bulk_upload,
-                    is_valid=True
-                ).update(status='NOT_PICKED_UP')
+                updated_count = transition_bulk_items(
+                    BulkShipmentItem.objects.filter(bulk_upload=bulk_upload, is_valid=True),
+                    'NOT_PICKED_UP',
+                    notes="Payment received via Stripe"
+                )
                 
                 logger.info(
                     f"Webhook: Payment successful for {bulk_tracking_id}. "
@@ -4036,44 +4407,17 @@ def merchant_delivery_statistics(request):
     - out_for_delivery: Deliveries with OUT_FOR_DELIVERY status
     
     Includes both PackageDelivery and BulkShipmentItem deliveries.
-    """
-    user = request.user
     
-    # Get counts from PackageDelivery model
-    package_total = PackageDelivery.objects.filter(user=user).count()
-    package_delivered = PackageDelivery.objects.filter(
-        user=user,
-        status="DELIVERED"
-    ).count()
-    package_out_for_delivery = PackageDelivery.objects.filter(
-        user=user,
-        status="OUT_FOR_DELIVERY"
-    ).count()
-    
-    # Get counts from BulkShipmentItem model
-    # BulkShipmentItem is related to user through bulk_upload.user
-    bulk_total = BulkShipmentItem.objects.filter(
-        bulk_upload__user=user
-    ).count()
-    bulk_delivered = BulkShipmentItem.objects.filter(
-        bulk_upload__user=user,
-        status="DELIVERED"
-    ).count()
-    bulk_out_for_delivery = BulkShipmentItem.objects.filter(
-        bulk_upload__user=user,
-        status="OUT_FOR_DELIVERY"
-    ).count()
-    
-    # Combine counts from both models
-    active_deliveries = package_total + bulk_total
-    delivered = package_delivered + bulk_delivered
-    out_for_delivery = package_out_for_delivery + bulk_out_for_delivery
+    One conditional aggregate per model, or a single primary-key read
+    when MERCHANT_STATS_TABLE is on.
+    """
+    stats = MerchantDeliveryStats.for_user(request.user.id)
 
     return Response(
         {
-            "active_deliveries": active_deliveries,
-            "delivered": delivered,
-            "out_for_delivery": out_for_delivery,
+            "active_deliveries": stats["active_deliveries"],
+            "delivered": stats["delivered"],
+            "out_for_delivery": stats["out_for_delivery"],
         },
         status=status.HTTP_200_OK
     )
@@ -4356,7 +4700,7 @@ def get_user_feedback(request):
                 "id": feedback.id,
                 "email": feedback.email,
                 "issue_type": feedback.issue_type,
-                "issue_type_display": feedback.get_issue_type_display(),
+                "issue_type_display": feedback.issue_type,  # free text; the field has no choices
                 "tracking_id": feedback.tracking_id,
                 "description": feedback.description,
                 "status": feedback.status,
@@ -4451,7 +4795,7 @@ def get_feedback_detail(request, feedback_id):
             "id": feedback.id,
             "email": feedback.email,
             "issue_type": feedback.issue_type,
-            "issue_type_display": feedback.get_issue_type_display(),
+            "issue_type_display": feedback.issue_type,  # free text; the field has no choices
             "tracking_id": feedback.tracking_id,
             "description": feedback.description,
             "status": feedback.status,
@@ -4505,7 +4849,7 @@ def get_feedback_detail(request, feedback_id):
             type=openapi.TYPE_STRING,
             required=False
         )
-    ],
+    ] + PAGINATION_PARAMETERS,
 )
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])  # Add IsAdminUser for production
@@ -4536,8 +4880,12 @@ def admin_get_all_feedback(request):
         if issue_type:
             feedbacks = feedbacks.filter(issue_type=issue_type)
         
-        # Order by most recent
-        feedbacks = feedbacks.order_by('-created_at')
+        # One page, most recent first
+        feedbacks, pagination = paginate_queryset(
+            request,
+            feedbacks.select_related('user'),
+            ordering=('-created_at', '-id')
+        )
         
         # Serialize feedback data
         feedback_list = []
@@ -4547,7 +4895,7 @@ def admin_get_all_feedback(request):
                 "user_id": feedback.user.id if feedback.user else None,
                 "email": feedback.email,
                 "issue_type": feedback.issue_type,
-                "issue_type_display": feedback.get_issue_type_display(),
+                "issue_type_display": feedback.issue_type,  # free text; the field has no choices
                 "tracking_id": feedback.tracking_id,
                 "description": feedback.description,
                 "status": feedback.status,
@@ -4564,12 +4912,23 @@ def admin_get_all_feedback(request):
             {
                 "status": status.HTTP_200_OK,
                 "success": True,
-                "count": feedbacks.count(),
+                "count": len(feedback_list),
+                "pagination": pagination,
                 "data": feedback_list
             },
             status=status.HTTP_200_OK
         )
     
+    except InvalidCursor as e:
+        return Response(
+            {
+                "status": status.HTTP_400_BAD_REQUEST,
+                "success": False,
+                "message": str(e)
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
     except Exception as e:
         logger.error(f"Error retrieving all feedback: {str(e)}")
         return Response(
@@ -4599,7 +4958,7 @@ def get_my_pickup_schedules(request):
     """
     schedules = PickupSchedule.objects.filter(
         created_by=request.user
-    )
+    ).select_related('created_by')
 
     serializer = PickupScheduleSerializer(schedules, many=True)
 
@@ -4626,7 +4985,7 @@ def get_all_pickup_schedules(request):
     """
     Return pickup schedules for all users (admin only)
     """
-    schedules = PickupSchedule.objects.all()
+    schedules = PickupSchedule.objects.select_related('created_by')
 
     serializer = PickupScheduleSerializer(schedules, many=True)
 